@@ -3,20 +3,50 @@ Main entry point for the Email Processing API.
 Initializes FastAPI app and startup event.
 """
 import os
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from api.routes import email, attachment, rag, classification, calendar, system
-import uvicorn
-import os
-from dotenv import load_dotenv
+from modules.startup_report import (
+    startup_stage, mark_startup_complete, get_startup_report, format_startup_report, missing_dependencies
+)
+
+with startup_stage("fastapi"):
+    import math
+    import time
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+    from fastapi.middleware.cors import CORSMiddleware
+    from starlette.routing import Match
+
+with startup_stage("modules.metrics"):
+    from modules.metrics import record_request
+    from modules.tracing import start_request_trace, finish_request_trace, debug_headers, DEBUG_HEADER
+    from modules.llm_scheduler import set_flow, reset_flow, LLMUnavailableError
+    from modules.logging_config import get_logger
+
+with startup_stage("dotenv"):
+    from dotenv import load_dotenv
+
+    # Chemin absolu vers le .env
+    dotenv_path = os.path.join(os.path.dirname(__file__), '../config/.env')
+    load_dotenv(dotenv_path)
+
+# Route modules only import light dependencies; heavy subsystems load on first use
+with startup_stage("api.routes.system"):
+    from api.routes import system
+with startup_stage("api.routes.email"):
+    from api.routes import email
+with startup_stage("api.routes.attachment"):
+    from api.routes import attachment
+with startup_stage("api.routes.rag"):
+    from api.routes import rag
+with startup_stage("api.routes.classification"):
+    from api.routes import classification
+with startup_stage("api.routes.calendar"):
+    from api.routes import calendar
 
-# Chemin absolu vers le .env
-dotenv_path = os.path.join(os.path.dirname(__file__), '../config/.env')
-load_dotenv(dotenv_path)
+logger = get_logger("startup")
 
-# Vérifie que les clés sont bien chargées
-print("NVIDIA_API_KEY_LLAMA3_8B:", os.getenv("NVIDIA_API_KEY_LLAMA3_8B"))
-print("NVIDIA_API_KEY_LLAMA3_70B:", os.getenv("NVIDIA_API_KEY_LLAMA3_70B"))
+# Vérifie que les clés sont bien chargées (sans afficher leur valeur)
+for key_name in ("NVIDIA_API_KEY_LLAMA3_8B", "NVIDIA_API_KEY_LLAMA3_70B"):
+    logger.info("%s: %s", key_name, "configured" if os.getenv(key_name) else "missing")
 
 # Constants
 TRANSLATION_CACHE_DIR = "translation_cache"
@@ -37,6 +67,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """Route path template of a request (bounded label cardinality), e.g. /api/rag/threads/{thread_id}/ask."""
+    for candidate in request.app.router.routes:
+        if candidate.matches(request.scope)[0] == Match.FULL:
+            return candidate.path
+    return "unmatched"
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Record request latency per route, trace the request (see modules/tracing.py) and queue its LLM calls per route."""
+    start = time.perf_counter()
+    route = route_template(request)
+    flow_token = set_flow(route)
+    debug = request.headers.get(DEBUG_HEADER, "").lower() in ("1", "true", "yes")
+    trace = start_request_trace(f"{request.method} {route}", request.headers.get("traceparent"), debug=debug)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    except BaseException:
+        if trace is not None:
+            finish_request_trace(trace, **{"http.route": route, "http.status_code": status_code})
+        raise
+    finally:
+        reset_flow(flow_token)
+        if trace is not None:
+            trace.detach()
+        record_request(request.method, route, status_code, time.perf_counter() - start)
+    
+    if trace is None:
+        return response
+    if debug:
+        response.headers.update(debug_headers(trace))
+    
+    # The root span ends once the body is sent, so streamed answers are included
+    body_iterator = response.body_iterator
+    async def traced_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            finish_request_trace(trace, **{"http.route": route, "http.status_code": status_code})
+    response.body_iterator = traced_body()
+    return response
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    """The LLM is still rate-limited or unreachable after the last retry: ask the client to retry later."""
+    logger.warning("LLM unavailable for %s: %s", request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"LLM temporarily unavailable: {exc}"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
 # Include routers
 app.include_router(system.router, prefix="")
 app.include_router(email.router, prefix="/api")
@@ -48,53 +133,43 @@ app.include_router(calendar.router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    print("=" * 60)
-    print("📧 Email Processing API Starting...")
-    print("=" * 60)
+    logger.info("Email Processing API starting")
     
     # Create cache directory if it doesn't exist
     os.makedirs(TRANSLATION_CACHE_DIR, exist_ok=True)
-    print(f"✅ Translation cache directory: {TRANSLATION_CACHE_DIR}")
+    logger.info("Translation cache directory: %s", TRANSLATION_CACHE_DIR)
     
     from modules.llm_client import MODEL_FOR_TRANSLATION, MODEL_FOR_SEMANTICS
-    print(f"✅ Translation model: {MODEL_FOR_TRANSLATION}")
-    print(f"✅ Semantic analysis model: {MODEL_FOR_SEMANTICS}")
+    logger.info("Translation model: %s", MODEL_FOR_TRANSLATION)
+    logger.info("Semantic analysis model: %s", MODEL_FOR_SEMANTICS)
     
-    # Feature availability status
-    from modules import calendar_service, attachment_processor, rag_processor, classification_processor
-    print("\n" + "=" * 60)
-    print("🔌 INTEGRATIONS STATUS")
-    print("=" * 60)
+    # Feature availability status (dependencies are checked, not imported)
+    integrations = [
+        ("calendar", "Calendar integration"),
+        ("attachment_processing", "Attachment processing"),
+        ("rag_qa", "RAG Q&A"),
+        ("classification", "Document classification")
+    ]
+    for subsystem, label in integrations:
+        missing = missing_dependencies(subsystem)
+        if missing:
+            logger.warning("%s: Disabled (install: %s)", label, ", ".join(missing))
+        else:
+            logger.info("%s: Enabled", label)
     
-    try:
-        calendar_service.get_calendar_service
-        print(f"✅ Calendar integration: Enabled")
-    except:
-        print(f"⚠️  Calendar integration: Disabled (module not found)")
+    mark_startup_complete()
+    logger.info("Startup time\n%s", format_startup_report(get_startup_report()))
     
-    try:
-        attachment_processor.process_file_bytes
-        print(f"✅ Attachment processing: Enabled")
-    except:
-        print(f"⚠️  Attachment processing: Disabled (install: pytesseract, python-docx, opencv-python)")
-    
-    try:
-        rag_processor.answer_question
-        print(f"✅ RAG Q&A: Enabled")
-    except:
-        print(f"⚠️  RAG Q&A: Disabled (install: langchain, chromadb, sentence-transformers)")
-    
-    try:
-        classification_processor.classify_document
-        print(f"✅ Document classification: Enabled")
-    except:
-        print(f"⚠️  Document classification: Disabled (install: scikit-learn, langchain, chromadb)")
-    
-    print("=" * 60)
-    print("🚀 API Ready! Visit /docs for interactive documentation")
-    print("=" * 60)
+    # Load the embedding model, OCR engine and LLM connections in the background;
+    # /ready reports when this worker is warm
+    from modules.warmup import start_warmup, WARMUP_SUBSYSTEMS
+    start_warmup()
+    logger.info("Background warmup started: %s", ", ".join(WARMUP_SUBSYSTEMS) or "disabled")
+    logger.info("API ready, visit /docs for interactive documentation")
 
 if __name__ == "__main__":
+    import uvicorn
+
     print("\n" + "=" * 60)
     print("🚀 Starting Email Processing API Server...")
     print("=" * 60)
@@ -2,7 +2,7 @@
 Pydantic models for calendar integration endpoints.
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 
 class CalendarEventRequest(BaseModel):
     """Request model for creating calendar events"""
@@ -38,9 +38,50 @@ class CalendarAvailabilityResponse(BaseModel):
             }
         }
 
+class CalendarSlot(BaseModel):
+    """A free time slot, in the requested time zone"""
+    start: str = Field(..., description="Slot start (ISO 8601 with offset)")
+    end: str = Field(..., description="Slot end (ISO 8601 with offset)")
+    date: str = Field(..., description="Slot date in YYYY-MM-DD format")
+    heure: str = Field(..., description="Slot start time in HH:MM format")
+    heure_fin: str = Field(..., description="Slot end time in HH:MM format")
+    duree_minutes: int = Field(..., description="Slot duration in minutes")
+
+class CalendarSlotsResponse(BaseModel):
+    """Response model for the free slots endpoint"""
+    timezone: str
+    horizon_days: int
+    slot_minutes: int
+    working_hours: List[List[int]] = Field(..., description="Local working hour ranges, e.g. [[8, 12], [14, 17]]")
+    slots: List[CalendarSlot]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "timezone": "Africa/Tunis",
+                "horizon_days": 7,
+                "slot_minutes": 60,
+                "working_hours": [[8, 12], [14, 17]],
+                "slots": [
+                    {
+                        "start": "2025-10-08T09:00:00+01:00",
+                        "end": "2025-10-08T10:00:00+01:00",
+                        "date": "2025-10-08",
+                        "heure": "09:00",
+                        "heure_fin": "10:00",
+                        "duree_minutes": 60
+                    }
+                ]
+            }
+        }
+
 class CalendarAnalyzeRequest(BaseModel):
     """Request model for analyzing meeting requests in emails"""
     text: str = Field(..., description="Email text to analyze for meeting proposals")
+    use_preparser: bool = Field(
+        default=True,
+        description="Resolve clear-cut texts (no meeting, one explicit date and time) without calling the LLM"
+    )
     
     class Config:
         json_schema_extra = {
@@ -58,4 +99,38 @@ class CalendarEventResponse(BaseModel):
             "example": {
                 "htmlLink": "https://www.google.com/calendar/event?eid=..."
             }
-        }
\ No newline at end of file
+        }
+
+class CalendarBatchScheduleRequest(BaseModel):
+    """Request model for creating several calendar events in one request"""
+    events: List[CalendarEventRequest] = Field(..., description="Events to create", min_length=1, max_length=200)
+    skip_conflicts: bool = Field(
+        default=True,
+        description="Skip events overlapping the calendar or an earlier event of the batch"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "events": [
+                    {"date": "2025-10-15", "heure": "09:00", "duree_minutes": 30, "summary": "Daily"},
+                    {"date": "2025-10-15", "heure": "14:00", "duree_minutes": 60, "summary": "Q4 Project Planning Meeting"}
+                ],
+                "skip_conflicts": True
+            }
+        }
+
+class CalendarBatchItem(BaseModel):
+    """Outcome of one event of a batch"""
+    index: int = Field(..., description="Position of the event in the request")
+    status: Literal["created", "occupied", "error"]
+    event_id: Optional[str] = None
+    htmlLink: Optional[str] = None
+    detail: Optional[str] = None
+
+class CalendarBatchScheduleResponse(BaseModel):
+    """Response model for batch event creation"""
+    results: List[CalendarBatchItem]
+    created: int
+    occupied: int
+    failed: int
@@ -2,18 +2,29 @@
 Pydantic models for document classification endpoints.
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List, Literal, Optional
 
 class ClassificationRequest(BaseModel):
     """Request model for document classification"""
     text_content: str = Field(..., description="Text content to classify")
-    num_themes: int = Field(default=5, description="Number of themes to detect", ge=2, le=15)
+    num_themes: Optional[int] = Field(
+        default=5,
+        description="Number of themes to detect, or null to select it automatically (2-15)",
+        ge=2,
+        le=15
+    )
+    description_mode: Literal["concurrent", "batched"] = Field(
+        default="concurrent",
+        description="'concurrent' labels each theme in parallel calls, 'batched' labels all themes in a single call"
+    )
+    use_label_cache: bool = Field(default=True, description="Reuse stored labels of themes with a similar centroid")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "text_content": "This document discusses various aspects of agriculture, technology, and environmental sustainability...",
-                "num_themes": 5
+                "num_themes": 5,
+                "description_mode": "concurrent"
             }
         }
 
@@ -22,6 +33,9 @@ class ThemeInfo(BaseModel):
     theme_id: int
     description: str
     representative_text: str
+    from_label_cache: bool = Field(default=False, description="Whether the label was reused from the theme label store")
+    chunk_count: int = Field(default=0, description="Number of document chunks assigned to the theme")
+    percentage: float = Field(default=0.0, description="Share of the document chunks assigned to the theme")
 
 class ClassificationResponse(BaseModel):
     """Response model for document classification"""
@@ -29,6 +43,8 @@ class ClassificationResponse(BaseModel):
     total_themes: int = Field(..., description="Total number of themes detected")
     total_chunks: int = Field(..., description="Total number of document chunks")
     processing_time_seconds: float = Field(..., description="Time taken to process")
+    label_cache_hits: int = Field(default=0, description="Number of theme labels reused from the theme label store")
+    from_analysis_cache: bool = Field(default=False, description="Whether the clustering of this document was reused")
     
     class Config:
         json_schema_extra = {
@@ -47,6 +63,160 @@ class ClassificationResponse(BaseModel):
                 ],
                 "total_themes": 5,
                 "total_chunks": 42,
-                "processing_time_seconds": 8.45
+                "processing_time_seconds": 8.45,
+                "label_cache_hits": 2
+            }
+        }
+
+class ThemeDistributionRequest(BaseModel):
+    """Request model for the theme distribution of a document"""
+    text_content: str = Field(..., description="Text content to analyze")
+    num_themes: Optional[int] = Field(
+        default=5,
+        description="Number of themes to detect, or null to select it automatically (2-15)",
+        ge=2,
+        le=15
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "text_content": "This document discusses various aspects of agriculture, technology, and environmental sustainability...",
+                "num_themes": 5
             }
-        }
\ No newline at end of file
+        }
+
+class ThemeDistributionTheme(BaseModel):
+    """A theme of the distribution, with its description once the document has been classified"""
+    theme_id: int
+    description: Optional[str] = None
+    representative_text: str
+    from_label_cache: bool = False
+    chunk_count: int
+    percentage: float
+
+class ThemeDistributionResponse(BaseModel):
+    """Response model for the theme distribution of a document"""
+    total_chunks: int
+    requested_themes: Optional[int] = None
+    actual_themes: int
+    distribution: Dict[int, int] = Field(..., description="Number of chunks per theme ID")
+    theme_percentages: Dict[int, float] = Field(..., description="Share of chunks per theme ID")
+    themes: List[ThemeDistributionTheme]
+    algorithm: str = Field(..., description="Clustering algorithm used")
+    from_analysis_cache: bool = Field(..., description="Whether the clustering of this document was reused")
+
+class ThemeLabel(BaseModel):
+    """A theme label stored in the theme label store"""
+    label_id: str
+    label: str
+    curated: bool = Field(..., description="Whether the label was created or edited manually")
+    example_text: str = Field(default="", description="Representative text of the theme")
+    hits: int = Field(..., description="Number of times the label was reused")
+    created_at: float
+    updated_at: float
+    last_used_at: Optional[float] = None
+
+class ThemeLabelStats(BaseModel):
+    """Usage statistics of the theme label store"""
+    labels: int
+    curated_labels: int
+    lookups: int = Field(..., description="Centroid lookups since startup")
+    hits: int = Field(..., description="Lookups answered from the store since startup")
+    hit_rate: float
+    similarity_threshold: float
+
+class ThemeLabelListResponse(BaseModel):
+    """Response model for listing theme labels"""
+    labels: List[ThemeLabel]
+    stats: ThemeLabelStats
+
+class ThemeLabelCreateRequest(BaseModel):
+    """Request model for manually adding a theme label from example text"""
+    label: str = Field(..., description="Theme label", min_length=1)
+    example_text: str = Field(..., description="Example text whose embedding defines the theme", min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "label": "Facturation",
+                "example_text": "Veuillez trouver ci-joint la facture n° 2024-118, payable sous 30 jours."
+            }
+        }
+
+class ThemeLabelUpdateRequest(BaseModel):
+    """Request model for renaming a theme label"""
+    label: str = Field(..., description="New theme label", min_length=1)
+
+
+class MailboxDocument(BaseModel):
+    """An email or attachment to add to the mailbox topic model"""
+    document_id: str = Field(..., description="Stable identifier of the message or attachment")
+    text: str = Field(..., description="Text content of the document")
+    source: Literal["message", "attachment"] = Field(default="message", description="Kind of document")
+    subject: Optional[str] = Field(default=None, description="Email subject or attachment filename")
+
+class MailboxIngestRequest(BaseModel):
+    """Request model for ingesting documents into the mailbox topic model"""
+    documents: List[MailboxDocument] = Field(..., description="Documents to add or update", min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "documents": [
+                    {
+                        "document_id": "18c2f1a9b7e4d3c2",
+                        "text": "Veuillez trouver ci-joint la facture n° 2024-118, payable sous 30 jours.",
+                        "source": "message",
+                        "subject": "Facture octobre"
+                    }
+                ]
+            }
+        }
+
+class MailboxAssignment(BaseModel):
+    """Theme assignment of a mailbox document"""
+    document_id: str
+    theme_id: Optional[int] = Field(None, description="Assigned theme, null until the first fit")
+    similarity: Optional[float] = Field(None, description="Cosine similarity to the theme centroid")
+    outlier: bool = Field(..., description="Whether the document is far from every theme")
+    unchanged: bool = Field(default=False, description="Whether the document was already ingested with the same content")
+    label: Optional[str] = None
+
+class MailboxIngestResponse(BaseModel):
+    """Response model for mailbox ingestion"""
+    assignments: List[MailboxAssignment]
+    refitted: bool = Field(..., description="Whether the themes were re-fitted during this call")
+    total_documents: int
+    total_themes: int
+
+class MailboxThemeInfo(BaseModel):
+    """Share of the mailbox assigned to a theme"""
+    theme_id: int
+    label: Optional[str] = None
+    documents: int
+    percentage: float
+
+class MailboxThemesResponse(BaseModel):
+    """Response model for the mailbox theme distribution"""
+    total_documents: int
+    assigned_documents: int
+    total_themes: int
+    themes: List[MailboxThemeInfo]
+    assigned_since_fit: int = Field(..., description="Documents assigned online since the last re-fit")
+    last_fit_at: Optional[float] = None
+
+class MailboxThemeMember(BaseModel):
+    """A document assigned to a mailbox theme"""
+    document_id: str
+    source: Optional[str] = None
+    subject: Optional[str] = None
+    theme_id: Optional[int] = None
+    similarity: Optional[float] = None
+    ingested_at: float
+
+class MailboxThemeMembersResponse(BaseModel):
+    """Response model for the members of a mailbox theme"""
+    theme_id: int
+    label: Optional[str] = None
+    documents: List[MailboxThemeMember]
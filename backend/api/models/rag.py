@@ -2,7 +2,7 @@
 Pydantic models for RAG question answering endpoints.
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class RAGQuestionRequest(BaseModel):
     """Request model for RAG question answering"""
@@ -10,6 +10,10 @@ class RAGQuestionRequest(BaseModel):
     text_content: str = Field(..., description="Text content to search for answers")
     top_k: int = Field(default=3, description="Number of similar chunks to retrieve", ge=1, le=10)
     apply_correction: bool = Field(default=True, description="Apply correction step to the answer")
+    correction_mode: Literal["inline", "two_pass"] = Field(
+        default="inline",
+        description="'inline' corrects the answer within the generation call, 'two_pass' uses a separate correction call"
+    )
     
     class Config:
         json_schema_extra = {
@@ -17,7 +21,8 @@ class RAGQuestionRequest(BaseModel):
                 "question": "Comment les agriculteurs irriguent-ils leurs cultures?",
                 "text_content": "Les agriculteurs utilisent diverses méthodes d'irrigation...",
                 "top_k": 3,
-                "apply_correction": True
+                "apply_correction": True,
+                "correction_mode": "inline"
             }
         }
 
@@ -29,6 +34,7 @@ class RAGAnswerResponse(BaseModel):
     context_chunks: List[str] = Field(..., description="Retrieved context chunks used")
     total_chunks: int = Field(..., description="Total number of document chunks")
     generation_time_seconds: float = Field(..., description="Time taken to generate answer")
+    correction_mode: Optional[str] = Field(None, description="Correction mode used, if correction was applied")
     
     class Config:
         json_schema_extra = {
@@ -41,6 +47,87 @@ class RAGAnswerResponse(BaseModel):
                     "Les technologies d'irrigation incluent..."
                 ],
                 "total_chunks": 25,
-                "generation_time_seconds": 2.34
+                "generation_time_seconds": 2.34,
+                "correction_mode": "inline"
             }
-        }
\ No newline at end of file
+        }
+
+class RAGStreamRequest(BaseModel):
+    """Request model for streaming RAG question answering"""
+    question: str = Field(..., description="Question to answer")
+    text_content: str = Field(..., description="Text content to search for answers")
+    top_k: int = Field(default=3, description="Number of similar chunks to retrieve", ge=1, le=10)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "question": "Comment les agriculteurs irriguent-ils leurs cultures?",
+                "text_content": "Les agriculteurs utilisent diverses méthodes d'irrigation...",
+                "top_k": 3
+            }
+        }
+
+
+class ThreadDocument(BaseModel):
+    """A document (message or attachment) belonging to an email thread"""
+    document_id: str = Field(..., description="Stable identifier of the message or attachment")
+    text: str = Field(..., description="Text content of the document")
+    source: Literal["message", "attachment"] = Field(default="message", description="Kind of document")
+
+class ThreadDocumentsRequest(BaseModel):
+    """Request model for indexing thread documents"""
+    documents: List[ThreadDocument] = Field(..., description="Documents to add or update", min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "documents": [
+                    {
+                        "document_id": "18c2f1a9b7e4d3c2",
+                        "text": "Bonjour, la réunion de lancement aura lieu jeudi à 10h.",
+                        "source": "message"
+                    },
+                    {
+                        "document_id": "18c2f1a9b7e4d3c2/planning.pdf",
+                        "text": "Planning prévisionnel du projet Atlas...",
+                        "source": "attachment"
+                    }
+                ]
+            }
+        }
+
+class ThreadIndexResponse(BaseModel):
+    """Response model for thread indexing"""
+    thread_id: str
+    added: List[str] = Field(..., description="Newly indexed document ids")
+    updated: List[str] = Field(..., description="Re-indexed document ids whose content changed")
+    unchanged: List[str] = Field(..., description="Document ids skipped because their content is unchanged")
+    chunks_added: int = Field(..., description="Number of chunks embedded by this call")
+    total_chunks: int = Field(..., description="Total number of chunks in the thread index")
+    indexing_time_seconds: float = Field(..., description="Time taken to index the documents")
+
+class ThreadDocumentInfo(BaseModel):
+    """Information about an indexed thread document"""
+    document_id: str
+    source: Optional[str] = None
+    content_hash: Optional[str] = None
+    chunks: int
+
+class ThreadDocumentsResponse(BaseModel):
+    """Response model for listing thread documents"""
+    thread_id: str
+    documents: List[ThreadDocumentInfo]
+
+class ThreadQuestionRequest(BaseModel):
+    """Request model for answering a question across a thread index"""
+    question: str = Field(..., description="Question to answer")
+    top_k: int = Field(default=3, description="Number of similar chunks to retrieve", ge=1, le=10)
+    apply_correction: bool = Field(default=True, description="Apply correction step to the answer")
+    correction_mode: Literal["inline", "two_pass"] = Field(
+        default="inline",
+        description="'inline' corrects the answer within the generation call, 'two_pass' uses a separate correction call"
+    )
+
+class ThreadAnswerResponse(RAGAnswerResponse):
+    """Response model for thread question answering"""
+    source_documents: List[str] = Field(..., description="Ids of the documents the context was retrieved from")
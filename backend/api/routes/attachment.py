@@ -4,8 +4,11 @@ Endpoints for processing file attachments.
 from fastapi import APIRouter, HTTPException, Body
 from api.models.attachment import AttachmentProcessRequest, AttachmentProcessResponse, AttachmentMetadata
 from modules.attachment_processor import process_file_bytes, is_supported_file, get_supported_extensions
+from modules.logging_config import get_logger
 import base64
 
+logger = get_logger("attachment")
+
 router = APIRouter()
 
 @router.post("/attachment/process", response_model=AttachmentProcessResponse)
@@ -16,35 +19,29 @@ def process_attachment(
     Process file attachments and extract text content.
     Supports PDF, DOCX, images (PNG, JPG, JPEG), TXT, and PPTX.
     """
-    print("=" * 80)
-    print("📎 ATTACHMENT PROCESSING REQUEST RECEIVED")
-    print("=" * 80)
-    
     try:
-        print(f"Request filename: {request.filename}")
-        print(f"Base64 content length: {len(request.file_content_base64)} characters")
+        logger.debug(
+            "Attachment received",
+            extra={"attachment": request.filename, "base64_chars": len(request.file_content_base64)}
+        )
         
         if not is_supported_file(request.filename):
-            print(f"ERROR: Unsupported file type: {request.filename}")
+            logger.warning("Unsupported file type: %s", request.filename)
             supported_exts = get_supported_extensions()
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported file type. Supported extensions: {', '.join(supported_exts)}"
             )
         
-        print(f"✓ File type is supported")
-        print(f"Decoding base64 content...")
         try:
             file_bytes = base64.b64decode(request.file_content_base64)
-            print(f"✓ Base64 decoded successfully: {len(file_bytes)} bytes")
         except Exception as e:
-            print(f"ERROR: Failed to decode base64: {e}")
+            logger.warning("Failed to decode base64 for %s: %s", request.filename, e)
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid base64 encoding: {str(e)}"
             )
         
-        print(f"Processing file bytes...")
         metadata, output_path, extracted_text = process_file_bytes(
             file_bytes,
             request.filename,
@@ -52,17 +49,13 @@ def process_attachment(
         )
         
         if metadata is None:
-            print(f"ERROR: process_file_bytes returned None for metadata")
+            logger.warning("process_file_bytes returned no metadata for %s", request.filename)
             raise HTTPException(
                 status_code=400,
                 detail="Failed to process file"
             )
         
-        print(f"✓ File processed successfully")
-        print(f"Metadata: {metadata}")
-        print(f"Extracted text length: {len(extracted_text)} characters")
-        
-        print(f"Building response...")
+        logger.debug("Attachment metadata: %s", metadata)
         response = AttachmentProcessResponse(
             metadata=AttachmentMetadata(**metadata),
             extracted_text=extracted_text,
@@ -70,17 +63,16 @@ def process_attachment(
             processing_successful=True
         )
         
-        print(f"✅ ATTACHMENT PROCESSING COMPLETED SUCCESSFULLY")
-        print("=" * 80)
+        logger.info(
+            "✅ Attachment processed",
+            extra={"attachment": request.filename, "bytes": len(file_bytes), "text_chars": len(extracted_text)}
+        )
         return response
         
-    except HTTPException as http_exc:
-        print(f"HTTP Exception: {http_exc.status_code} - {http_exc.detail}")
-        print("=" * 80)
+    except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR: Unexpected error during attachment processing: {str(e)}")
-        print("=" * 80)
+        logger.exception("Unexpected error during attachment processing: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Attachment processing failed: {str(e)}"
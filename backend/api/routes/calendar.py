@@ -1,12 +1,24 @@
 """
 Endpoints for Google Calendar integration.
 """
-from fastapi import APIRouter, HTTPException
-from api.models.calendar import CalendarEventRequest, CalendarAvailabilityResponse, CalendarAnalyzeRequest, CalendarEventResponse
-from modules.calendar_service import get_calendar_service
-from modules.scheduler import get_user_availability, extract_schedule_info
+from fastapi import APIRouter, HTTPException, Query
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from api.models.calendar import (
+    CalendarEventRequest, CalendarAvailabilityResponse, CalendarAnalyzeRequest, CalendarEventResponse,
+    CalendarSlotsResponse, CalendarBatchScheduleRequest, CalendarBatchScheduleResponse
+)
+from modules.calendar_service import get_calendar_service, insert_events
+from modules.event_cache import get_event_cache
+from modules.scheduler import (
+    get_user_availability, get_free_slots, extract_schedule_info, check_proposals,
+    DEFAULT_WORKING_HOURS, DEFAULT_TIMEZONE
+)
 from modules.llm_client import MODEL_FOR_SEMANTICS
 from datetime import datetime, timedelta, timezone
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
+
+logger = get_logger("calendar")
 
 router = APIRouter()
 
@@ -16,87 +28,204 @@ def get_availability():
     Get available time slots from Google Calendar.
     """
     try:
-        print("INFO: Fetching calendar availability")
+        logger.debug("Fetching calendar availability")
         slots = get_user_availability()
-        print(f"INFO: Found {len(slots)} available slots")
+        logger.debug("Found %s available slots", len(slots))
         return {"availability": slots}
     except Exception as e:
-        print(f"ERROR: Failed to get calendar availability: {e}")
+        logger.error("Failed to get calendar availability: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve calendar availability: {str(e)}"
         )
 
+def parse_working_hours(value: str) -> list:
+    """Parse "8-12,14-17" into [(8, 12), (14, 17)]."""
+    ranges = []
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        start_hour, end_hour = int(start), int(end)
+        if not 0 <= start_hour < end_hour <= 23:
+            raise ValueError(f"Invalid working hour range '{part.strip()}'")
+        ranges.append((start_hour, end_hour))
+    ranges.sort()
+    for (_, previous_end), (next_start, _) in zip(ranges, ranges[1:]):
+        if next_start < previous_end:
+            raise ValueError("Working hour ranges must not overlap")
+    return ranges
+
+@router.get("/calendar/slots", response_model=CalendarSlotsResponse)
+def get_slots(
+    horizon_days: int = Query(7, ge=1, le=60, description="Number of days to search, starting tomorrow"),
+    slot_minutes: int = Query(60, ge=15, le=480, description="Slot length in minutes"),
+    timezone_name: str = Query(DEFAULT_TIMEZONE, alias="timezone", description="IANA time zone of the working hours"),
+    working_hours: str = Query(
+        ",".join(f"{start}-{end}" for start, end in DEFAULT_WORKING_HOURS),
+        description="Local working hour ranges, e.g. 8-12,14-17"
+    )
+):
+    """
+    Get structured free time slots from Google Calendar.
+    """
+    try:
+        ZoneInfo(timezone_name)
+        hours = parse_working_hours(working_hours)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid slot parameters: {str(e)}")
+    
+    try:
+        slots = get_free_slots(
+            horizon_days=horizon_days,
+            working_hours=hours,
+            slot_minutes=slot_minutes,
+            tz_name=timezone_name
+        )
+        logger.debug("Found %s free slots", len(slots))
+        return {
+            "timezone": timezone_name,
+            "horizon_days": horizon_days,
+            "slot_minutes": slot_minutes,
+            "working_hours": [list(r) for r in hours],
+            "slots": slots
+        }
+    except Exception as e:
+        logger.error("Failed to compute free slots: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to compute free slots: {str(e)}"
+        )
+
+def build_event_body(event: CalendarEventRequest) -> tuple:
+    """Return (event resource, start, end) for a request expressed in server local time."""
+    local_tz = datetime.now().astimezone().tzinfo
+    start_datetime = datetime.strptime(f"{event.date} {event.heure}", '%Y-%m-%d %H:%M')
+    start_datetime = start_datetime.replace(tzinfo=local_tz).astimezone(timezone.utc)
+    end_datetime = start_datetime + timedelta(minutes=event.duree_minutes)
+    
+    event_body = {
+        'summary': event.summary,
+        'description': event.description,
+        'start': {
+            'dateTime': start_datetime.isoformat(),
+            'timeZone': 'UTC',
+        },
+        'end': {
+            'dateTime': end_datetime.isoformat(),
+            'timeZone': 'UTC',
+        },
+    }
+    return event_body, start_datetime, end_datetime
+
 @router.post("/calendar/schedule", response_model=CalendarEventResponse)
 def schedule_event(event: CalendarEventRequest):
     """
     Schedule a new event in Google Calendar.
     """
     try:
-        print(f"INFO: Scheduling event on {event.date} at {event.heure}")
-        local_tz = datetime.now().astimezone().tzinfo
-        start_datetime = datetime.strptime(f"{event.date} {event.heure}", '%Y-%m-%d %H:%M')
-        start_datetime = start_datetime.replace(tzinfo=local_tz).astimezone(timezone.utc)
-        end_datetime = start_datetime + timedelta(minutes=event.duree_minutes)
+        logger.debug("Scheduling event on %s at %s", event.date, event.heure)
+        event_body, _, _ = build_event_body(event)
         
         service = get_calendar_service()
-        event_body = {
-            'summary': event.summary,
-            'description': event.description,
-            'start': {
-                'dateTime': start_datetime.isoformat(),
-                'timeZone': 'UTC',
-            },
-            'end': {
-                'dateTime': end_datetime.isoformat(),
-                'timeZone': 'UTC',
-            },
-        }
-        
         result = service.events().insert(calendarId='primary', body=event_body).execute()
-        print(f"INFO: Event scheduled successfully")
+        # Keep availability checks consistent with the event we just created
+        get_event_cache().upsert(result)
+        logger.debug("Event scheduled successfully")
         return {"htmlLink": result.get("htmlLink")}
     
     except Exception as e:
-        print(f"ERROR: Failed to schedule event: {e}")
+        logger.error("Failed to schedule event: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to schedule event: {str(e)}"
         )
 
+@router.post("/calendar/schedule/batch", response_model=CalendarBatchScheduleResponse)
+def schedule_events_batch(request: CalendarBatchScheduleRequest):
+    """
+    Schedule several events in one request.
+    Conflicts are checked in a single query on the cached busy intervals and
+    events are inserted with batch requests (one round-trip per 50 events).
+    """
+    try:
+        prepared = [build_event_body(event) for event in request.events]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
+    
+    try:
+        logger.debug("Scheduling %s events in batch", len(prepared))
+        results = [{"index": i, "status": "created"} for i in range(len(prepared))]
+        
+        if request.skip_conflicts:
+            free = check_proposals([(start, end) for _, start, end in prepared])
+            accepted = []
+            for i, (_, start, end) in enumerate(prepared):
+                if not free[i] or any(start < other_end and end > other_start for other_start, other_end in accepted):
+                    results[i] = {"index": i, "status": "occupied", "detail": "Time slot is busy"}
+                else:
+                    accepted.append((start, end))
+        
+        to_insert = [i for i, item in enumerate(results) if item["status"] == "created"]
+        created = insert_events([prepared[i][0] for i in to_insert])
+        
+        event_cache = get_event_cache()
+        for i, outcome in zip(to_insert, created):
+            if isinstance(outcome, Exception):
+                results[i] = {"index": i, "status": "error", "detail": str(outcome)}
+            else:
+                event_cache.upsert(outcome)
+                results[i].update({"event_id": outcome.get("id"), "htmlLink": outcome.get("htmlLink")})
+        
+        counts = {status: sum(1 for item in results if item["status"] == status) for status in ("created", "occupied", "error")}
+        logger.debug("Batch scheduled: %s created, %s occupied, %s failed", counts['created'], counts['occupied'], counts['error'])
+        return {
+            "results": results,
+            "created": counts["created"],
+            "occupied": counts["occupied"],
+            "failed": counts["error"]
+        }
+    
+    except Exception as e:
+        logger.error("Failed to schedule events: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to schedule events: {str(e)}"
+        )
+
 @router.post("/calendar/analyze")
 def analyze_meeting_request(request: CalendarAnalyzeRequest):
     """
     Analyze email text to detect meeting proposals and check calendar availability.
     """
     try:
-        print("INFO: Analyzing meeting request")
-        result = extract_schedule_info(request.text, MODEL_FOR_SEMANTICS)
+        logger.debug("Analyzing meeting request")
+        result = extract_schedule_info(request.text, MODEL_FOR_SEMANTICS, use_preparser=request.use_preparser)
         
         if isinstance(result, dict) and result.get("status") == "occupied":
-            print("INFO: Proposed time slot is occupied")
+            logger.debug("Proposed time slot is occupied")
             return {"status": "occupied", "message": "I am busy at that time."}
         
         elif isinstance(result, list) and result:
             proposal = result[0]
             summary = proposal.get("summary", f"Meeting: {request.text[:30]}...")
             proposal["summary"] = summary
-            print(f"INFO: Meeting proposal detected: {proposal}")
+            logger.debug("Meeting proposal detected: %s", proposal)
             return {"status": "free", "proposed_event": proposal}
         
         elif isinstance(result, dict) and result.get("suggestion_requise"):
-            print("INFO: No specific time provided, suggesting slots")
+            logger.debug("No specific time provided, suggesting slots")
             return {
                 "status": "suggestion_required",
                 "creneaux_proposes": result.get("creneaux_proposes", [])
             }
         
         else:
-            print("INFO: No meeting detected in text")
+            logger.debug("No meeting detected in text")
             return {"status": "no_meeting", "message": "No meeting proposal detected."}
     
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Failed to analyze meeting request: {e}")
+        logger.error("Failed to analyze meeting request: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to analyze meeting request: {str(e)}"
@@ -2,9 +2,22 @@
 Endpoints for document classification and theme detection.
 """
 from fastapi import APIRouter, HTTPException, Body
-from api.models.classification import ClassificationRequest, ClassificationResponse, ThemeInfo
-from modules.classification_processor import classify_document
+from api.models.classification import (
+    ClassificationRequest, ClassificationResponse, ThemeInfo,
+    ThemeLabel, ThemeLabelListResponse, ThemeLabelCreateRequest, ThemeLabelUpdateRequest,
+    MailboxIngestRequest, MailboxIngestResponse, MailboxThemesResponse,
+    MailboxAssignment, MailboxThemeMembersResponse,
+    ThemeDistributionRequest, ThemeDistributionResponse
+)
+from modules.classification_processor import classify_document, get_theme_distribution, label_mailbox_themes
+from modules.topic_model import get_topic_model
+from modules.embeddings import get_embeddings
+from modules.theme_labels import get_label_store
 import os
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
+
+logger = get_logger("classification")
 
 router = APIRouter()
 
@@ -27,29 +40,205 @@ def classify_document_themes(
         )
     
     try:
-        print(f"INFO: Starting document classification with {request.num_themes} themes")
+        logger.debug("Starting document classification with %s themes", request.num_themes or 'auto')
         result = classify_document(
             text_content=request.text_content,
             api_endpoint=MISTRAL_API_ENDPOINT,
             api_key=MISTRAL_API_KEY,
             model=MISTRAL_MODEL,
-            num_themes=request.num_themes
+            num_themes=request.num_themes,
+            description_mode=request.description_mode,
+            use_label_cache=request.use_label_cache
         )
         
-        print(f"INFO: Classification completed successfully")
+        logger.debug("Classification completed successfully")
         themes = [ThemeInfo(**theme) for theme in result["themes"]]
         return ClassificationResponse(
             themes=themes,
             total_themes=result["total_themes"],
             total_chunks=result["total_chunks"],
-            processing_time_seconds=result["processing_time_seconds"]
+            processing_time_seconds=result["processing_time_seconds"],
+            label_cache_hits=result["label_cache_hits"],
+            from_analysis_cache=result["from_analysis_cache"]
         )
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Classification failed: {e}")
+        logger.error("Classification failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Classification failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/classification/distribution", response_model=ThemeDistributionResponse)
+def get_document_theme_distribution(
+    request: ThemeDistributionRequest = Body(..., description="Document to analyze")
+) -> ThemeDistributionResponse:
+    """
+    Get the distribution of document chunks across themes, without LLM calls.
+    Reuses the clustering (and descriptions) of a document that was already classified.
+    """
+    try:
+        result = get_theme_distribution(request.text_content, num_themes=request.num_themes)
+        return ThemeDistributionResponse(**result)
+    except Exception as e:
+        logger.error("Theme distribution failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Theme distribution failed: {str(e)}"
+        )
+
+@router.get("/classification/labels", response_model=ThemeLabelListResponse)
+def list_theme_labels() -> ThemeLabelListResponse:
+    """
+    List stored theme labels with the label store hit rate.
+    """
+    store = get_label_store()
+    return ThemeLabelListResponse(labels=store.list_labels(), stats=store.stats())
+
+@router.post("/classification/labels", response_model=ThemeLabel)
+def create_theme_label(
+    request: ThemeLabelCreateRequest = Body(..., description="Label and example text")
+) -> ThemeLabel:
+    """
+    Manually add a curated theme label defined by the embedding of an example text.
+    """
+    try:
+        centroid = get_embeddings().embed_query(request.example_text)
+        store = get_label_store()
+        entry = store.add(centroid, request.label, curated=True, example_text=request.example_text)
+        store.save()
+        return ThemeLabel(**entry)
+    except Exception as e:
+        logger.error("Creating theme label failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Creating theme label failed: {str(e)}"
+        )
+
+@router.put("/classification/labels/{label_id}", response_model=ThemeLabel)
+def update_theme_label(
+    label_id: str,
+    request: ThemeLabelUpdateRequest = Body(..., description="New label")
+) -> ThemeLabel:
+    """
+    Rename a stored theme label. Renamed labels are marked as curated.
+    """
+    entry = get_label_store().update_label(label_id, request.label)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Theme label '{label_id}' not found")
+    return ThemeLabel(**entry)
+
+@router.delete("/classification/labels/{label_id}")
+def delete_theme_label(label_id: str):
+    """
+    Delete a stored theme label.
+    """
+    if not get_label_store().delete(label_id):
+        raise HTTPException(status_code=404, detail=f"Theme label '{label_id}' not found")
+    return {"label_id": label_id, "deleted": True}
+
+
+@router.post("/classification/mailbox/documents", response_model=MailboxIngestResponse)
+def ingest_mailbox_documents(
+    request: MailboxIngestRequest = Body(..., description="Emails and attachments to ingest")
+) -> MailboxIngestResponse:
+    """
+    Add emails and attachments to the mailbox topic model.
+    Documents are assigned online to the nearest theme; themes are re-fitted periodically.
+    """
+    try:
+        result = get_topic_model().ingest([document.model_dump() for document in request.documents])
+        return MailboxIngestResponse(**result)
+    except Exception as e:
+        logger.error("Mailbox ingestion failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Mailbox ingestion failed: {str(e)}"
+        )
+
+@router.get("/classification/mailbox/themes", response_model=MailboxThemesResponse)
+def get_mailbox_themes() -> MailboxThemesResponse:
+    """
+    Get the mailbox theme distribution without reclustering.
+    """
+    return MailboxThemesResponse(**get_topic_model().distribution())
+
+@router.post("/classification/mailbox/themes/label", response_model=MailboxThemesResponse)
+def label_mailbox_theme_distribution() -> MailboxThemesResponse:
+    """
+    Label the unlabelled mailbox themes (LLM or label store), then return the distribution.
+    """
+    if not MISTRAL_API_KEY:
+        raise HTTPException(
+            status_code=503,
+            detail="Mistral API key not configured. Please set CLOUD_ADAPTER_API_KEY in environment or .env file."
+        )
+    try:
+        label_mailbox_themes(
+            api_endpoint=MISTRAL_API_ENDPOINT,
+            api_key=MISTRAL_API_KEY,
+            model=MISTRAL_MODEL
+        )
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        logger.error("Mailbox theme labelling failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Mailbox theme labelling failed: {str(e)}"
+        )
+    return MailboxThemesResponse(**get_topic_model().distribution())
+
+@router.get("/classification/mailbox/themes/{theme_id}", response_model=MailboxThemeMembersResponse)
+def get_mailbox_theme_members(theme_id: int) -> MailboxThemeMembersResponse:
+    """
+    List the documents assigned to a mailbox theme.
+    """
+    topic_model = get_topic_model()
+    distribution = topic_model.distribution()
+    if not 0 <= theme_id < distribution["total_themes"]:
+        raise HTTPException(status_code=404, detail=f"Theme {theme_id} not found")
+    return MailboxThemeMembersResponse(
+        theme_id=theme_id,
+        label=distribution["themes"][theme_id]["label"],
+        documents=topic_model.theme_members(theme_id)
+    )
+
+@router.get("/classification/mailbox/documents/{document_id:path}", response_model=MailboxAssignment)
+def get_mailbox_document_theme(document_id: str) -> MailboxAssignment:
+    """
+    Get the theme of a mailbox document.
+    """
+    assignment = get_topic_model().document_theme(document_id)
+    if assignment is None:
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    return MailboxAssignment(**assignment)
+
+@router.delete("/classification/mailbox/documents/{document_id:path}")
+def delete_mailbox_document(document_id: str):
+    """
+    Remove a document from the mailbox topic model.
+    """
+    if not get_topic_model().remove(document_id):
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    return {"document_id": document_id, "deleted": True}
+
+@router.post("/classification/mailbox/refit", response_model=MailboxThemesResponse)
+def refit_mailbox_themes() -> MailboxThemesResponse:
+    """
+    Re-cluster the whole mailbox now instead of waiting for the periodic re-fit.
+    """
+    try:
+        topic_model = get_topic_model()
+        topic_model.refit()
+        return MailboxThemesResponse(**topic_model.distribution())
+    except Exception as e:
+        logger.error("Mailbox re-fit failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Mailbox re-fit failed: {str(e)}"
+        )
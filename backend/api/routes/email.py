@@ -12,6 +12,10 @@ from api.models.email import (
 )
 from api.utils.language import detect_language, translate_text_to_english
 from api.utils.processing import analyze_email_semantics, summarize_email, detect_tasks, generate_auto_reply
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
+
+logger = get_logger("email")
 
 router = APIRouter()
 
@@ -27,18 +31,18 @@ def translate_email(
         combined_text = f"{request.subject}\n{request.message}"
         detected_language, is_french = detect_language(combined_text)
         
-        print(f"INFO: Detected language: {detected_language}")
+        logger.debug("Detected language: %s", detected_language)
         
         subject_translated = None
         message_translated = None
         
         if is_french:
-            print("INFO: French detected - translating to English")
+            logger.debug("French detected - translating to English")
             subject_translated = translate_text_to_english(request.subject)
             message_translated = translate_text_to_english(request.message)
-            print(f"INFO: Translation completed")
+            logger.debug("Translation completed")
         else:
-            print("INFO: English detected - no translation needed")
+            logger.debug("English detected - no translation needed")
         
         return TranslationResponse(
             detected_language=detected_language,
@@ -48,8 +52,10 @@ def translate_email(
             original_message=request.message
         )
         
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Translation endpoint failed: {e}")
+        logger.error("Translation endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Translation failed: {str(e)}"
@@ -64,7 +70,7 @@ def analyze_email(
     Works best with English text. Use /translate first for French emails.
     """
     try:
-        print(f"INFO: Analyzing email semantics")
+        logger.debug("Analyzing email semantics")
         analysis_result = analyze_email_semantics(request.message)
         
         if not analysis_result:
@@ -73,7 +79,7 @@ def analyze_email(
                 detail="Semantic analysis failed to extract information. Please ensure the text is in English."
             )
         
-        print(f"INFO: Semantic analysis completed")
+        logger.debug("Semantic analysis completed")
         return SemanticAnalysisResponse(
             main_subject=analysis_result.get("main_subject", "Unknown"),
             short_summary=analysis_result.get("short_summary", "No summary available"),
@@ -89,8 +95,10 @@ def analyze_email(
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Semantic analysis endpoint failed: {e}")
+        logger.error("Semantic analysis endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Semantic analysis failed: {str(e)}"
@@ -105,20 +113,20 @@ def summarize_email_endpoint(
     Supports French emails via automatic translation.
     """
     try:
-        print(f"INFO: Starting email summarization")
+        logger.debug("Starting email summarization")
         detected_language, is_french = detect_language(request.message)
-        print(f"INFO: Detected language: {detected_language}")
+        logger.debug("Detected language: %s", detected_language)
         
         text_to_summarize = request.message
         was_translated = False
         
         if is_french:
-            print("INFO: French detected - translating to English before summarization")
+            logger.debug("French detected - translating to English before summarization")
             text_to_summarize = translate_text_to_english(request.message)
             was_translated = True
-            print("INFO: Translation completed")
+            logger.debug("Translation completed")
         
-        print("INFO: Generating summary and key points")
+        logger.debug("Generating summary and key points")
         summary_result = summarize_email(text_to_summarize)
         
         if not summary_result:
@@ -127,7 +135,7 @@ def summarize_email_endpoint(
                 detail="Summarization failed to extract information. Please check the input text."
             )
         
-        print(f"INFO: Summarization completed")
+        logger.debug("Summarization completed")
         return SummaryResponse(
             summary=summary_result.get("summary", "No summary available"),
             key_points=summary_result.get("key_points", []),
@@ -138,8 +146,10 @@ def summarize_email_endpoint(
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Summary endpoint failed: {e}")
+        logger.error("Summary endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Summarization failed: {str(e)}"
@@ -154,21 +164,21 @@ def detect_tasks_endpoint(
     Supports French emails via automatic translation.
     """
     try:
-        print(f"INFO: Starting task detection")
+        logger.debug("Starting task detection")
         detected_language, is_french = detect_language(request.message)
-        print(f"INFO: Detected language: {detected_language}")
+        logger.debug("Detected language: %s", detected_language)
         
         text_for_detection = request.message
         if is_french:
-            print("INFO: French detected - translating to English before task detection")
+            logger.debug("French detected - translating to English before task detection")
             text_for_detection = translate_text_to_english(request.message)
-            print("INFO: Translation completed")
+            logger.debug("Translation completed")
         
-        print("INFO: Detecting tasks from email")
+        logger.debug("Detecting tasks from email")
         task_result = detect_tasks(text_for_detection)
         
         if not task_result:
-            print("INFO: No tasks detected in email")
+            logger.debug("No tasks detected in email")
             return TaskDetectionResponse(
                 tasks=[],
                 task_count=0,
@@ -187,7 +197,7 @@ def detect_tasks_endpoint(
             for task_data in tasks_list
         ]
         
-        print(f"INFO: Task detection completed - found {len(task_objects)} tasks")
+        logger.debug("Task detection completed - found %s tasks", len(task_objects))
         return TaskDetectionResponse(
             tasks=task_objects,
             task_count=len(task_objects),
@@ -197,8 +207,10 @@ def detect_tasks_endpoint(
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Task detection endpoint failed: {e}")
+        logger.error("Task detection endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Task detection failed: {str(e)}"
@@ -213,30 +225,30 @@ def generate_reply_endpoint(
     Supports French emails via automatic translation.
     """
     try:
-        print(f"INFO: Starting auto-reply generation")
+        logger.debug("Starting auto-reply generation")
         detected_language, is_french = detect_language(request.message)
-        print(f"INFO: Detected language: {detected_language}")
+        logger.debug("Detected language: %s", detected_language)
         
         text_for_reply = request.message
         was_translated = False
         
         if is_french:
-            print("INFO: French detected - translating to English before generating reply")
+            logger.debug("French detected - translating to English before generating reply")
             text_for_reply = translate_text_to_english(request.message)
             was_translated = True
-            print("INFO: Translation completed")
+            logger.debug("Translation completed")
         
-        print("INFO: Generating auto-reply")
+        logger.debug("Generating auto-reply")
         reply_result = generate_auto_reply(text_for_reply)
         
         if not reply_result:
-            print("ERROR: generate_auto_reply returned None")
+            logger.error("generate_auto_reply returned None")
             raise HTTPException(
                 status_code=500,
                 detail="Auto-reply generation failed. The LLM did not return a valid response."
             )
         
-        print(f"INFO: Auto-reply generation completed successfully")
+        logger.debug("Auto-reply generation completed successfully")
         return AutoReplyResponse(
             reply=reply_result.get("reply", "Thank you for your email. I will get back to you shortly."),
             tone=reply_result.get("tone", "Professional"),
@@ -247,8 +259,10 @@ def generate_reply_endpoint(
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Auto-reply endpoint failed: {e}")
+        logger.error("Auto-reply endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Auto-reply generation failed: {str(e)}"
@@ -2,16 +2,29 @@
 Endpoints for Retrieval-Augmented Generation (RAG) question answering.
 """
 from fastapi import APIRouter, HTTPException, Body
-from api.models.rag import RAGQuestionRequest, RAGAnswerResponse
-from modules.rag_processor import answer_question
+from fastapi.responses import StreamingResponse
+from api.models.rag import (
+    RAGQuestionRequest, RAGAnswerResponse, RAGStreamRequest,
+    ThreadDocumentsRequest, ThreadIndexResponse, ThreadDocumentsResponse,
+    ThreadQuestionRequest, ThreadAnswerResponse
+)
+from modules.rag_processor import answer_question, stream_answer_question
+from modules.thread_index import (
+    add_thread_documents, delete_thread_document, delete_thread,
+    list_thread_documents, answer_thread_question
+)
 import os
+import json
 from dotenv import load_dotenv
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
 
 # Charger explicitement le .env (si placé dans config/)
 dotenv_path = os.path.join(os.path.dirname(__file__), '../../config/.env')
 load_dotenv(dotenv_path)
-# Vérifie que les clés sont bien chargées
-print("CLOUD_ADAPTER_API_KEY :", os.getenv("CLOUD_ADAPTER_API_KEY"))
+logger = get_logger("rag")
+# Vérifie que les clés sont bien chargées (sans afficher leur valeur)
+logger.info("CLOUD_ADAPTER_API_KEY: %s", "configured" if os.getenv("CLOUD_ADAPTER_API_KEY") else "missing")
 router = APIRouter()
 
 # API Keys for external services
@@ -34,7 +47,7 @@ def rag_question_answering(
         )
     
     try:
-        print(f"INFO: Processing RAG question: {request.question[:50]}...")
+        logger.debug("Processing RAG question: %s...", request.question[:50])
         result = answer_question(
             question=request.question,
             text_content=request.text_content,
@@ -42,17 +55,173 @@ def rag_question_answering(
             api_key=MISTRAL_API_KEY,
             model=MISTRAL_MODEL,
             top_k=request.top_k,
-            apply_correction=request.apply_correction
+            apply_correction=request.apply_correction,
+            correction_mode=request.correction_mode
         )
         
-        print(f"INFO: RAG answer generated successfully")
+        logger.debug("RAG answer generated successfully")
         return RAGAnswerResponse(**result)
         
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: RAG processing failed: {e}")
+        logger.error("RAG processing failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"RAG processing failed: {str(e)}"
         )
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/rag/ask/stream")
+def rag_question_answering_stream(
+    request: RAGStreamRequest = Body(..., description="Question and context for streaming RAG")
+) -> StreamingResponse:
+    """
+    Answer questions using RAG and stream the result as Server-Sent Events.
+    Emits a `context` event with the retrieved chunks, `token` events with the
+    answer as it is generated, and a final `done` event with time-to-first-token.
+    """
+    if not MISTRAL_API_KEY:
+        raise HTTPException(
+            status_code=503,
+            detail="Mistral API key not configured. Please set CLOUD_ADAPTER_API_KEY in environment or .env file."
+        )
+    
+    logger.debug("Streaming RAG question: %s...", request.question[:50])
+    events = stream_answer_question(
+        question=request.question,
+        text_content=request.text_content,
+        api_endpoint=MISTRAL_API_ENDPOINT,
+        api_key=MISTRAL_API_KEY,
+        model=MISTRAL_MODEL,
+        top_k=request.top_k
+    )
+    
+    return StreamingResponse(
+        (format_sse(e["event"], e["data"]) for e in events),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post("/rag/threads/{thread_id}/documents", response_model=ThreadIndexResponse)
+def index_thread_documents(
+    thread_id: str,
+    request: ThreadDocumentsRequest = Body(..., description="Thread documents to index")
+) -> ThreadIndexResponse:
+    """
+    Add or update messages and attachments in a thread index.
+    Only new or changed documents are chunked and embedded.
+    """
+    try:
+        result = add_thread_documents(
+            thread_id,
+            [document.model_dump() for document in request.documents]
+        )
+        return ThreadIndexResponse(**result)
+    except Exception as e:
+        logger.error("Thread indexing failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Thread indexing failed: {str(e)}"
+        )
+
+@router.get("/rag/threads/{thread_id}/documents", response_model=ThreadDocumentsResponse)
+def get_thread_documents(thread_id: str) -> ThreadDocumentsResponse:
+    """
+    List the documents indexed for a thread.
+    """
+    try:
+        return ThreadDocumentsResponse(
+            thread_id=thread_id,
+            documents=list_thread_documents(thread_id)
+        )
+    except Exception as e:
+        logger.error("Listing thread documents failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Listing thread documents failed: {str(e)}"
+        )
+
+@router.delete("/rag/threads/{thread_id}/documents/{document_id:path}")
+def remove_thread_document(thread_id: str, document_id: str):
+    """
+    Remove a document from a thread index.
+    """
+    try:
+        deleted_chunks = delete_thread_document(thread_id, document_id)
+    except Exception as e:
+        logger.error("Deleting thread document failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Deleting thread document failed: {str(e)}"
+        )
+    
+    if deleted_chunks == 0:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Document '{document_id}' not found in thread '{thread_id}'"
+        )
+    return {"thread_id": thread_id, "document_id": document_id, "deleted_chunks": deleted_chunks}
+
+@router.delete("/rag/threads/{thread_id}")
+def remove_thread(thread_id: str):
+    """
+    Delete the whole index of a thread.
+    """
+    try:
+        delete_thread(thread_id)
+        return {"thread_id": thread_id, "deleted": True}
+    except Exception as e:
+        logger.error("Deleting thread index failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Deleting thread index failed: {str(e)}"
+        )
+
+@router.post("/rag/threads/{thread_id}/ask", response_model=ThreadAnswerResponse)
+def thread_question_answering(
+    thread_id: str,
+    request: ThreadQuestionRequest = Body(..., description="Question about the thread")
+) -> ThreadAnswerResponse:
+    """
+    Answer a question across every document indexed for a thread.
+    Question latency does not depend on thread length since nothing is re-indexed.
+    """
+    if not MISTRAL_API_KEY:
+        raise HTTPException(
+            status_code=503,
+            detail="Mistral API key not configured. Please set CLOUD_ADAPTER_API_KEY in environment or .env file."
+        )
+    
+    try:
+        result = answer_thread_question(
+            thread_id,
+            question=request.question,
+            api_endpoint=MISTRAL_API_ENDPOINT,
+            api_key=MISTRAL_API_KEY,
+            model=MISTRAL_MODEL,
+            top_k=request.top_k,
+            apply_correction=request.apply_correction,
+            correction_mode=request.correction_mode
+        )
+        return ThreadAnswerResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        logger.error("Thread RAG processing failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Thread RAG processing failed: {str(e)}"
+        )
@@ -1,9 +1,12 @@
 """
 System endpoints for API information and health checks.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
 from modules import calendar_service, attachment_processor, rag_processor, classification_processor
 import os
+from modules.logging_config import get_logger
+
+logger = get_logger("system")
 
 router = APIRouter()
 
@@ -23,7 +26,10 @@ def root():
         "task_detection": "/api/tasks",
         "auto_reply": "/api/reply",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics",
+        "startup": "/startup"
     }
     
     
@@ -32,18 +38,29 @@ def root():
     
     if hasattr(rag_processor, 'answer_question'):
         endpoints["rag_question_answering"] = "/api/rag/ask"
+        endpoints["rag_question_answering_stream"] = "/api/rag/ask/stream"
+        endpoints["rag_thread_documents"] = "/api/rag/threads/{thread_id}/documents"
+        endpoints["rag_thread_question_answering"] = "/api/rag/threads/{thread_id}/ask"
         endpoints["clear_rag_database"] = "/api/database/clear-rag"
+        endpoints["clear_thread_database"] = "/api/database/clear-threads"
     
     if hasattr(classification_processor, 'classify_document'):
         endpoints["document_classification"] = "/api/classification/themes"
+        endpoints["theme_distribution"] = "/api/classification/distribution"
+        endpoints["theme_labels"] = "/api/classification/labels"
+        endpoints["mailbox_documents"] = "/api/classification/mailbox/documents"
+        endpoints["mailbox_themes"] = "/api/classification/mailbox/themes"
         endpoints["clear_classification_database"] = "/api/database/clear-classification"
     
     if hasattr(rag_processor, 'answer_question') or hasattr(classification_processor, 'classify_document'):
+        endpoints["clear_document_store"] = "/api/database/clear-documents"
         endpoints["clear_all_databases"] = "/api/database/clear-all"
     
     if hasattr(calendar_service, 'get_calendar_service'):
         endpoints["calendar_availability"] = "/api/calendar/availability"
+        endpoints["calendar_slots"] = "/api/calendar/slots"
         endpoints["calendar_schedule"] = "/api/calendar/schedule"
+        endpoints["calendar_schedule_batch"] = "/api/calendar/schedule/batch"
         endpoints["calendar_analyze"] = "/api/calendar/analyze"
     
     return {
@@ -70,6 +87,31 @@ def health_check():
         "translation_model": MODEL_FOR_TRANSLATION
     }
 
+@router.get("/ready")
+def readiness_check(response: Response):
+    """Readiness check: 200 once the worker is warm, 503 while warming up"""
+    from modules.warmup import get_warmup_state
+    report = get_warmup_state().report()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
+
+@router.get("/metrics")
+def metrics():
+    """Prometheus metrics (request latency per route, pipeline stages, LLM calls and tokens)"""
+    from modules.metrics import render_metrics
+    try:
+        payload, content_type = render_metrics()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return Response(content=payload, media_type=content_type)
+
+@router.get("/startup")
+def startup_report():
+    """Startup-time breakdown and heavy libraries loaded by this worker"""
+    from modules.startup_report import get_startup_report
+    return get_startup_report()
+
 @router.post("/database/clear-rag")
 def clear_rag_database():
     """Clear the RAG vectorstore database (Chroma DB)."""
@@ -81,7 +123,7 @@ def clear_rag_database():
         db_path = os.path.join(os.getcwd(), db_folder)
         
         if os.path.exists(db_path):
-            print(f"Deleting RAG database: {db_path}")
+            logger.info("Deleting RAG database: %s", db_path)
             shutil.rmtree(db_path)
             return {
                 "message": "RAG database cleared successfully",
@@ -89,7 +131,7 @@ def clear_rag_database():
                 "folder_path": db_folder
             }
         else:
-            print(f"⚠️ Folder does not exist: {db_path}")
+            logger.warning("Folder does not exist: %s", db_path)
             return {
                 "message": "RAG database folder does not exist (already cleared)",
                 "deleted": False,
@@ -97,13 +139,69 @@ def clear_rag_database():
             }
     
     except PermissionError as e:
-        print(f"❌ Permission denied: {e}")
+        logger.error("Permission denied: %s", e)
+        raise HTTPException(
+            status_code=403,
+            detail=f"Permission denied: Cannot delete database folder."
+        )
+    except Exception as e:
+        logger.error("Error deleting database: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to clear database: {str(e)}"
+        )
+
+@router.post("/database/clear-threads")
+def clear_thread_database():
+    """Clear the per-thread RAG index (Chroma DB)."""
+    from modules.thread_index import reset_thread_index, DEFAULT_THREADS_PERSIST_DIR
+    
+    try:
+        deleted = reset_thread_index()
+        if deleted:
+            logger.info("Deleted thread database: %s", DEFAULT_THREADS_PERSIST_DIR)
+        return {
+            "message": "Thread database cleared successfully" if deleted else "Thread database folder does not exist (already cleared)",
+            "deleted": deleted,
+            "folder_path": DEFAULT_THREADS_PERSIST_DIR
+        }
+    
+    except PermissionError as e:
+        logger.error("Permission denied: %s", e)
         raise HTTPException(
             status_code=403,
             detail=f"Permission denied: Cannot delete database folder."
         )
     except Exception as e:
-        print(f"❌ Error deleting database: {e}")
+        logger.error("Error deleting database: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to clear database: {str(e)}"
+        )
+
+@router.post("/database/clear-documents")
+def clear_document_store():
+    """Clear the shared document store (chunks and embeddings used by RAG and classification)."""
+    from modules.document_store import get_document_store, DEFAULT_DOCUMENT_STORE_DIR
+    
+    try:
+        deleted = get_document_store().clear()
+        if deleted:
+            logger.info("Deleted document store: %s", DEFAULT_DOCUMENT_STORE_DIR)
+        return {
+            "message": "Document store cleared successfully" if deleted else "Document store folder does not exist (already cleared)",
+            "deleted": deleted,
+            "folder_path": DEFAULT_DOCUMENT_STORE_DIR
+        }
+    
+    except PermissionError as e:
+        logger.error("Permission denied: %s", e)
+        raise HTTPException(
+            status_code=403,
+            detail=f"Permission denied: Cannot delete database folder."
+        )
+    except Exception as e:
+        logger.error("Error deleting database: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to clear database: {str(e)}"
@@ -120,7 +218,7 @@ def clear_classification_database():
         db_path = os.path.join(os.getcwd(), db_folder)
         
         if os.path.exists(db_path):
-            print(f"Deleting Classification database: {db_path}")
+            logger.info("Deleting Classification database: %s", db_path)
             shutil.rmtree(db_path)
             return {
                 "message": "Classification database cleared successfully",
@@ -128,7 +226,7 @@ def clear_classification_database():
                 "folder_path": db_folder
             }
         else:
-            print(f"⚠️ Folder does not exist: {db_path}")
+            logger.warning("Folder does not exist: %s", db_path)
             return {
                 "message": "Classification database folder does not exist (already cleared)",
                 "deleted": False,
@@ -136,13 +234,13 @@ def clear_classification_database():
             }
     
     except PermissionError as e:
-        print(f"❌ Permission denied: {e}")
+        logger.error("Permission denied: %s", e)
         raise HTTPException(
             status_code=403,
             detail=f"Permission denied: Cannot delete database folder."
         )
     except Exception as e:
-        print(f"❌ Error deleting database: {e}")
+        logger.error("Error deleting database: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to clear database: {str(e)}"
@@ -150,7 +248,7 @@ def clear_classification_database():
 
 @router.post("/database/clear-all")
 def clear_all_databases():
-    """Clear all vectorstore databases (RAG and Classification)."""
+    """Clear all vectorstore databases (RAG, thread index, Classification and document store)."""
     import shutil
     import os
     
@@ -159,6 +257,8 @@ def clear_all_databases():
             "message": "All databases cleared",
             "rag_deleted": False,
             "classification_deleted": False,
+            "threads_deleted": False,
+            "documents_deleted": False,
             "deleted_count": 0
         }
         
@@ -166,7 +266,7 @@ def clear_all_databases():
         rag_path = os.path.join(os.getcwd(), rag_folder)
         
         if os.path.exists(rag_path):
-            print(f"Deleting RAG database: {rag_path}")
+            logger.info("Deleting RAG database: %s", rag_path)
             shutil.rmtree(rag_path)
             results["rag_deleted"] = True
             results["deleted_count"] += 1
@@ -175,11 +275,23 @@ def clear_all_databases():
         classif_path = os.path.join(os.getcwd(), classif_folder)
         
         if os.path.exists(classif_path):
-            print(f"Deleting Classification database: {classif_path}")
+            logger.info("Deleting Classification database: %s", classif_path)
             shutil.rmtree(classif_path)
             results["classification_deleted"] = True
             results["deleted_count"] += 1
         
+        from modules.thread_index import reset_thread_index
+        if reset_thread_index():
+            logger.info("Deleted thread database")
+            results["threads_deleted"] = True
+            results["deleted_count"] += 1
+        
+        from modules.document_store import get_document_store
+        if get_document_store().clear():
+            logger.info("Deleted document store")
+            results["documents_deleted"] = True
+            results["deleted_count"] += 1
+        
         if results["deleted_count"] > 0:
             results["message"] = f"Successfully cleared {results['deleted_count']} database(s)"
         else:
@@ -188,13 +300,13 @@ def clear_all_databases():
         return results
     
     except PermissionError as e:
-        print(f"❌ Permission denied: {e}")
+        logger.error("Permission denied: %s", e)
         raise HTTPException(
             status_code=403,
             detail=f"Permission denied: Cannot delete database folders."
         )
     except Exception as e:
-        print(f"❌ Error deleting databases: {e}")
+        logger.error("Error deleting databases: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to clear databases: {str(e)}"
@@ -4,9 +4,15 @@ Utility functions for language detection and translation.
 import os
 import hashlib
 from modules.llm_client import call_llm_api, MODEL_FOR_TRANSLATION
+from modules.metrics import observe_stage, STAGE_LANGUAGE_DETECTION, STAGE_TRANSLATION
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
+
+logger = get_logger("email")
 
 TRANSLATION_CACHE_DIR = "translation_cache"
 
+@observe_stage(STAGE_LANGUAGE_DETECTION)
 def detect_language(text: str, model_name: str = MODEL_FOR_TRANSLATION) -> tuple[str, bool]:
     """
     Detect if text is in French or English.
@@ -30,10 +36,13 @@ Text: "{sample}"
                 return "English", False
             return "English", False
         return "English", False
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"Warning: Language detection failed: {e}")
+        logger.warning("Language detection failed: %s", e)
         return "Unknown", False
 
+@observe_stage(STAGE_TRANSLATION)
 def translate_text_to_english(text: str, model_name: str = MODEL_FOR_TRANSLATION) -> str:
     """
     Translate text from French to English.
@@ -47,11 +56,11 @@ def translate_text_to_english(text: str, model_name: str = MODEL_FOR_TRANSLATION
     cache_filepath = os.path.join(TRANSLATION_CACHE_DIR, cache_filename)
     
     if os.path.exists(cache_filepath):
-        print(f"INFO: Translation found in cache: {cache_filename}")
+        logger.debug("Translation found in cache: %s", cache_filename)
         with open(cache_filepath, 'r', encoding='utf-8') as f:
             return f.read()
     
-    print(f"INFO: Translating text (not in cache)")
+    logger.debug("Translating text (not in cache)")
     translation_prompt = f"""
 Your task is to translate French text to professional English.
 
@@ -77,6 +86,8 @@ Translate the following text:
                 f.write(result)
             return result
         return text
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"Warning: Translation failed: {e}")
+        logger.warning("Translation failed: %s", e)
         return text
\ No newline at end of file
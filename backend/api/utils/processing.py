@@ -2,7 +2,13 @@
 Utility functions for email processing (summarization, task detection, auto-reply, semantic analysis).
 """
 from modules.llm_client import call_llm_api, extract_json_from_response, MODEL_FOR_SEMANTICS
+from modules.tracing import span
+from modules.llm_scheduler import LLMUnavailableError
+from modules.logging_config import get_logger
 
+logger = get_logger("email")
+
+@span("processing.summarize_email")
 def summarize_email(text: str, model_name: str = MODEL_FOR_SEMANTICS) -> dict | None:
     """
     Generate a concise summary and extract key points from an email.
@@ -39,10 +45,13 @@ Email text to summarize:
         if not result:
             return None
         return result
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"Warning: Email summarization failed: {e}")
+        logger.warning("Email summarization failed: %s", e)
         return None
 
+@span("processing.detect_tasks")
 def detect_tasks(text: str, model_name: str = MODEL_FOR_SEMANTICS) -> dict | None:
     """
     Detect and extract actionable tasks from an email.
@@ -91,10 +100,13 @@ Email text to analyze:
         if not result:
             return None
         return result
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"Warning: Task detection failed: {e}")
+        logger.warning("Task detection failed: %s", e)
         return None
 
+@span("processing.generate_auto_reply")
 def generate_auto_reply(text: str, model_name: str = MODEL_FOR_SEMANTICS) -> dict | None:
     """
     Generate an intelligent, context-aware reply to an email.
@@ -139,15 +151,15 @@ Email to reply to:
     try:
         response = call_llm_api(prompt, model_name=model_name, max_tokens=2048)
         if not response:
-            print("ERROR: LLM returned empty response for auto-reply")
+            logger.error("LLM returned empty response for auto-reply")
             return None
         
         result = extract_json_from_response(response)
         if not result or "error" in result:
-            print("WARNING: Failed to extract JSON from LLM response for auto-reply")
+            logger.warning("Failed to extract JSON from LLM response for auto-reply")
             raw_output = result.get('raw_output', '') if result else response
             if raw_output and len(raw_output.strip()) > 0:
-                print("INFO: Using raw LLM output as reply")
+                logger.debug("Using raw LLM output as reply")
                 return {
                     "reply": raw_output.strip(),
                     "tone": "Professional"
@@ -155,14 +167,17 @@ Email to reply to:
             return None
         
         if "reply" not in result:
-            print(f"ERROR: 'reply' field missing from parsed JSON")
+            logger.error("'reply' field missing from parsed JSON")
             return None
         
         return result
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"ERROR: Auto-reply generation failed: {e}")
+        logger.error("Auto-reply generation failed: %s", e)
         return None
 
+@span("processing.analyze_email_semantics")
 def analyze_email_semantics(text: str, model_name: str = MODEL_FOR_SEMANTICS) -> dict | None:
     """
     Analyze email semantics to extract key information.
@@ -212,6 +227,8 @@ Email text to analyze:
         if not result:
             return None
         return result
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        print(f"Warning: Semantic analysis failed: {e}")
+        logger.warning("Semantic analysis failed: %s", e)
         return None
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Email Processing API.
+Run from the backend directory, e.g. `python -m benchmarks.rag_correction`.
+"""
@@ -0,0 +1,154 @@
+"""
+Benchmark availability computation on synthetic calendars, without a Google account.
+
+Runs against the local SQLite calendar backend (CALENDAR_BACKEND=local, in memory
+by default) filled with generated events, and compares the previous nested-loop
+availability check with the interval sweep used by the scheduler.
+
+Usage:
+    python -m benchmarks.calendar_availability --events 100 1000 5000 --repeat 5
+    python -m benchmarks.calendar_availability --populate local_calendar.db --events 5000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+# Select the offline backend before the calendar modules read their configuration
+os.environ.setdefault("CALENDAR_BACKEND", "local")
+os.environ.setdefault("LOCAL_CALENDAR_DB", ":memory:")
+
+from benchmarks.common import summarize_latencies, write_report
+from modules.calendar_service import get_local_calendar
+from modules.event_cache import get_event_cache, parse_event_datetime
+from modules.local_calendar import LocalCalendarService
+from modules.scheduler import get_free_slots, merge_intervals, compute_free_slots, working_windows
+
+_SUMMARIES = [
+    "Point hebdomadaire", "Revue de sprint", "Call client", "Déjeuner d'équipe",
+    "Formation sécurité", "1:1 manager", "Comité de pilotage", "Support N2"
+]
+
+
+def generate_calendar_events(num_events: int, days: int = 8, seed: int = 42, start: datetime = None) -> list:
+    """
+    Generate event bodies spread over the next `days` days.
+
+    Events start on quarter hours between 7:00 and 19:00 UTC and last 15 to 180
+    minutes; about 2% are all-day events.
+    """
+    rng = random.Random(seed)
+    start = (start or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    events = []
+    for i in range(num_events):
+        day = start.date() + timedelta(days=rng.randrange(days))
+        summary = rng.choice(_SUMMARIES)
+        if rng.random() < 0.02:
+            events.append({
+                "summary": summary,
+                "start": {"date": day.isoformat()},
+                "end": {"date": (day + timedelta(days=1)).isoformat()}
+            })
+            continue
+        event_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(
+            hours=rng.randint(7, 18), minutes=15 * rng.randrange(4)
+        )
+        event_end = event_start + timedelta(minutes=15 * rng.randint(1, 12))
+        events.append({
+            "summary": summary,
+            "start": {"dateTime": event_start.isoformat(), "timeZone": "UTC"},
+            "end": {"dateTime": event_end.isoformat(), "timeZone": "UTC"}
+        })
+    return events
+
+
+def legacy_availability(events: list, now: datetime) -> list:
+    """Previous algorithm: every candidate slot against every event, parsing dates in the inner loop."""
+    availability = []
+    for i in range(1, 8):
+        day = (now + timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
+        for start_hour in [8, 9, 10, 11, 14, 15, 16]:
+            start_time = day.replace(hour=start_hour, tzinfo=timezone.utc)
+            end_time = start_time + timedelta(hours=1)
+            is_free = True
+            for event in events:
+                event_start = parse_event_datetime(event['start'].get('dateTime', event['start'].get('date')))
+                event_end = parse_event_datetime(event['end'].get('dateTime', event['end'].get('date')))
+                if not (end_time <= event_start or start_time >= event_end):
+                    is_free = False
+                    break
+            if is_free:
+                availability.append(start_time)
+    return availability
+
+
+def time_runs(func, repeat: int) -> tuple:
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def run(num_events: int, repeat: int) -> dict:
+    calendar = get_local_calendar()
+    calendar.clear()
+    calendar.bulk_insert(generate_calendar_events(num_events))
+    cache = get_event_cache()
+    # clear() leaves no cancelled rows for an incremental sync to see: reload the previous size's window
+    cache.invalidate()
+
+    now = datetime.now(timezone.utc)
+    windows = working_windows(now.date() + timedelta(days=1), 7)
+    events = cache.get_events(windows[0][0], windows[-1][1])
+
+    legacy_samples, legacy_slots = time_runs(lambda: legacy_availability(events, now), repeat)
+
+    def cold():
+        cache.invalidate()
+        return get_free_slots(tz_name="UTC")
+
+    cold_samples, _ = time_runs(cold, repeat)
+    warm_samples, slots = time_runs(lambda: get_free_slots(tz_name="UTC"), repeat)
+    sweep_samples, _ = time_runs(
+        lambda: compute_free_slots(
+            merge_intervals((s, e) for _, s, e in cache.get_event_intervals(windows[0][0], windows[-1][1])),
+            windows
+        ),
+        repeat
+    )
+
+    parity = [datetime.fromisoformat(slot["start"]) for slot in slots] == legacy_slots
+    return {
+        "events": num_events,
+        "events_in_window": len(events),
+        "free_slots": len(slots),
+        "parity_with_legacy": parity,
+        "legacy_nested_loop_seconds": summarize_latencies(legacy_samples),
+        "sweep_seconds": summarize_latencies(sweep_samples),
+        "get_free_slots_warm_cache_seconds": summarize_latencies(warm_samples),
+        "get_free_slots_cold_cache_seconds": summarize_latencies(cold_samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--populate", help="Write a synthetic calendar to this SQLite file and exit")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.populate:
+        count = LocalCalendarService(args.populate).bulk_insert(generate_calendar_events(args.events[0]))
+        print(f"✅ Wrote {count} events to {args.populate} (use CALENDAR_BACKEND=local LOCAL_CALENDAR_DB={args.populate})")
+        return
+
+    report = {"runs": [run(num_events, args.repeat) for num_events in args.events]}
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
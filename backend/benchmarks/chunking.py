@@ -0,0 +1,119 @@
+"""
+Benchmark the shared chunking service against LangChain's RecursiveCharacterTextSplitter.
+
+Inputs are large OCR-like texts: either files passed with --input, or a synthetic
+document with irregular whitespace and line breaks, as produced by pdf_to_text_blocks.
+
+Usage:
+    python -m benchmarks.chunking --size-kb 500 --repeat 5
+    python -m benchmarks.chunking --input ocr_output.txt --output chunking.json
+"""
+import argparse
+import random
+import re
+import time
+
+from benchmarks.common import summarize_latencies, write_report
+from modules.chunking import chunk_text, clear_cache
+
+# (chunk_size, chunk_overlap) used by the RAG and classification processors
+CONFIGURATIONS = [(700, 300), (600, 100)]
+
+_OCR_SENTENCES = [
+    "Les agriculteurs utilisent des systèmes d'irrigation goutte-à-goutte.",
+    "Montant total TTC : 2 856 TND, payable sous 30 jours.",
+    "La réunion de lancement aura lieu jeudi à 10h en salle Carthage.",
+    "Please find attached the consolidated progress report for Q3.",
+    "Réf. dossier n° 2024/118 - Direction des ressources humaines",
+    "Les indicateurs de performance sont présentés dans le tableau ci-dessous",
+    "Total | 12 450 | 13 020 | +4,6 %",
+]
+
+
+def synthetic_ocr_text(size_kb: int, seed: int = 42) -> str:
+    """Generate an OCR-like document of roughly size_kb kilobytes."""
+    rng = random.Random(seed)
+    target = size_kb * 1024
+    parts, length = [], 0
+    while length < target:
+        sentence = rng.choice(_OCR_SENTENCES)
+        separator = rng.choice([" ", "  ", "\n", "\n\n", " \n ", "\t"])
+        parts.append(sentence + separator)
+        length += len(sentence) + len(separator)
+    return "".join(parts)
+
+
+def langchain_chunk(text: str, chunk_size: int, chunk_overlap: int) -> list:
+    """Previous pipeline: regex clean_text then RecursiveCharacterTextSplitter."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    cleaned_text = re.sub(r'\s+', ' ', text).strip()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return splitter.split_text(cleaned_text)
+
+
+def time_runs(func, repeat: int) -> tuple:
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def chunk_stats(chunks: list) -> dict:
+    return {
+        "chunks": len(chunks),
+        "mean_chunk_chars": round(sum(map(len, chunks)) / len(chunks), 1) if chunks else 0
+    }
+
+
+def benchmark_text(text: str, repeat: int) -> dict:
+    results = {"text_chars": len(text), "configurations": {}}
+    for chunk_size, chunk_overlap in CONFIGURATIONS:
+        baseline_samples, baseline_chunks = time_runs(
+            lambda: langchain_chunk(text, chunk_size, chunk_overlap), repeat
+        )
+
+        def cold():
+            clear_cache()
+            return chunk_text(text, chunk_size, chunk_overlap)
+
+        cold_samples, chunks = time_runs(cold, repeat)
+        warm_samples, _ = time_runs(lambda: chunk_text(text, chunk_size, chunk_overlap), repeat)
+
+        results["configurations"][f"{chunk_size}/{chunk_overlap}"] = {
+            "langchain": {"seconds": summarize_latencies(baseline_samples), **chunk_stats(baseline_chunks)},
+            "chunking_cold": {"seconds": summarize_latencies(cold_samples), **chunk_stats(chunks)},
+            "chunking_cached": {"seconds": summarize_latencies(warm_samples)}
+        }
+
+    # RAG then classification on the same document: the sentence split is shared
+    clear_cache()
+    start = time.perf_counter()
+    for chunk_size, chunk_overlap in CONFIGURATIONS:
+        chunk_text(text, chunk_size, chunk_overlap)
+    results["both_processors_seconds"] = round(time.perf_counter() - start, 4)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text chunking")
+    parser.add_argument("--input", action="append", default=[], help="Text file to chunk (repeatable)")
+    parser.add_argument("--size-kb", type=int, default=500, help="Size of the synthetic OCR text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement")
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    texts = {}
+    for path in args.input:
+        with open(path, "r", encoding="utf-8") as f:
+            texts[path] = f.read()
+    if not texts:
+        texts[f"synthetic_{args.size_kb}kb"] = synthetic_ocr_text(args.size_kb)
+
+    report = {name: benchmark_text(text, args.repeat) for name, text in texts.items()}
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
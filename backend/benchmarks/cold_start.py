@@ -0,0 +1,65 @@
+"""
+Benchmark API cold start: import time of api.main in fresh interpreters.
+
+Each run starts a new Python process, imports the FastAPI app, and reports the
+wall time of the import, the per-stage breakdown and the heavy libraries that
+ended up loaded (none are expected: they load on first use).
+
+Usage:
+    python -m benchmarks.cold_start --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import summarize_latencies, write_report
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+start = time.perf_counter()
+import api.main
+elapsed = time.perf_counter() - start
+from modules.startup_report import get_startup_report
+print(json.dumps({"import_seconds": elapsed, "report": get_startup_report()}))
+"""
+
+
+def measure_once() -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # The app prints at import time; the measurement is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.repeat)]
+    stage_names = [stage["stage"] for stage in runs[0]["report"]["stages"]]
+    report = {
+        "import_api_main_seconds": summarize_latencies([run["import_seconds"] for run in runs]),
+        "stages_seconds": {
+            name: summarize_latencies([
+                stage["seconds"] for run in runs for stage in run["report"]["stages"] if stage["stage"] == name
+            ])
+            for name in stage_names
+        },
+        "heavy_modules_loaded": runs[-1]["report"]["heavy_modules_loaded"]
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
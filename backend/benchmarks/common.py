@@ -0,0 +1,84 @@
+"""
+Shared helpers for benchmark scripts (timing statistics and report output).
+"""
+import json
+import os
+import statistics
+from typing import List, Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str):
+    """Load a JSON fixture from the benchmarks/fixtures directory."""
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_report(path: str) -> dict:
+    """Load a JSON report written by write_report()."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile of samples using linear interpolation."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(samples: List[float], digits: int = 4) -> dict:
+    """Summarize a list of latencies (in seconds), rounded to `digits` decimals."""
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean": round(statistics.mean(samples), digits),
+        "p50": round(percentile(samples, 50), digits),
+        "p95": round(percentile(samples, 95), digits),
+        "p99": round(percentile(samples, 99), digits),
+        "min": round(min(samples), digits),
+        "max": round(max(samples), digits)
+    }
+
+
+def write_report(report: dict, output_path: Optional[str] = None):
+    """Print a JSON report and optionally save it to a file."""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float, higher_is_better=lambda name: False) -> list:
+    """
+    Compare flat {metric: value} dicts and list the metrics that regressed.
+
+    A metric regresses when it is worse than the baseline by more than
+    tolerance (a fraction, 0.2 = 20%). Metrics missing on either side are skipped.
+
+    Args:
+        current: Metrics of this run
+        baseline: Metrics of the reference run
+        tolerance: Allowed relative slowdown
+        higher_is_better: Predicate on the metric name (e.g. throughput)
+
+    Returns:
+        List of {"metric", "baseline", "current", "change"} for each regression
+    """
+    regressions = []
+    for name, value in current.items():
+        reference = baseline.get(name)
+        if not reference or value is None:
+            continue
+        change = (value - reference) / reference
+        worse = -change if higher_is_better(name) else change
+        if worse > tolerance:
+            regressions.append({"metric": name, "baseline": reference, "current": value, "change": round(change, 4)})
+    return regressions
@@ -0,0 +1,75 @@
+"""
+Check the date/time pre-parser against labelled emails and time it.
+
+Each example gives the status the pre-parser must return. Texts it cannot
+resolve must stay "ambiguous" so they reach the LLM; a wrong "no_meeting" or
+"explicit" silently drops or books a meeting. With --check, the script exits
+with status 1 when an example gets another status.
+
+Usage:
+    python -m benchmarks.datetime_parser --repeat 200 --check
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.common import write_report
+from modules.datetime_parser import (
+    preparse_schedule, PREPARSE_AMBIGUOUS, PREPARSE_EXPLICIT, PREPARSE_NO_MEETING, PREPARSE_SUGGESTION
+)
+
+# Fixed reference time (a Monday), so relative dates resolve in the future
+NOW = datetime(2025, 3, 3, 9, 0)
+
+EXAMPLES = [
+    ("Merci pour le document, bonne journée.", PREPARSE_NO_MEETING),
+    ("Thanks, please find the signed invoice attached.", PREPARSE_NO_MEETING),
+    ("Réunion demain à 14h pendant 1h pour le point projet.", PREPARSE_EXPLICIT),
+    ("Meeting next Tuesday 3pm for 30 minutes about the roadmap.", PREPARSE_EXPLICIT),
+    ("Pouvez-vous me donner vos disponibilités pour une réunion ?", PREPARSE_SUGGESTION),
+    ("When works for a call to review the contract?", PREPARSE_SUGGESTION),
+    ("La réunion de demain à 14h pendant 1h est annulée.", PREPARSE_AMBIGUOUS),
+    ("Réunion demain à 14h.", PREPARSE_AMBIGUOUS),
+    ("Réunion lundi ou mardi à 10h.", PREPARSE_AMBIGUOUS),
+    # Relative periods and meeting verbs: no resolvable date, but a meeting request
+    ("Pouvons-nous nous voir la semaine prochaine pour discuter du projet ?", PREPARSE_AMBIGUOUS),
+    ("Let us get together next week to discuss the budget.", PREPARSE_AMBIGUOUS),
+    ("On se retrouve cette semaine pour en parler ?", PREPARSE_AMBIGUOUS),
+    ("Could we catch up this week about the hiring plan?", PREPARSE_AMBIGUOUS),
+    ("Êtes-vous disponible pour une réunion la semaine prochaine ?", PREPARSE_AMBIGUOUS),
+    ("On se voit demain matin ?", PREPARSE_AMBIGUOUS),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the date/time pre-parser")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed passes over the examples")
+    parser.add_argument("--check", action="store_true", help="Fail if an example gets another status")
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    mismatches = []
+    for text, expected in EXAMPLES:
+        status = preparse_schedule(text, now=NOW).status
+        if status != expected:
+            mismatches.append({"text": text, "expected": expected, "status": status})
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for text, _expected in EXAMPLES:
+            preparse_schedule(text, now=NOW)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "examples": len(EXAMPLES),
+        "mismatches": mismatches,
+        "mean_us_per_email": round(elapsed / (args.repeat * len(EXAMPLES)) * 1e6, 1)
+    }
+    write_report(report, args.output)
+    if args.check and mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+End-to-end load benchmark of the API against a mock LLM provider.
+
+Starts the mock OpenAI/Mistral-compatible server (benchmarks.mock_llm) and the
+FastAPI app under uvicorn in a scratch directory (fresh caches and stores),
+waits for /ready, then runs the fixed email, attachment and RAG workloads of
+fixtures/e2e_workloads.json at each concurrency level. For every endpoint and
+level it reports throughput, p50/p95/p99 latency (and time to first byte for
+streams), errors, and the CPU and peak RSS of the server processes.
+
+With --baseline, the run is compared to a previous report and the script exits
+with status 1 when p95 latency or throughput regress beyond --max-regression.
+
+Usage:
+    python -m benchmarks.e2e --concurrency 1 4 16 --requests 40 --output e2e.json
+    python -m benchmarks.e2e --workloads email --llm-latency 0.5 --baseline e2e.json
+"""
+import argparse
+import copy
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmarks.common import compare_to_baseline, load_fixture, load_report, summarize_latencies, write_report
+from benchmarks.mock_llm import MockLLMServer, DEFAULT_LATENCY, DEFAULT_TOKENS_PER_SECOND, DEFAULT_COMPLETION_TOKENS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKLOADS = ("email", "attachment", "rag")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class ProcessSampler:
+    """CPU time and peak RSS of a process tree (uvicorn and its workers)."""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _pids(self) -> List[int]:
+        if psutil is not None:
+            try:
+                root = psutil.Process(self.pid)
+                return [self.pid] + [child.pid for child in root.children(recursive=True)]
+            except psutil.NoSuchProcess:
+                return []
+        # Linux fallback: direct children from /proc
+        pids = [self.pid]
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        if int(f.read().rsplit(")", 1)[1].split()[1]) == self.pid:
+                            pids.append(int(entry))
+                except (OSError, IndexError, ValueError):
+                    continue
+        return pids
+
+    def _usage(self, pid: int):
+        """Return (cpu seconds, rss bytes) of one process."""
+        if psutil is not None:
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        return (int(fields[11]) + int(fields[12])) / ticks, rss
+
+    def snapshot(self):
+        """Return (total cpu seconds, total rss bytes) of the tree."""
+        cpu, rss = 0.0, 0
+        for pid in self._pids():
+            try:
+                pid_cpu, pid_rss = self._usage(pid)
+            except Exception:
+                continue
+            cpu += pid_cpu
+            rss += pid_rss
+        return cpu, rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.snapshot()[1])
+
+    def __enter__(self) -> "ProcessSampler":
+        self._cpu_start, self.peak_rss = self.snapshot()
+        self._wall_start = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        cpu_end, rss = self.snapshot()
+        self.peak_rss = max(self.peak_rss, rss)
+        self.cpu_seconds = cpu_end - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
+
+
+def start_api(port: int, mock_url: str, workers: int, workdir: str) -> subprocess.Popen:
+    """Start uvicorn with every LLM provider pointed at the mock server."""
+    env = dict(
+        os.environ,
+        PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        NVIDIA_API_KEY_LLAMA3_8B="mock",
+        NVIDIA_API_BASE_URL=f"{mock_url}/v1",
+        CLOUD_ADAPTER_ENDPOINT=mock_url,
+        CLOUD_ADAPTER_API_KEY="mock",
+        CALENDAR_BACKEND="local",
+        LOCAL_CALENDAR_DB=":memory:",
+        LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING")
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir,
+        env=env
+    )
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float):
+    """Poll /ready until the worker has warmed up."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with status {process.returncode} before becoming ready")
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"API not ready after {timeout:.0f}s (see GET /ready)")
+
+
+def build_body(entry: Dict, index: int, unique: bool) -> Dict:
+    """Pick the index-th body of an endpoint; with unique, make its varying fields distinct."""
+    body = copy.deepcopy(entry["bodies"][index % len(entry["bodies"])])
+    if unique:
+        for field in entry.get("vary", []):
+            body[field] = f"{body[field]} (#{index})"
+    return body
+
+
+def run_endpoint(base_url: str, entry: Dict, concurrency: int, count: int, unique: bool, sampler: ProcessSampler) -> Dict:
+    """Send count requests to one endpoint with concurrency clients."""
+    sessions = threading.local()
+    url = f"{base_url}{entry['path']}"
+
+    def send(index: int):
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        body = build_body(entry, index, unique)
+        start = time.perf_counter()
+        try:
+            with sessions.session.request(entry["method"], url, json=body, stream=True, timeout=300) as resp:
+                first_byte = None
+                for _ in resp.iter_content(chunk_size=None):
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - start
+                return resp.status_code, time.perf_counter() - start, first_byte
+        except requests.exceptions.RequestException:
+            return None, time.perf_counter() - start, None
+
+    with sampler:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, range(count)))
+
+    ok = [(latency, first_byte) for status, latency, first_byte in results if status == 200]
+    result = {
+        "requests": count,
+        "errors": count - len(ok),
+        "throughput_rps": round(len(ok) / sampler.wall_seconds, 3) if sampler.wall_seconds else None,
+        "latency_seconds": summarize_latencies([latency for latency, _ in ok]),
+        "server_cpu_percent": round(100 * sampler.cpu_seconds / sampler.wall_seconds, 1),
+        "server_rss_peak_mb": round(sampler.peak_rss / 2 ** 20, 1)
+    }
+    if entry["path"].endswith("/stream"):
+        result["first_byte_seconds"] = summarize_latencies([first_byte for _, first_byte in ok if first_byte is not None])
+    statuses = sorted({str(status) for status, _, _ in results if status != 200})
+    if statuses:
+        result["error_statuses"] = statuses
+    return result
+
+
+def flatten(report: Dict) -> Dict[str, float]:
+    """Metrics compared against a baseline: p95 latency and throughput per endpoint and level."""
+    metrics = {}
+    for path, levels in report["results"].items():
+        for level, result in levels.items():
+            metrics[f"{path}@{level}.p95"] = result["latency_seconds"].get("p95")
+            metrics[f"{path}@{level}.throughput_rps"] = result["throughput_rps"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup-requests", type=int, default=2, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--unique", action="store_true", help="Make every request body distinct (no cache hits)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency", type=float, default=DEFAULT_LATENCY, help="Mock seconds before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument("--llm-completion-tokens", type=int, default=DEFAULT_COMPLETION_TOKENS)
+    parser.add_argument("--llm-requests-per-minute", type=int, default=0,
+                        help="Mock provider quota; calls beyond it get 429 (exercises LLM_* limits)")
+    parser.add_argument("--ready-timeout", type=float, default=180.0)
+    parser.add_argument("--fixtures", default="e2e_workloads.json", help="Fixture file in benchmarks/fixtures")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/throughput regression (fraction)")
+    args = parser.parse_args()
+
+    fixtures = load_fixture(args.fixtures)
+    mock = MockLLMServer(
+        latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        completion_tokens=args.llm_completion_tokens,
+        requests_per_minute=args.llm_requests_per_minute
+    ).start()
+    base_url = f"http://127.0.0.1:{args.port}"
+    report = {
+        "config": {
+            "workloads": args.workloads,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "unique": args.unique,
+            "workers": args.workers,
+            "llm_latency": args.llm_latency,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "llm_completion_tokens": args.llm_completion_tokens,
+            "llm_requests_per_minute": args.llm_requests_per_minute
+        },
+        "results": {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix="e2e-bench-") as workdir:
+        api = start_api(args.port, mock.base_url, args.workers, workdir)
+        try:
+            start = time.perf_counter()
+            wait_ready(base_url, api, args.ready_timeout)
+            report["ready_seconds"] = round(time.perf_counter() - start, 2)
+            sampler = ProcessSampler(api.pid)
+            for workload in args.workloads:
+                for entry in fixtures[workload]:
+                    if args.warmup_requests:
+                        run_endpoint(base_url, entry, 1, args.warmup_requests, False, sampler)
+                    for concurrency in args.concurrency:
+                        print(f"{entry['path']} x{concurrency}...", file=sys.stderr)
+                        result = run_endpoint(base_url, entry, concurrency, args.requests, args.unique, sampler)
+                        report["results"].setdefault(entry["path"], {})[f"c{concurrency}"] = result
+        finally:
+            api.terminate()
+            try:
+                api.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                api.kill()
+            mock.stop()
+    report["llm_requests_served"] = mock.requests_served
+    report["llm_requests_rejected_429"] = mock.requests_rejected
+
+    regressions: Optional[List[Dict]] = None
+    if args.baseline:
+        regressions = compare_to_baseline(
+            flatten(report),
+            flatten(load_report(args.baseline)),
+            args.max_regression,
+            higher_is_better=lambda name: name.endswith("throughput_rps")
+        )
+        report["regressions"] = regressions
+    write_report(report, args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare embedding backends on parity with the full-precision model and on CPU throughput.
+
+Parity is the cosine similarity between each backend's embedding and the
+reference "torch" embedding of the same sentence. With --check, the script exits
+with status 1 when a backend falls below its minimum parity.
+
+Usage:
+    python -m benchmarks.embeddings --backends onnx onnx-int8 torch-int8 --threads 1 2 4 --check
+"""
+import argparse
+import sys
+import time
+import numpy as np
+
+from benchmarks.common import load_fixture, write_report
+from modules.embeddings import create_embeddings, EMBEDDING_BACKENDS
+
+# Minimum mean cosine similarity to the torch reference
+MIN_PARITY = {
+    "torch": 0.9999,
+    "onnx": 0.999,
+    "onnx-int8": 0.98,
+    "torch-int8": 0.98,
+}
+
+
+def load_sentences(count: int) -> list:
+    """Build a list of realistic sentences from the RAG fixtures."""
+    sentences = []
+    for fixture in load_fixture("rag_qa.json"):
+        sentences.append(fixture["question"])
+        sentences.append(fixture["reference_answer"])
+        sentences.extend(s.strip() for s in fixture["text_content"].split(".") if s.strip())
+    return [sentences[i % len(sentences)] for i in range(count)]
+
+
+def parity(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Cosine similarity statistics between two sets of normalized embeddings."""
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6)
+    }
+
+
+def throughput(embeddings, sentences: list, repeat: int) -> float:
+    """Best-of-repeat sentences per second for embed_documents."""
+    embeddings.embed_documents(sentences[:8])  # warmup
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        embeddings.embed_documents(sentences)
+        best = min(best, time.perf_counter() - start)
+    return round(len(sentences) / best, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4], help="CPU thread counts to test")
+    parser.add_argument("--sentences", type=int, default=512, help="Sentences per throughput run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement")
+    parser.add_argument("--check", action="store_true", help="Fail if a backend is below its minimum parity")
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    parity_sentences = sentences[:64]
+    reference = np.array(create_embeddings("torch").embed_documents(parity_sentences))
+
+    report = {"sentences": len(sentences), "backends": {}}
+    failures = []
+    for backend in args.backends:
+        result = {"throughput_sentences_per_second": {}}
+        for num_threads in args.threads:
+            embeddings = create_embeddings(backend, num_threads=num_threads)
+            result["throughput_sentences_per_second"][str(num_threads)] = throughput(
+                embeddings, sentences, args.repeat
+            )
+        result["parity"] = parity(reference, np.array(embeddings.embed_documents(parity_sentences)))
+        result["parity"]["min_required"] = MIN_PARITY[backend]
+        if result["parity"]["mean_cosine"] < MIN_PARITY[backend]:
+            failures.append(backend)
+        report["backends"][backend] = result
+
+    report["parity_failures"] = failures
+    write_report(report, args.output)
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
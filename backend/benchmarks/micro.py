@@ -0,0 +1,445 @@
+"""
+Micro-benchmarks of the CPU kernels behind the API, comparable across commits.
+
+Suites:
+    ocr         pdf_to_text_blocks on born-digital and scanned PDFs, preprocess_image_for_ocr
+    chunking    chunk_text as called by the RAG and classification processors (cold and reused)
+    embedding   embed_documents throughput and embed_query latency of the configured backend
+    clustering  fit_themes (K-means, fixed and automatic k) and MiniBatchKMeans on large inputs
+    calendar    get_user_availability on large synthetic calendars (warm and cold event cache)
+
+Fixtures are generated from fixed seeds (texts, page images, PDFs, embeddings,
+calendars); PDFs dropped in benchmarks/fixtures/pdfs/ are added to the corpus.
+
+Timing: each case runs warmup calls first, then `repeat` samples with the
+garbage collector disabled. Fast kernels loop enough times per sample to last
+at least --min-sample-time, and the per-call time is reported. Compare the
+median (p50); rsd is the relative standard deviation of the samples and flags
+noisy results. A suite whose dependencies are missing is reported as skipped.
+
+Usage:
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --suites chunking clustering --quick
+    python -m benchmarks.micro --compare micro_main.json --output micro.json
+    python -m benchmarks.micro --compare micro_main.json micro_branch.json
+"""
+import argparse
+import gc
+import glob
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Select the offline calendar backend before the calendar modules read their configuration
+os.environ.setdefault("CALENDAR_BACKEND", "local")
+os.environ.setdefault("LOCAL_CALENDAR_DB", ":memory:")
+
+from benchmarks.common import FIXTURES_DIR, compare_to_baseline, load_report, summarize_latencies, write_report
+
+SUITES = ("ocr", "chunking", "embedding", "clustering", "calendar")
+DEFAULT_REPEAT = 7
+DEFAULT_WARMUP = 1
+DEFAULT_MIN_SAMPLE_TIME = 0.05  # seconds
+DEFAULT_MAX_REGRESSION = 0.1
+
+
+class Case:
+    """One timed kernel call; setup runs before every call, outside the timer."""
+
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable] = None, items: Optional[int] = None, **info):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.items = items
+        self.info = info
+
+
+def measure(case: Case, repeat: int, warmup: int, min_sample_time: float) -> Dict:
+    """Time a case and return per-call statistics in seconds."""
+    for _ in range(warmup):
+        if case.setup:
+            case.setup()
+        case.fn()
+
+    # Loops per sample (1 when a per-call setup must stay outside the timer)
+    number = 1
+    if case.setup is None:
+        start = time.perf_counter()
+        case.fn()
+        single = time.perf_counter() - start
+        if single < min_sample_time:
+            number = max(1, int(min_sample_time / max(single, 1e-7)))
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                case.fn()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    result = {"seconds": summarize_latencies(samples, digits=9), "loops_per_sample": number}
+    mean = statistics.mean(samples)
+    result["rsd"] = round(statistics.stdev(samples) / mean, 4) if len(samples) > 1 and mean else 0.0
+    if case.items:
+        result["items"] = case.items
+        result["items_per_second"] = round(case.items / statistics.median(samples), 1)
+    result.update(case.info)
+    return result
+
+
+# ---------------- Fixtures ----------------
+
+def synthetic_page(seed: int = 42, width: int = 2480, height: int = 3508):
+    """A4 page at 300 dpi (BGR): dark text-like strokes in paragraphs on a noisy background."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    page = (page - rng.integers(0, 20, size=page.shape, dtype=np.uint8)).astype(np.uint8)
+    y = 200
+    while y < height - 300:
+        for _ in range(int(rng.integers(3, 9))):
+            x = 200
+            while x < width - 300:
+                word = int(rng.integers(40, 220))
+                page[y:y + 28, x:x + word] = rng.integers(0, 60)
+                x += word + int(rng.integers(20, 40))
+            y += 48
+        y += 90
+    return page
+
+
+def _text_pdf(path: str, lines: List[str]):
+    """Write a minimal born-digital PDF (Helvetica text, one page)."""
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    stream = "BT /F1 11 Tf 14 TL 56 790 Td " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+    stream_bytes = stream.encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream_bytes)).encode() + b" >>\nstream\n" + stream_bytes + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _scanned_pdf(path: str, lines: List[str], seed: int = 42):
+    """Write a scanned-like PDF: text rendered to a slightly rotated, noisy 200 dpi image."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (1654, 2339), 255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((140, 160 + 40 * i), line, fill=0)
+    image = image.rotate(0.7, fillcolor=255)
+    noise = np.random.default_rng(seed).integers(0, 40, size=(image.height, image.width), dtype=np.uint8)
+    image = Image.fromarray(np.clip(np.asarray(image, dtype=np.int16) - noise, 0, 255).astype(np.uint8))
+    image.convert("RGB").save(path, "PDF", resolution=200)
+
+
+def pdf_corpus(workdir: str, seed: int = 42) -> Dict[str, str]:
+    """Generated born-digital and scanned PDFs plus any PDF in fixtures/pdfs/."""
+    from benchmarks.chunking import synthetic_ocr_text
+
+    lines = textwrap.wrap(" ".join(synthetic_ocr_text(4, seed).split()), 90)[:50]
+    corpus = {}
+    corpus["born_digital"] = os.path.join(workdir, "born_digital.pdf")
+    _text_pdf(corpus["born_digital"], lines)
+    corpus["scanned"] = os.path.join(workdir, "scanned.pdf")
+    _scanned_pdf(corpus["scanned"], lines, seed)
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "pdfs", "*.pdf"))):
+        corpus[os.path.splitext(os.path.basename(path))[0]] = path
+    return corpus
+
+
+def synthetic_embeddings(samples: int, clusters: int = 6, dim: int = 384, seed: int = 42):
+    """Unit vectors drawn around `clusters` random centers (like chunk embeddings of a mailbox)."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(0, clusters, size=samples)] + 0.6 * rng.normal(size=(samples, dim))
+    points = points.astype(np.float32)
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+# ---------------- Suites ----------------
+
+def ocr_cases(quick: bool, workdir: str) -> List[Case]:
+    from modules.attachment_processor import pdf_to_text_blocks, preprocess_image_for_ocr
+
+    page = synthetic_page()
+    cases = [Case("ocr/preprocess_image_for_ocr/a4_300dpi", lambda: preprocess_image_for_ocr(page), items=1)]
+    corpus = pdf_corpus(workdir)
+    if quick:
+        corpus = {name: corpus[name] for name in ("born_digital", "scanned")}
+    for name, path in corpus.items():
+        cases.append(Case(f"ocr/pdf_to_text_blocks/{name}", lambda path=path: pdf_to_text_blocks(path), items=1))
+    return cases
+
+
+def chunking_cases(quick: bool, workdir: str) -> List[Case]:
+    from benchmarks.chunking import synthetic_ocr_text
+    from modules.chunking import chunk_text, clear_cache
+    from modules.document_store import DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+
+    cases = []
+    for size_kb in ((50,) if quick else (50, 500)):
+        text = synthetic_ocr_text(size_kb)
+        chunks = len(chunk_text(text, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP))
+
+        def rag(text=text):
+            chunk_text(text, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+
+        def reuse(text=text):
+            # Classification of a document the RAG processor already chunked
+            clear_cache()
+            chunk_text(text, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+
+        cases.append(Case(f"chunking/rag_cold/{size_kb}kb", rag, setup=clear_cache, items=chunks))
+        cases.append(Case(f"chunking/classification_after_rag/{size_kb}kb", rag, setup=reuse, items=chunks))
+
+    # Short-text path of the classification processor: one chunk, re-split with a smaller size
+    short = synthetic_ocr_text(1)[:DEFAULT_CHUNK_SIZE - 50]
+    short_size = max(50, len(short) // 3)
+
+    def classify_short():
+        chunk_text(short, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+        chunk_text(short, short_size, max(10, short_size // 5))
+
+    cases.append(Case("chunking/classification_short_text", classify_short, setup=clear_cache))
+    return cases
+
+
+def embedding_cases(quick: bool, workdir: str) -> List[Case]:
+    from benchmarks.embeddings import load_sentences
+    from modules.embeddings import get_embeddings, EMBEDDING_BACKEND
+
+    embeddings = get_embeddings()
+    cases = [Case("embedding/embed_query", lambda: embeddings.embed_query("Quand la réunion est-elle prévue ?"),
+                  backend=EMBEDDING_BACKEND)]
+    for batch in ((16,) if quick else (16, 128)):
+        sentences = load_sentences(batch)
+        cases.append(Case(f"embedding/embed_documents/{batch}", lambda s=sentences: embeddings.embed_documents(s),
+                          items=batch, backend=EMBEDDING_BACKEND))
+    return cases
+
+
+def clustering_cases(quick: bool, workdir: str) -> List[Case]:
+    from modules.classification_processor import fit_themes
+    from modules.clustering import cluster_embeddings
+    from modules.document_store import StoredDocument, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+
+    cases = []
+    for samples in ((200,) if quick else (200, 1000)):
+        vectors = synthetic_embeddings(samples)
+        document = StoredDocument(
+            content_hash=f"synthetic-{samples}",
+            chunk_size=DEFAULT_CHUNK_SIZE,
+            chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+            chunks=[f"chunk {i}" for i in range(samples)],
+            embeddings=vectors
+        )
+        cases.append(Case(f"clustering/fit_themes/k5/{samples}", lambda d=document: fit_themes(d, 5), items=samples))
+        cases.append(Case(f"clustering/fit_themes/auto/{samples}", lambda d=document: fit_themes(d, None), items=samples))
+    if not quick:
+        vectors = synthetic_embeddings(20000)
+        cases.append(Case("clustering/minibatch_kmeans/k8/20000", lambda: cluster_embeddings(vectors, 8), items=20000))
+    return cases
+
+
+def calendar_cases(quick: bool, workdir: str) -> List[Case]:
+    from benchmarks.calendar_availability import generate_calendar_events
+    from modules.calendar_service import get_local_calendar
+    from modules.event_cache import get_event_cache
+    from modules.scheduler import get_user_availability
+
+    calendar = get_local_calendar()
+    cache = get_event_cache()
+    loaded = {"events": None}
+
+    def use_calendar(num_events: int):
+        """Fill the local calendar with num_events events unless it already holds them."""
+        if loaded["events"] != num_events:
+            calendar.clear()
+            calendar.bulk_insert(generate_calendar_events(num_events))
+            cache.invalidate()
+            loaded["events"] = num_events
+
+    def use_cold_cache(num_events: int):
+        use_calendar(num_events)
+        cache.invalidate()
+
+    cases = []
+    for num_events in ((1000,) if quick else (1000, 10000, 50000)):
+        cases.append(Case(
+            f"calendar/get_user_availability/warm/{num_events}",
+            get_user_availability,
+            setup=lambda n=num_events: use_calendar(n)
+        ))
+        cases.append(Case(
+            f"calendar/get_user_availability/cold/{num_events}",
+            get_user_availability,
+            setup=lambda n=num_events: use_cold_cache(n)
+        ))
+    return cases
+
+
+SUITE_CASES = {
+    "ocr": ocr_cases,
+    "chunking": chunking_cases,
+    "embedding": embedding_cases,
+    "clustering": clustering_cases,
+    "calendar": calendar_cases
+}
+
+
+# ---------------- Report ----------------
+
+def environment() -> Dict:
+    """Machine and revision the numbers were measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def run_suites(suites: List[str], quick: bool, repeat: int, warmup: int, min_sample_time: float, only: Optional[str]) -> Dict:
+    results, skipped = {}, {}
+    with tempfile.TemporaryDirectory(prefix="micro-bench-") as workdir:
+        for suite in suites:
+            try:
+                cases = SUITE_CASES[suite](quick, workdir)
+            except Exception as e:
+                skipped[suite] = f"{type(e).__name__}: {e}"
+                print(f"Skipping {suite}: {skipped[suite]}", file=sys.stderr)
+                continue
+            for case in cases:
+                if only and only not in case.name:
+                    continue
+                print(f"{case.name}...", file=sys.stderr)
+                try:
+                    results[case.name] = measure(case, repeat, warmup, min_sample_time)
+                except Exception as e:
+                    results[case.name] = {"error": f"{type(e).__name__}: {e}"}
+    return {"results": results, "skipped_suites": skipped}
+
+
+def medians(report: Dict) -> Dict[str, float]:
+    return {
+        name: result["seconds"]["p50"]
+        for name, result in report["results"].items()
+        if "seconds" in result
+    }
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> Dict:
+    """Median change per case and the cases slower than baseline by more than tolerance."""
+    base, new = medians(baseline), medians(current)
+    changes = {
+        name: {"baseline": base[name], "current": new[name], "change": round((new[name] - base[name]) / base[name], 4)}
+        for name in new
+        if base.get(name)
+    }
+    return {
+        "baseline_commit": baseline.get("environment", {}).get("commit"),
+        "current_commit": current.get("environment", {}).get("commit"),
+        "tolerance": tolerance,
+        "changes": changes,
+        "regressions": compare_to_baseline(new, base, tolerance),
+        "only_in_baseline": sorted(set(base) - set(new)),
+        "only_in_current": sorted(set(new) - set(base))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--only", help="Run only the cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs (smoke run, not for comparisons)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed samples per case")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Untimed calls per case")
+    parser.add_argument("--min-sample-time", type=float, default=DEFAULT_MIN_SAMPLE_TIME)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument(
+        "--compare", nargs="+", metavar="REPORT",
+        help="Baseline report; with a second report, compare the two without running"
+    )
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="Allowed median slowdown (fraction) before --compare fails")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline report and optionally a second report")
+
+    if args.compare and len(args.compare) == 2:
+        report = load_report(args.compare[1])
+    else:
+        report = {
+            "environment": environment(),
+            "config": {
+                "suites": args.suites,
+                "quick": args.quick,
+                "repeat": args.repeat,
+                "warmup": args.warmup,
+                "min_sample_time": args.min_sample_time
+            },
+            **run_suites(args.suites, args.quick, args.repeat, args.warmup, args.min_sample_time, args.only)
+        }
+
+    comparison = None
+    if args.compare:
+        comparison = compare(load_report(args.compare[0]), report, args.max_regression)
+        if len(args.compare) == 2:
+            report = comparison
+        else:
+            report["comparison"] = comparison
+    write_report(report, args.output)
+    if comparison and comparison["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
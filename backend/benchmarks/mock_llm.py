@@ -0,0 +1,215 @@
+"""
+Mock OpenAI/Mistral-compatible LLM server for benchmarks.
+
+Serves POST /v1/chat/completions (plain and streaming) and GET /v1/models with
+a configurable latency before the first token and a configurable token rate,
+so end-to-end benchmarks measure the API itself against a provider of known
+speed. With --requests-per-minute it answers 429 with Retry-After beyond that
+rate, like a provider quota. Every completion is one JSON object holding the
+fields the API prompts ask for (summary, tasks, reply, answer, themes, ...), so
+all parsers succeed.
+
+Usage:
+    python -m benchmarks.mock_llm --port 8766 --latency 0.3 --tokens-per-second 50
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default configuration
+DEFAULT_LATENCY = 0.3  # seconds before the first token
+DEFAULT_TOKENS_PER_SECOND = 50.0  # 0 sends the whole completion at once
+DEFAULT_COMPLETION_TOKENS = 60
+
+MOCK_COMPLETION = {
+    "translation": "Hello team, the project kickoff meeting is on Thursday at 10am.",
+    "main_subject": "Project kickoff",
+    "short_summary": "The kickoff meeting is scheduled and estimates are due.",
+    "email_type": "Meeting",
+    "participants": ["you"],
+    "sentiment": "Neutral",
+    "urgency": {"is_urgent": False, "justification": "No deadline within 24 hours"},
+    "summary": "The project kickoff meeting takes place on Thursday at 10am.",
+    "key_points": ["Kickoff on Thursday at 10am", "Prepare workload estimates"],
+    "tasks": [{"task_description": "Prepare workload estimates", "assignee": "you", "deadline": None, "priority": "Medium"}],
+    "reply": "Thank you, I will attend the meeting and bring my estimates.",
+    "tone": "Professional",
+    "raw_answer": "The meeting is on Thursday at 10am.",
+    "answer": "The meeting is on Thursday at 10am.",
+    "themes": [f"Theme {i + 1}" for i in range(20)]
+}
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Chat completions with simulated provider latency."""
+
+    protocol_version = "HTTP/1.1"
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "benchmark"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        completion_tokens = min(self.server.completion_tokens, int(request.get("max_tokens") or self.server.completion_tokens))
+        usage = {
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": completion_tokens,
+            "total_tokens": len(prompt.split()) + completion_tokens
+        }
+        retry_after = self.server.admit()
+        if retry_after is not None:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit_exceeded"}},
+                {"Retry-After": str(retry_after)}
+            )
+            return
+        time.sleep(self.server.latency)
+
+        model = request.get("model", "mock")
+        content = json.dumps(MOCK_COMPLETION)
+        if request.get("stream"):
+            self._stream(model, content, completion_tokens)
+            return
+        self.server.generate(completion_tokens)
+        self._send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    def _stream(self, model: str, content: str, completion_tokens: int):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Split the completion into completion_tokens deltas sent at the token rate
+        size = max(1, -(-len(content) // max(1, completion_tokens)))
+        for start in range(0, len(content), size):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            self.server.generate(1)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Threaded mock server, runnable in the background of a benchmark."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = DEFAULT_LATENCY,
+        tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+        completion_tokens: int = DEFAULT_COMPLETION_TOKENS,
+        requests_per_minute: int = 0
+    ):
+        super().__init__((host, port), MockLLMHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.requests_per_minute = requests_per_minute
+        self.requests_served = 0
+        self.requests_rejected = 0
+        self._accepted = deque()
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self) -> "int | None":
+        """Count a request; return Retry-After seconds if it exceeds the per-minute quota."""
+        with self._count_lock:
+            now = time.monotonic()
+            if self.requests_per_minute > 0:
+                while self._accepted and now - self._accepted[0] >= 60:
+                    self._accepted.popleft()
+                if len(self._accepted) >= self.requests_per_minute:
+                    self.requests_rejected += 1
+                    return max(1, math.ceil(60 - (now - self._accepted[0])))
+                self._accepted.append(now)
+            self.requests_served += 1
+            return None
+
+    def generate(self, tokens: int):
+        """Sleep for the time the provider would take to generate tokens."""
+        if self.tokens_per_second > 0:
+            time.sleep(tokens / self.tokens_per_second)
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument("--completion-tokens", type=int, default=DEFAULT_COMPLETION_TOKENS)
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="Answer 429 beyond this rate (0: no quota)")
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        args.host, args.port, args.latency, args.tokens_per_second, args.completion_tokens, args.requests_per_minute
+    )
+    print(f"Mock LLM server on {server.base_url} (OpenAI base URL: {server.base_url}/v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare RAG correction modes ("inline" single call vs "two_pass") on latency and quality.
+
+Quality is measured as token-level F1 between the final answer and a reference
+answer from the fixture set. Requires CLOUD_ADAPTER_API_KEY (and optionally
+CLOUD_ADAPTER_ENDPOINT / MISTRAL_MODEL) in the environment or config/.env.
+
+Usage:
+    python -m benchmarks.rag_correction --repeat 3 --output rag_correction.json
+"""
+import argparse
+import os
+import re
+import time
+from collections import Counter
+from dotenv import load_dotenv
+
+from benchmarks.common import load_fixture, summarize_latencies, write_report
+from modules.rag_processor import answer_question, CORRECTION_MODE_INLINE, CORRECTION_MODE_TWO_PASS
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '../config/.env')
+load_dotenv(dotenv_path)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens, used for the F1 quality score."""
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def token_f1(prediction: str, reference: str) -> float:
+    """Token-level F1 between a prediction and a reference answer."""
+    pred_tokens = tokenize(prediction)
+    ref_tokens = tokenize(reference)
+    if not pred_tokens or not ref_tokens:
+        return 0.0
+    common = sum((Counter(pred_tokens) & Counter(ref_tokens)).values())
+    if common == 0:
+        return 0.0
+    precision = common / len(pred_tokens)
+    recall = common / len(ref_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_mode(fixtures: list, mode: str, repeat: int, api_endpoint: str, api_key: str, model: str) -> dict:
+    """Run every fixture `repeat` times in the given correction mode."""
+    latencies, scores, failures = [], [], 0
+    for _ in range(repeat):
+        for fixture in fixtures:
+            start = time.perf_counter()
+            try:
+                result = answer_question(
+                    question=fixture["question"],
+                    text_content=fixture["text_content"],
+                    api_endpoint=api_endpoint,
+                    api_key=api_key,
+                    model=model,
+                    apply_correction=True,
+                    correction_mode=mode
+                )
+            except Exception as e:
+                print(f"❌ {mode} failed on '{fixture['question']}': {e}")
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            scores.append(token_f1(result["answer"], fixture["reference_answer"]))
+    
+    return {
+        "latency_seconds": summarize_latencies(latencies),
+        "mean_token_f1": round(sum(scores) / len(scores), 4) if scores else None,
+        "failures": failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG correction modes")
+    parser.add_argument("--fixtures", default="rag_qa.json", help="Fixture file in benchmarks/fixtures")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of passes over the fixture set")
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args()
+    
+    api_endpoint = os.environ.get("CLOUD_ADAPTER_ENDPOINT", "https://api.mistral.ai")
+    api_key = os.environ.get("CLOUD_ADAPTER_API_KEY", "")
+    model = os.environ.get("MISTRAL_MODEL", "mistral-small")
+    if not api_key:
+        raise SystemExit("CLOUD_ADAPTER_API_KEY is not set")
+    
+    fixtures = load_fixture(args.fixtures)
+    report = {
+        "model": model,
+        "fixtures": len(fixtures),
+        "repeat": args.repeat,
+        "modes": {
+            mode: run_mode(fixtures, mode, args.repeat, api_endpoint, api_key, model)
+            for mode in (CORRECTION_MODE_INLINE, CORRECTION_MODE_TWO_PASS)
+        }
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
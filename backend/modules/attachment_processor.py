@@ -3,19 +3,22 @@ import tempfile
 import shutil
 from datetime import datetime
 from typing import Dict, Optional, Tuple
-import pytesseract
-from docx import Document
-import cv2
 import numpy as np
-from pdf2image import convert_from_path
 import hashlib
+from modules.tracing import span
+from modules.metrics import observe_stage, STAGE_PDF_RASTERIZATION, STAGE_OCR
+from modules.logging_config import get_logger
+
+logger = get_logger("attachment")
+
+# OpenCV, Tesseract, pdf2image and python-docx are imported on first use, so
+# workers that never process attachments do not load them
 
 # ---------------- CONFIG ----------------
 TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 TESSDATA_PREFIX = r"C:\Program Files\Tesseract-OCR"
 POPLER_PATH = r"C:\Popler\Library\bin"
 
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
 os.environ["TESSDATA_PREFIX"] = TESSDATA_PREFIX
 
 MIN_W, MIN_H = 100, 50
@@ -33,6 +36,12 @@ SUPPORTED_MIME_TYPES = {
 }
 
 # ---------------- UTILITAIRES ----------------
+def get_tesseract():
+    """Import pytesseract on first use and point it at the configured binary."""
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+    return pytesseract
+
 def extract_metadata(file_path: str) -> Optional[Dict]:
     try:
         stats = os.stat(file_path)
@@ -47,10 +56,11 @@ def extract_metadata(file_path: str) -> Optional[Dict]:
             "modified_date": datetime.fromtimestamp(stats.st_mtime).isoformat(),
         }
     except Exception as e:
-        print(f"❌ Metadata extraction failed: {e}")
+        logger.error("Metadata extraction failed: %s", e)
         return None
 
 def preprocess_image_for_ocr(img: np.ndarray) -> np.ndarray:
+    import cv2
     if img is None:
         raise ValueError("Cannot process empty image")
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -59,6 +69,7 @@ def preprocess_image_for_ocr(img: np.ndarray) -> np.ndarray:
     return gray
 
 def split_vertical_blocks(img: np.ndarray, x: int, y: int, w: int, h: int):
+    import cv2
     roi = img[y:y+h, x:x+w]
     gray = cv2.cvtColor(roi, cv2.COLOR_RGB2GRAY)
     _, thresh = cv2.threshold(gray, 180, 255, cv2.THRESH_BINARY_INV)
@@ -74,10 +85,14 @@ def split_vertical_blocks(img: np.ndarray, x: int, y: int, w: int, h: int):
 
 # ---------------- OCR PDF avancé ----------------
 def pdf_to_text_blocks(pdf_path: str) -> str:
+    import cv2
+    from pdf2image import convert_from_path
+    pytesseract = get_tesseract()
     temp_dir = tempfile.mkdtemp(prefix="pdf_blocks_")
     final_dir = tempfile.mkdtemp(prefix="pdf_blocks_final_")
     try:
-        pages = convert_from_path(pdf_path, poppler_path=POPLER_PATH)
+        with observe_stage(STAGE_PDF_RASTERIZATION):
+            pages = convert_from_path(pdf_path, poppler_path=POPLER_PATH)
         for idx_page, page in enumerate(pages):
             img = np.array(page)
             gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
@@ -120,11 +135,12 @@ def pdf_to_text_blocks(pdf_path: str) -> str:
                 continue
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             try:
-                text = pytesseract.image_to_string(gray, lang='fra+eng', config='--oem 3 --psm 6')
+                with observe_stage(STAGE_OCR):
+                    text = pytesseract.image_to_string(gray, lang='fra+eng', config='--oem 3 --psm 6')
                 if text.strip():
                     texts.append(text.strip())
             except pytesseract.TesseractError as e:
-                print(f"❌ OCR failed for {f}: {e}")
+                logger.error("OCR failed for %s: %s", f, e)
 
         return "\n\n".join(texts) if texts else "[No text extracted]"
     finally:
@@ -132,6 +148,7 @@ def pdf_to_text_blocks(pdf_path: str) -> str:
         shutil.rmtree(final_dir, ignore_errors=True)
 
 # ---------------- Traitement fichier général ----------------
+@span("attachment_processor.process_file")
 def process_file(file_path: str) -> Tuple[Optional[Dict], str]:
     meta = extract_metadata(file_path)
     if meta is None or meta["mime_type"] is None:
@@ -141,10 +158,13 @@ def process_file(file_path: str) -> Tuple[Optional[Dict], str]:
         if ext == ".pdf":
             text = pdf_to_text_blocks(file_path)
         elif ext in (".png", ".jpg", ".jpeg"):
+            import cv2
             img = cv2.imread(file_path)
             gray = preprocess_image_for_ocr(img)
-            text = pytesseract.image_to_string(gray, lang='fra+eng', config='--oem 3 --psm 6')
+            with observe_stage(STAGE_OCR):
+                text = get_tesseract().image_to_string(gray, lang='fra+eng', config='--oem 3 --psm 6')
         elif ext == ".docx":
+            from docx import Document
             doc = Document(file_path)
             text = "\n".join([p.text for p in doc.paragraphs])
         elif ext == ".txt":
@@ -153,7 +173,7 @@ def process_file(file_path: str) -> Tuple[Optional[Dict], str]:
         else:
             text = f"[Type {ext} not supported for OCR/text extraction]"
     except Exception as e:
-        print(f"❌ Failed to process {file_path}: {e}")
+        logger.error("Failed to process %s: %s", file_path, e)
         text = "[Processing failed]"
     return meta, text
 
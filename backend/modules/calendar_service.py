@@ -1,9 +1,11 @@
 # calendar_service.py
 import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import threading
+from datetime import datetime, timedelta
+from modules.local_calendar import LocalCalendarService, DEFAULT_LOCAL_CALENDAR_DB
+from modules.logging_config import get_logger
+
+logger = get_logger("calendar")
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
@@ -12,16 +14,125 @@ CALENDAR_DIR = os.path.dirname(os.path.abspath(__file__))
 CLIENT_SECRET_PATH = os.path.join(CALENDAR_DIR, '../config/Client_secret.json')
 TOKEN_PATH = os.path.join(CALENDAR_DIR, 'token.json')
 
-def get_calendar_service():
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
+# Calendar backend: "google" (Google Calendar API) or "local" (SQLite stand-in, no account needed)
+CALENDAR_BACKENDS = ("google", "local")
+CALENDAR_BACKEND = os.environ.get("CALENDAR_BACKEND", "google")
+LOCAL_CALENDAR_DB = os.environ.get("LOCAL_CALENDAR_DB", DEFAULT_LOCAL_CALENDAR_DB)
+
+# Google Calendar accepts at most 50 calls per batch request
+MAX_BATCH_SIZE = 50
+
+# Refresh the access token this long before it expires, so requests never carry a stale token
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+_creds = None
+_creds_lock = threading.Lock()
+# googleapiclient service objects (and their httplib2 transport) are not thread-safe,
+# so each worker thread builds its own once and reuses it
+_local = threading.local()
+_local_calendar = None
+
+
+def _save_credentials(creds):
+    with open(TOKEN_PATH, 'w') as token:
+        token.write(creds.to_json())
+
+
+def _needs_refresh(creds) -> bool:
+    if not creds.valid:
+        return True
+    # google-auth stores expiry as a naive UTC datetime
+    return creds.expiry is not None and creds.expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN
+
+
+def get_credentials():
+    """
+    Return the shared OAuth credentials, loading token.json once and refreshing
+    the access token shortly before it expires.
+    """
+    # Google client libraries are imported on first use (the local backend never needs them)
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    global _creds
+    with _creds_lock:
+        if _creds is None and os.path.exists(TOKEN_PATH):
+            _creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+
+        if _creds is None or (not _creds.valid and not _creds.refresh_token):
             flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_PATH, SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(TOKEN_PATH, 'w') as token:
-            token.write(creds.to_json())
-    return build('calendar', 'v3', credentials=creds)
\ No newline at end of file
+            _creds = flow.run_local_server(port=0)
+            _save_credentials(_creds)
+        elif _needs_refresh(_creds) and _creds.refresh_token:
+            logger.info("Refreshing Google Calendar access token")
+            _creds.refresh(Request())
+            _save_credentials(_creds)
+        return _creds
+
+
+def get_local_calendar() -> LocalCalendarService:
+    """Return the process-wide SQLite calendar (LOCAL_CALENDAR_DB, ":memory:" allowed)."""
+    global _local_calendar
+    with _creds_lock:
+        if _local_calendar is None:
+            _local_calendar = LocalCalendarService(LOCAL_CALENDAR_DB)
+        return _local_calendar
+
+
+def get_calendar_service():
+    """
+    Return the calendar service of the configured backend.
+
+    With the Google backend, the service is built once per thread from the
+    bundled (static) discovery document, so no discovery fetch happens at
+    request time. All threads share the same credentials object, so a token
+    refresh is seen by every service. The local backend is a single SQLite
+    calendar exposing the same events() calls.
+    """
+    if CALENDAR_BACKEND == "local":
+        return get_local_calendar()
+    if CALENDAR_BACKEND != "google":
+        raise ValueError(f"Unknown calendar backend '{CALENDAR_BACKEND}'. Expected one of: {', '.join(CALENDAR_BACKENDS)}")
+
+    creds = get_credentials()
+    service = getattr(_local, 'service', None)
+    if service is None or getattr(_local, 'creds', None) is not creds:
+        from googleapiclient.discovery import build
+
+        service = build('calendar', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+        _local.service = service
+        _local.creds = creds
+    return service
+
+
+def insert_events(bodies: list, calendar_id: str = 'primary') -> list:
+    """
+    Insert several events with batch requests (one HTTP round-trip per 50 events).
+
+    Args:
+        bodies: Event resources to insert
+        calendar_id: Target calendar
+
+    Returns:
+        List aligned with bodies holding the created event, or the exception raised for it
+    """
+    service = get_calendar_service()
+    results = [None] * len(bodies)
+
+    def on_response(request_id, response, exception):
+        results[int(request_id)] = exception if exception is not None else response
+
+    for offset in range(0, len(bodies), MAX_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for index in range(offset, min(offset + MAX_BATCH_SIZE, len(bodies))):
+            batch.add(service.events().insert(calendarId=calendar_id, body=bodies[index]), request_id=str(index))
+        batch.execute()
+    return results
+
+
+def reset_calendar_service():
+    """Forget the cached credentials; services are rebuilt on next use."""
+    global _creds
+    with _creds_lock:
+        _creds = None
@@ -0,0 +1,166 @@
+"""
+Text Chunking Module
+Shared, memoized sentence-aware text splitter used by the RAG and classification processors
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import List, Tuple
+
+# Default configuration
+DEFAULT_CACHE_SIZE = 128
+
+_WORD_RE = re.compile(r'\S+')
+_SENTENCE_END = ('.', '!', '?', '…', '."', '?"', '!"', '.»', '?»', '!»')
+
+
+class LRUCache:
+    """Small thread-safe LRU cache, also used by the document store and the theme analysis cache."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_sentence_cache = LRUCache(DEFAULT_CACHE_SIZE)
+_chunk_cache = LRUCache(DEFAULT_CACHE_SIZE)
+
+
+def text_hash(text: str) -> str:
+    """Return the content hash used to key cached chunkings."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def split_sentences(text: str) -> Tuple[str, ...]:
+    """
+    Split text into whitespace-normalized sentences in a single pass.
+
+    Whitespace normalization (the job of `clean_text`) happens while the words
+    are scanned, so the text is only traversed once.
+    """
+    sentences = []
+    current = []
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        current.append(word)
+        if word.endswith(_SENTENCE_END):
+            sentences.append(" ".join(current))
+            current = []
+    if current:
+        sentences.append(" ".join(current))
+    return tuple(sentences)
+
+
+def _iter_units(sentences: Tuple[str, ...], chunk_size: int):
+    """Yield packing units: whole sentences, or words for oversized sentences."""
+    for sentence in sentences:
+        if len(sentence) <= chunk_size:
+            yield sentence
+            continue
+        for word in sentence.split(" "):
+            # Hard-cut single tokens longer than a chunk (e.g. OCR noise, URLs)
+            for start in range(0, len(word), chunk_size):
+                yield word[start:start + chunk_size]
+
+
+def _pack(sentences: Tuple[str, ...], chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Greedily pack sentences into chunks, carrying trailing units as overlap."""
+    chunks = []
+    window = deque()
+    length = 0  # length of " ".join(window)
+
+    for unit in _iter_units(sentences, chunk_size):
+        unit_length = len(unit)
+        if window and length + 1 + unit_length > chunk_size:
+            chunks.append(" ".join(window))
+            # Keep at most `chunk_overlap` characters, leaving room for the new unit
+            while window and (length > chunk_overlap or length + 1 + unit_length > chunk_size):
+                removed = window.popleft()
+                length = length - len(removed) - 1 if window else 0
+        length = length + 1 + unit_length if window else unit_length
+        window.append(unit)
+
+    if window:
+        chunks.append(" ".join(window))
+    return chunks
+
+
+def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Split text into whitespace-normalized, sentence-aligned chunks.
+
+    Results are memoized by (text hash, chunk_size, chunk_overlap), and the
+    sentence split is memoized by text hash, so re-chunking the same document
+    with other sizes (e.g. RAG then classification) skips the scanning pass.
+
+    Args:
+        text: Raw text content
+        chunk_size: Maximum chunk length in characters
+        chunk_overlap: Maximum overlap between consecutive chunks in characters
+
+    Returns:
+        List of chunks
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+    digest = text_hash(text)
+    key = (digest, chunk_size, chunk_overlap)
+    cached = _chunk_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    sentences = _sentence_cache.get(digest)
+    if sentences is None:
+        sentences = split_sentences(text)
+        _sentence_cache.put(digest, sentences)
+
+    chunks = _pack(sentences, chunk_size, chunk_overlap)
+    _chunk_cache.put(key, tuple(chunks))
+    return chunks
+
+
+def get_cache_stats() -> dict:
+    """Return hit/miss counters of the chunking caches."""
+    return {
+        "chunk_cache": {"size": len(_chunk_cache), "hits": _chunk_cache.hits, "misses": _chunk_cache.misses},
+        "sentence_cache": {"size": len(_sentence_cache), "hits": _sentence_cache.hits, "misses": _sentence_cache.misses}
+    }
+
+
+def clear_cache():
+    """Drop all memoized chunkings."""
+    _chunk_cache.clear()
+    _sentence_cache.clear()
@@ -3,154 +3,319 @@ Classification and Theme Detection Module
 Handles document clustering, theme detection, and thematic description generation
 """
 
+import json
 import os
-import re
-import shutil
 import time
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional
 import requests
 import numpy as np
-from sklearn.cluster import KMeans
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
+from modules.chunking import LRUCache
+from modules.document_store import (
+    get_document_store,
+    StoredDocument,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP
+)
+from modules.clustering import cluster_embeddings, representative_indices
+from modules.embeddings import EMBEDDING_BACKEND
+from modules.metrics import record_llm_call
+from modules.llm_scheduler import call_with_limits, estimate_tokens, LLMUnavailableError
+from modules.tracing import span, set_attributes, bind_context
+from modules.theme_labels import get_label_store
+from modules.topic_model import get_topic_model
+from modules.logging_config import get_logger
+
+logger = get_logger("classification")
 
 # Default configuration
-DEFAULT_PERSIST_DIR = "chroma_db_classification"
-DEFAULT_CHUNK_SIZE = 600
-DEFAULT_CHUNK_OVERLAP = 100
-DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 DEFAULT_NUM_THEMES = 5
+DEFAULT_DESCRIPTION_CONCURRENCY = 4
+DEFAULT_ANALYSIS_CACHE_SIZE = 128
+
+# Description modes: "concurrent" labels each theme in its own call with a
+# bounded number of calls in flight, "batched" labels all themes in one call
+DESCRIPTION_MODE_CONCURRENT = "concurrent"
+DESCRIPTION_MODE_BATCHED = "batched"
+
+THEME_PROMPT_TEMPLATE = """
+Tu es un expert en analyse de texte.
+À partir du texte suivant, identifie la thématique principale (3 mots maximum) pour tout le fichier.
+
+--- TEXTE ---
+{text}
+
+--- THÉMATIQUE ---
+"""
 
+BATCHED_THEME_PROMPT_TEMPLATE = """
+Tu es un expert en analyse de texte.
+Pour chacun des {count} textes numérotés ci-dessous, identifie sa thématique principale (3 mots maximum).
+
+{texts}
 
-def clean_text(text: str) -> str:
-    """Clean and normalize text by removing extra whitespace."""
-    return re.sub(r'\s+', ' ', text).strip()
+Réponds UNIQUEMENT avec un objet JSON valide de la forme :
+{{"themes": ["thématique du texte 1", "thématique du texte 2", ...]}}
+La liste doit contenir exactement {count} thématiques, dans l'ordre des textes.
+"""
 
 
-def initialize_vectorstore_for_classification(
+def load_document_for_classification(
     text: str,
-    persist_dir: str = DEFAULT_PERSIST_DIR,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
     force_recreate: bool = False
-) -> Tuple[any, List[str], any]:
+) -> StoredDocument:
     """
-    Initialize vectorstore for classification.
+    Load the chunks and embeddings of a text from the shared document store.
     
     Args:
         text: Text content to vectorize
-        persist_dir: Directory to persist the vectorstore
         chunk_size: Size of text chunks
         chunk_overlap: Overlap between chunks
-        force_recreate: If True, recreate the vectorstore even if it exists
+        force_recreate: If True, re-embed the text even if it is already stored
         
     Returns:
-        Tuple of (vectordb, chunks, embeddings_function)
+        StoredDocument with chunks and embeddings
     """
-    # Initialize embeddings with explicit model kwargs to avoid tensor issues
-    embeddings = HuggingFaceEmbeddings(
-        model_name=DEFAULT_EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
+    # Short texts get finer chunks from the store itself (document_chunking),
+    # under the same key as RAG, so they are embedded once
+    document = get_document_store().get(text, chunk_size, chunk_overlap, force_recreate=force_recreate)
+    logger.debug("Document has %s text chunks for classification", len(document.chunks))
+    return document
+
+
+@dataclass
+class ThemeAnalysis:
+    """
+    Result of clustering one document, reusable for classification and distribution.
     
-    # Clean the text
-    cleaned_text = clean_text(text)
-    text_length = len(cleaned_text)
-    
-    # Adjust chunk size for very short texts
-    # For texts shorter than default chunk size, use smaller chunks to get more granularity
-    if text_length < chunk_size:
-        # Use 1/3 of text length or minimum 50 characters
-        adjusted_chunk_size = max(50, text_length // 3)
-        adjusted_chunk_overlap = max(10, adjusted_chunk_size // 5)
-        print(f"📏 Short text detected ({text_length} chars). Adjusting chunk size: {adjusted_chunk_size} (overlap: {adjusted_chunk_overlap})")
-    else:
-        adjusted_chunk_size = chunk_size
-        adjusted_chunk_overlap = chunk_overlap
-    
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=adjusted_chunk_size,
-        chunk_overlap=adjusted_chunk_overlap
-    )
-    chunks = text_splitter.split_text(cleaned_text)
-    print(f"📄 Created {len(chunks)} text chunks for classification")
-    
-    # Check if vectorstore exists
-    if os.path.exists(persist_dir) and not force_recreate:
-        print("🔄 Loading existing Chroma vectorstore for classification...")
-        vectordb = Chroma(
-            persist_directory=persist_dir,
-            embedding_function=embeddings
-        )
-    else:
-        print("🛠 Creating new Chroma vectorstore for classification...")
-        if os.path.exists(persist_dir):
-            shutil.rmtree(persist_dir)
-        
-        vectordb = Chroma.from_texts(
-            texts=chunks,
-            embedding=embeddings,
-            persist_directory=persist_dir
-        )
+    Theme IDs are 1-based, as in classification responses. Descriptions are
+    kept per labelling (model, description mode and label store use), since
+    each of them may label the same clusters differently.
+    """
+    content_hash: str
+    requested_themes: Optional[int]
+    total_chunks: int
+    labels: np.ndarray
+    centroids: np.ndarray
+    representatives: Dict[int, int]
+    representative_texts: Dict[int, str]
+    algorithm: str
+    selection: str
+    fit_seconds: float
+    labellings: Dict[str, Tuple[Dict[int, str], List[int]]] = field(default_factory=dict)
+    latest_labelling: Optional[str] = None
+    cache_key: Optional[str] = None
+    
+    @property
+    def num_themes(self) -> int:
+        return len(self.representatives)
+    
+    def distribution(self) -> Dict[int, int]:
+        """Number of chunks assigned to each theme."""
+        unique, counts = np.unique(self.labels, return_counts=True)
+        return {int(label) + 1: int(count) for label, count in zip(unique, counts)}
+    
+    def percentages(self) -> Dict[int, float]:
+        return {
+            theme_id: round((count / self.total_chunks) * 100, 2)
+            for theme_id, count in self.distribution().items()
+        }
+    
+    def theme_chunks(self) -> Dict[int, str]:
+        """Representative chunk of each theme, keyed by 0-based cluster ID."""
+        return {theme_id - 1: text for theme_id, text in self.representative_texts.items()}
+    
+    def theme_centroids(self) -> Dict[int, np.ndarray]:
+        """Centroid of each theme, keyed by 0-based cluster ID."""
+        return {theme_id - 1: self.centroids[theme_id - 1] for theme_id in self.representatives}
+    
+    def labelling(self, key: Optional[str] = None) -> Tuple[Dict[int, str], List[int]]:
+        """Descriptions and label-store theme IDs of a labelling (the latest one by default)."""
+        key = self.latest_labelling if key is None else key
+        return self.labellings.get(key, ({}, []))
+    
+    def set_labelling(self, key: str, descriptions: Dict[int, str], from_label_cache: List[int]):
+        self.labellings[key] = (descriptions, from_label_cache)
+        self.latest_labelling = key
+    
+    def themes(
+        self,
+        descriptions: Optional[Dict[int, str]] = None,
+        from_label_cache: Optional[List[int]] = None
+    ) -> List[dict]:
+        """Themes with representative text, description (if labelled) and share of chunks."""
+        latest_descriptions, latest_from_label_cache = self.labelling()
+        descriptions = latest_descriptions if descriptions is None else descriptions
+        from_label_cache = latest_from_label_cache if from_label_cache is None else from_label_cache
+        distribution = self.distribution()
+        percentages = self.percentages()
+        themes = []
+        for theme_id, text in sorted(self.representative_texts.items()):
+            themes.append({
+                "theme_id": theme_id,
+                "description": descriptions.get(theme_id),
+                "representative_text": text[:200] + "..." if len(text) > 200 else text,
+                "from_label_cache": theme_id in from_label_cache,
+                "chunk_count": distribution.get(theme_id, 0),
+                "percentage": percentages.get(theme_id, 0.0)
+            })
+        return themes
+    
+    def to_dict(self) -> dict:
+        """JSON-serializable form of the analysis."""
+        return {
+            "content_hash": self.content_hash,
+            "requested_themes": self.requested_themes,
+            "total_chunks": self.total_chunks,
+            "labels": self.labels.tolist(),
+            "centroids": self.centroids.tolist(),
+            "representatives": {str(k): v for k, v in self.representatives.items()},
+            "representative_texts": {str(k): v for k, v in self.representative_texts.items()},
+            "algorithm": self.algorithm,
+            "selection": self.selection,
+            "fit_seconds": self.fit_seconds,
+            "labellings": {
+                key: {"descriptions": {str(k): v for k, v in descriptions.items()}, "from_label_cache": list(cached)}
+                for key, (descriptions, cached) in self.labellings.items()
+            },
+            "latest_labelling": self.latest_labelling,
+            "cache_key": self.cache_key
+        }
     
-    print("✅ Chroma vectorstore ready for classification")
-    return vectordb, chunks, embeddings
+    @classmethod
+    def from_dict(cls, data: dict) -> "ThemeAnalysis":
+        return cls(
+            content_hash=data["content_hash"],
+            requested_themes=data["requested_themes"],
+            total_chunks=data["total_chunks"],
+            labels=np.asarray(data["labels"], dtype=np.int32),
+            centroids=np.asarray(data["centroids"], dtype=np.float32),
+            representatives={int(k): v for k, v in data["representatives"].items()},
+            representative_texts={int(k): v for k, v in data["representative_texts"].items()},
+            algorithm=data["algorithm"],
+            selection=data["selection"],
+            fit_seconds=data["fit_seconds"],
+            labellings={
+                key: ({int(k): v for k, v in value["descriptions"].items()}, list(value["from_label_cache"]))
+                for key, value in data.get("labellings", {}).items()
+            },
+            latest_labelling=data.get("latest_labelling"),
+            cache_key=data.get("cache_key")
+        )
 
 
-def detect_themes(
-    vectordb: any,
-    chunks: List[str],
-    embeddings_function: any,
-    num_themes: int = DEFAULT_NUM_THEMES
-) -> Dict[int, str]:
+_analysis_cache = LRUCache(DEFAULT_ANALYSIS_CACHE_SIZE)
+
+
+def fit_themes(document: StoredDocument, num_themes: Optional[int] = DEFAULT_NUM_THEMES) -> ThemeAnalysis:
     """
-    Detect themes using K-means clustering on chunk embeddings.
+    Cluster the chunk embeddings of a stored document into themes.
     
     Args:
-        vectordb: Chroma vectorstore
-        chunks: List of text chunks
-        embeddings_function: Embeddings function
-        num_themes: Number of themes to detect
+        document: Chunks and embeddings from the document store
+        num_themes: Number of themes to detect, or None to select it automatically
         
     Returns:
-        Dictionary mapping theme IDs to representative chunks
+        ThemeAnalysis with labels, centroids, representatives and distribution
     """
-    # Adjust num_themes if we have fewer chunks than requested themes
-    actual_num_themes = min(num_themes, len(chunks))
-    
-    if actual_num_themes < num_themes:
-        print(f"⚠️ Warning: Only {len(chunks)} chunks available. Reducing themes from {num_themes} to {actual_num_themes}")
-    
-    print(f"🔍 Detecting {actual_num_themes} themes using K-means clustering...")
-    
-    # Extract embeddings for all chunks
-    embeddings = np.array([
-        embeddings_function.embed_query(chunk) for chunk in chunks
-    ])
+    chunks = document.chunks
+    if num_themes is not None and num_themes > len(chunks):
+        logger.warning("Only %s chunks available. Reducing themes from %s to %s", len(chunks), num_themes, len(chunks))
     
     # Apply K-means clustering
-    kmeans = KMeans(n_clusters=actual_num_themes, random_state=42)
-    labels = kmeans.fit_predict(embeddings)
+    logger.debug("Detecting %s themes using K-means clustering...", num_themes if num_themes is not None else 'auto')
+    result = cluster_embeddings(document.embeddings, num_clusters=num_themes)
+    logger.debug("%s fitted %s clusters in %.2fs", result.algorithm, result.num_clusters, result.fit_seconds)
+    
+    # Choose the chunk closest to each cluster centroid
+    representatives = {
+        cluster_id + 1: index
+        for cluster_id, index in representative_indices(document.embeddings, result.labels, result.centroids).items()
+    }
+    logger.debug("Detected %s themes", len(representatives))
+    
+    return ThemeAnalysis(
+        content_hash=document.content_hash,
+        requested_themes=num_themes,
+        total_chunks=len(chunks),
+        labels=np.asarray(result.labels),
+        centroids=np.asarray(result.centroids, dtype=np.float32),
+        representatives=representatives,
+        representative_texts={theme_id: chunks[index] for theme_id, index in representatives.items()},
+        algorithm=result.algorithm,
+        selection=result.selection,
+        fit_seconds=result.fit_seconds
+    )
+
+
+def analyze_document(
+    text_content: str,
+    num_themes: Optional[int] = DEFAULT_NUM_THEMES,
+    force_recreate: bool = False
+) -> Tuple[ThemeAnalysis, bool]:
+    """
+    Return the theme analysis of a document, fitting it only once per document.
     
-    # Find representative chunks for each cluster
-    theme_chunks = {}
-    for i in range(actual_num_themes):
-        cluster_indices = np.where(labels == i)[0]
+    Args:
+        text_content: The text content to analyze
+        num_themes: Number of themes to detect, or None to select it automatically
+        force_recreate: Re-embed and re-fit even if an analysis is cached
         
-        if len(cluster_indices) > 0:
-            # Choose the chunk closest to the cluster centroid
-            cluster_embeddings = embeddings[cluster_indices]
-            centroid = kmeans.cluster_centers_[i]
-            distances = np.linalg.norm(cluster_embeddings - centroid, axis=1)
-            representative_idx = cluster_indices[np.argmin(distances)]
-            theme_chunks[i] = chunks[representative_idx]
-    
-    print(f"✅ Detected {len(theme_chunks)} themes")
-    return theme_chunks
+    Returns:
+        Tuple of (analysis, cached) where cached tells whether it was reused
+    """
+    document = load_document_for_classification(text_content, force_recreate=force_recreate)
+    key = f"{document.content_hash}-{document.chunk_size}-{document.chunk_overlap}-{num_themes}-{EMBEDDING_BACKEND}"
+    
+    if not force_recreate:
+        analysis = _analysis_cache.get(key) or _read_analysis(key)
+        if analysis is not None:
+            logger.debug("Reusing theme analysis of document %s", document.content_hash[:12])
+            _analysis_cache.put(key, analysis)
+            return analysis, True
+    
+    analysis = fit_themes(document, num_themes)
+    analysis.cache_key = key
+    _analysis_cache.put(key, analysis)
+    save_analysis(analysis)
+    return analysis, False
+
+
+def _analysis_path(key: str) -> str:
+    # Next to the document store, so clearing the store also drops the analyses
+    return os.path.join(get_document_store().directory, "analyses", f"{key}.json")
+
+
+def _read_analysis(key: str) -> Optional[ThemeAnalysis]:
+    path = _analysis_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return ThemeAnalysis.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable theme analysis %s: %s", path, e)
+        return None
+
+
+def save_analysis(analysis: ThemeAnalysis):
+    """Persist an analysis (with its labellings) so it survives restarts."""
+    if analysis.cache_key is None:
+        return
+    path = _analysis_path(analysis.cache_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(analysis.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def clear_analysis_cache():
+    _analysis_cache.clear()
 
 
 def call_mistral_api(
@@ -160,7 +325,8 @@ def call_mistral_api(
     model: str = "mistral-small",
     max_tokens: int = 100,
     temperature: float = 0.1,
-    timeout: int = 60
+    timeout: int = 60,
+    json_mode: bool = False
 ) -> str:
     """
     Call Mistral API for text generation.
@@ -173,6 +339,7 @@ def call_mistral_api(
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature
         timeout: Request timeout in seconds
+        json_mode: Ask the API to return a JSON object
         
     Returns:
         Generated text response
@@ -189,37 +356,148 @@ def call_mistral_api(
         "max_tokens": max_tokens,
         "temperature": temperature
     }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
     
+    start = time.perf_counter()
     try:
-        resp = requests.post(
-            f"{api_endpoint}/v1/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=timeout
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        with span("llm", model=model, max_tokens=max_tokens):
+            def send() -> dict:
+                resp = requests.post(
+                    f"{api_endpoint}/v1/chat/completions",
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout
+                )
+                resp.raise_for_status()
+                return resp.json()
+            
+            # Concurrency cap, rate limits and retries on 429/5xx (modules/llm_scheduler.py)
+            data = call_with_limits(
+                model,
+                send,
+                estimate_tokens(prompt_text, max_tokens),
+                usage=lambda d: (d.get("usage") or {}).get("total_tokens")
+            )
+            usage = data.get("usage") or {}
+            set_attributes(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"))
         
         if "choices" in data and len(data["choices"]) > 0:
+            record_llm_call(
+                model,
+                time.perf_counter() - start,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens")
+            )
             return data["choices"][0]["message"]["content"].strip()
         else:
             raise ValueError(f"Unexpected response from Mistral API: {data}")
             
+    except LLMUnavailableError:
+        record_llm_call(model, time.perf_counter() - start, status="error")
+        raise
     except requests.exceptions.HTTPError as e:
-        if resp.status_code == 401:
+        record_llm_call(model, time.perf_counter() - start, status="error")
+        if e.response is not None and e.response.status_code == 401:
             raise RuntimeError("Authentication error: Invalid API key")
-        elif resp.status_code == 404:
+        elif e.response is not None and e.response.status_code == 404:
             raise RuntimeError(f"Model '{model}' not found or not available")
         raise RuntimeError(f"HTTP error calling Mistral API: {str(e)}")
     except requests.exceptions.RequestException as e:
+        record_llm_call(model, time.perf_counter() - start, status="error")
         raise RuntimeError(f"Network error calling Mistral API: {str(e)}")
 
 
-def generate_theme_descriptions(
+def describe_theme(
+    theme_id: int,
+    chunk: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small"
+) -> Tuple[int, str, str]:
+    """
+    Generate the description of a single theme, falling back to an error label.
+    
+    Returns:
+        Tuple (theme_id, description, representative_chunk) with a 1-based theme id
+    """
+    prompt = PromptTemplate(
+        template=THEME_PROMPT_TEMPLATE,
+        input_variables=["text"]
+    )
+    start = time.time()
+    
+    try:
+        description = call_mistral_api(
+            prompt.format(text=chunk),
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model,
+            max_tokens=50,
+            temperature=0.1
+        )
+        logger.debug("Theme %s generated in %.2fs", theme_id + 1, time.time() - start)
+        return (theme_id + 1, description, chunk)
+    except Exception as e:
+        logger.error("Failed to generate description for theme %s: %s", theme_id + 1, e)
+        return (theme_id + 1, f"[Error: {str(e)}]", chunk)
+
+
+def generate_batched_theme_labels(
     theme_chunks: Dict[int, str],
     api_endpoint: str,
     api_key: str,
     model: str = "mistral-small"
+) -> Dict[int, str]:
+    """
+    Label every theme in a single LLM call returning a JSON list.
+    
+    Args:
+        theme_chunks: Dictionary of theme IDs to representative chunks
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        
+    Returns:
+        Dictionary of theme IDs to labels, for the labels the call returned
+    """
+    theme_ids = list(theme_chunks.keys())
+    prompt = PromptTemplate(
+        template=BATCHED_THEME_PROMPT_TEMPLATE,
+        input_variables=["count", "texts"]
+    )
+    texts = "\n\n".join(
+        f"--- TEXTE {position + 1} ---\n{theme_chunks[theme_id]}"
+        for position, theme_id in enumerate(theme_ids)
+    )
+    start = time.time()
+    
+    response = call_mistral_api(
+        prompt.format(count=len(theme_ids), texts=texts),
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        model=model,
+        max_tokens=30 * len(theme_ids) + 20,
+        temperature=0.1,
+        json_mode=True
+    )
+    labels = json.loads(response).get("themes", [])
+    logger.info("%s themes generated in one call in %.2fs", len(theme_ids), time.time() - start)
+    
+    return {
+        theme_id: str(label).strip()
+        for theme_id, label in zip(theme_ids, labels)
+        if label and str(label).strip()
+    }
+
+
+def generate_theme_descriptions(
+    theme_chunks: Dict[int, str],
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    description_mode: str = DESCRIPTION_MODE_CONCURRENT,
+    max_concurrency: int = DEFAULT_DESCRIPTION_CONCURRENCY
 ) -> List[Tuple[int, str, str]]:
     """
     Generate thematic descriptions using LLM.
@@ -229,56 +507,124 @@ def generate_theme_descriptions(
         api_endpoint: Mistral API endpoint
         api_key: Mistral API key
         model: Model name to use
+        description_mode: "concurrent" (one call per theme, run in parallel) or
+            "batched" (a single call for all themes)
+        max_concurrency: Maximum number of LLM calls in flight
         
     Returns:
         List of tuples (theme_id, description, representative_chunk)
     """
-    prompt_template = """
-Tu es un expert en analyse de texte.
-À partir du texte suivant, identifie la thématique principale (3 mots maximum) pour tout le fichier.
-
---- TEXTE ---
-{text}
-
---- THÉMATIQUE ---
-"""
+    if not theme_chunks:
+        return []
     
-    prompt = PromptTemplate(
-        template=prompt_template,
-        input_variables=["text"]
-    )
+    pending = dict(theme_chunks)
+    themes = {}
     
-    themes = []
-    for theme_id, chunk in theme_chunks.items():
-        input_prompt = prompt.format(text=chunk)
-        start = time.time()
-        
+    if description_mode == DESCRIPTION_MODE_BATCHED:
         try:
-            description = call_mistral_api(
-                input_prompt,
+            labels = generate_batched_theme_labels(
+                theme_chunks,
                 api_endpoint=api_endpoint,
                 api_key=api_key,
-                model=model,
-                max_tokens=50,
-                temperature=0.1
+                model=model
             )
-            print(f"🔎 Theme {theme_id + 1} generated in {time.time() - start:.2f}s")
-            themes.append((theme_id + 1, description, chunk))
         except Exception as e:
-            print(f"❌ Failed to generate description for theme {theme_id + 1}: {e}")
-            themes.append((theme_id + 1, f"[Error: {str(e)}]", chunk))
+            logger.warning("Batched theme generation failed, falling back to per-theme calls: %s", e)
+            labels = {}
+        for theme_id, label in labels.items():
+            themes[theme_id] = (theme_id + 1, label, pending.pop(theme_id))
+        if pending:
+            logger.warning("%s theme(s) missing from batched response, generating individually", len(pending))
+    
+    # Per-theme calls (all themes in concurrent mode, fallbacks in batched mode)
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(pending)))) as executor:
+            futures = {
+                theme_id: executor.submit(bind_context(describe_theme), theme_id, chunk, api_endpoint, api_key, model)
+                for theme_id, chunk in pending.items()
+            }
+            for theme_id, future in futures.items():
+                themes[theme_id] = future.result()
+    
+    return [themes[theme_id] for theme_id in theme_chunks]
+
+
+def label_themes(
+    theme_chunks: Dict[int, str],
+    centroids: Dict[int, np.ndarray],
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    description_mode: str = DESCRIPTION_MODE_CONCURRENT,
+    use_label_cache: bool = True
+) -> Tuple[List[Tuple[int, str, str]], set]:
+    """
+    Label themes, reusing stored labels of clusters with a similar centroid.
+    
+    Only themes without a stored label within the similarity threshold are sent
+    to the LLM; their new labels are then added to the store.
     
-    return themes
+    Args:
+        theme_chunks: Dictionary of theme IDs to representative chunks
+        centroids: Dictionary of theme IDs to cluster centroids
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        description_mode: "concurrent" or "batched" theme labelling
+        use_label_cache: Look up and store labels in the theme label store
+        
+    Returns:
+        Tuple of (list of (theme_id, description, representative_chunk),
+        set of 1-based theme ids whose label came from the store)
+    """
+    if not use_label_cache:
+        themes = generate_theme_descriptions(
+            theme_chunks,
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model,
+            description_mode=description_mode
+        )
+        return themes, set()
+    
+    store = get_label_store()
+    labelled = {}
+    pending = {}
+    for theme_id, chunk in theme_chunks.items():
+        match = store.lookup(centroids[theme_id])
+        if match:
+            labelled[theme_id] = (theme_id + 1, match["label"], chunk)
+        else:
+            pending[theme_id] = chunk
+    logger.info("%s/%s theme labels reused from the label store", len(labelled), len(theme_chunks))
+    
+    for theme_id, description, chunk in generate_theme_descriptions(
+        pending,
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        model=model,
+        description_mode=description_mode
+    ):
+        labelled[theme_id - 1] = (theme_id, description, chunk)
+        if not description.startswith("[Error"):
+            store.add(centroids[theme_id - 1], description, example_text=chunk)
+    store.save()
+    
+    themes = [labelled[theme_id] for theme_id in theme_chunks]
+    cached_ids = {theme_id + 1 for theme_id in theme_chunks if theme_id not in pending}
+    return themes, cached_ids
 
 
+@span("classification_processor.classify_document")
 def classify_document(
     text_content: str,
     api_endpoint: str,
     api_key: str,
     model: str = "mistral-small",
-    num_themes: int = DEFAULT_NUM_THEMES,
-    persist_dir: str = DEFAULT_PERSIST_DIR,
-    force_recreate: bool = False
+    num_themes: Optional[int] = DEFAULT_NUM_THEMES,
+    force_recreate: bool = False,
+    description_mode: str = DESCRIPTION_MODE_CONCURRENT,
+    use_label_cache: bool = True
 ) -> dict:
     """
     Classify a document into thematic categories.
@@ -288,105 +634,126 @@ def classify_document(
         api_endpoint: Mistral API endpoint
         api_key: Mistral API key
         model: Model name to use
-        num_themes: Number of themes to detect
-        persist_dir: Directory to persist vectorstore
-        force_recreate: Force recreate vectorstore
+        num_themes: Number of themes to detect, or None to select it automatically
+        force_recreate: Re-embed the text even if it is already stored
+        description_mode: "concurrent" or "batched" theme labelling
+        use_label_cache: Reuse stored labels of themes with a similar centroid
         
     Returns:
         Dictionary with themes and metadata
     """
     start_time = time.time()
     
-    # Initialize vectorstore
-    vectordb, chunks, embeddings_function = initialize_vectorstore_for_classification(
-        text_content,
-        persist_dir=persist_dir,
-        force_recreate=force_recreate
-    )
+    # Cluster the document (reused if this document was already analyzed)
+    analysis, cached = analyze_document(text_content, num_themes, force_recreate=force_recreate)
+    
+    # Generate descriptions once per analysis and labelling, reusing stored labels of known themes
+    labelling_key = f"{model}-{description_mode}-{'labels' if use_label_cache else 'no-labels'}"
+    descriptions, from_label_cache = analysis.labelling(labelling_key)
+    if not descriptions:
+        logger.debug("Generating theme descriptions...")
+        themes, cached_ids = label_themes(
+            analysis.theme_chunks(),
+            analysis.theme_centroids(),
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model,
+            description_mode=description_mode,
+            use_label_cache=use_label_cache
+        )
+        descriptions = {theme_id: description for theme_id, description, _ in themes}
+        from_label_cache = sorted(cached_ids)
+        # Failed descriptions are not kept, so the next call retries them
+        if not any(d.startswith("[Error") for d in descriptions.values()):
+            analysis.set_labelling(labelling_key, descriptions, from_label_cache)
+            save_analysis(analysis)
     
-    # Detect themes
-    theme_chunks = detect_themes(
-        vectordb,
-        chunks,
-        embeddings_function,
-        num_themes=num_themes
-    )
+    processing_time = time.time() - start_time
+    logger.info("Classification completed in %.2fs", processing_time)
+    
+    return {
+        "themes": analysis.themes(descriptions, from_label_cache),
+        "total_themes": analysis.num_themes,
+        "total_chunks": analysis.total_chunks,
+        "processing_time_seconds": round(processing_time, 2),
+        "label_cache_hits": len(from_label_cache),
+        "from_analysis_cache": cached
+    }
+
+
+@span("classification_processor.label_mailbox_themes")
+def label_mailbox_themes(
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    description_mode: str = DESCRIPTION_MODE_CONCURRENT
+) -> Dict[int, str]:
+    """
+    Label the themes of the mailbox topic model that have no label yet.
+    
+    Each theme is labelled from its most central document, reusing the theme
+    label store when a similar centroid is known.
     
-    # Generate descriptions
-    print("📝 Generating theme descriptions...")
-    themes = generate_theme_descriptions(
+    Returns:
+        Dictionary mapping theme IDs to labels
+    """
+    topic_model = get_topic_model()
+    labelled = topic_model.distribution()["themes"]
+    representatives = topic_model.representative_documents()
+    
+    theme_chunks = {
+        theme["theme_id"]: topic_model.document_preview(representatives[theme["theme_id"]])
+        for theme in labelled
+        if theme["label"] is None and theme["theme_id"] in representatives
+    }
+    if not theme_chunks:
+        return {}
+    
+    centroids = {theme_id: topic_model.theme_centroid(theme_id) for theme_id in theme_chunks}
+    themes, _ = label_themes(
         theme_chunks,
+        centroids,
         api_endpoint=api_endpoint,
         api_key=api_key,
-        model=model
+        model=model,
+        description_mode=description_mode
     )
-    
-    processing_time = time.time() - start_time
-    print(f"✅ Classification completed in {processing_time:.2f}s")
-    
-    # Format results
-    theme_list = []
-    for theme_id, description, chunk in themes:
-        theme_list.append({
-            "theme_id": theme_id,
-            "description": description,
-            "representative_text": chunk[:200] + "..." if len(chunk) > 200 else chunk
-        })
-    
-    return {
-        "themes": theme_list,
-        "total_themes": len(theme_list),
-        "total_chunks": len(chunks),
-        "processing_time_seconds": round(processing_time, 2)
+    labels = {
+        theme_id - 1: description
+        for theme_id, description, _ in themes
+        if not description.startswith("[Error")
     }
+    topic_model.set_theme_labels(labels)
+    return labels
 
 
+@span("classification_processor.get_theme_distribution")
 def get_theme_distribution(
     text_content: str,
-    num_themes: int = DEFAULT_NUM_THEMES,
-    persist_dir: str = DEFAULT_PERSIST_DIR
+    num_themes: Optional[int] = DEFAULT_NUM_THEMES
 ) -> dict:
     """
     Get the distribution of chunks across themes without LLM descriptions.
     
+    Uses the same cached analysis as `classify_document`, so a document that
+    was already classified is not clustered again.
+    
     Args:
         text_content: The text content to analyze
-        num_themes: Number of themes to detect
-        persist_dir: Directory to persist vectorstore
+        num_themes: Number of themes to detect, or None to select it automatically
         
     Returns:
-        Dictionary with theme distribution statistics
+        Dictionary with theme distribution statistics and themes
     """
-    # Initialize vectorstore
-    vectordb, chunks, embeddings_function = initialize_vectorstore_for_classification(
-        text_content,
-        persist_dir=persist_dir,
-        force_recreate=False
-    )
-    
-    # Adjust num_themes if we have fewer chunks
-    actual_num_themes = min(num_themes, len(chunks))
-    
-    # Extract embeddings
-    embeddings = np.array([
-        embeddings_function.embed_query(chunk) for chunk in chunks
-    ])
-    
-    # Apply K-means
-    kmeans = KMeans(n_clusters=actual_num_themes, random_state=42)
-    labels = kmeans.fit_predict(embeddings)
-    
-    # Calculate distribution
-    unique, counts = np.unique(labels, return_counts=True)
-    distribution = dict(zip(unique.tolist(), counts.tolist()))
+    analysis, cached = analyze_document(text_content, num_themes)
     
     return {
-        "total_chunks": len(chunks),
+        "total_chunks": analysis.total_chunks,
         "requested_themes": num_themes,
-        "actual_themes": actual_num_themes,
-        "distribution": distribution,
-        "theme_percentages": {
-            theme_id: round((count / len(chunks)) * 100, 2)
-            for theme_id, count in distribution.items()
-        }
+        "actual_themes": analysis.num_themes,
+        "distribution": analysis.distribution(),
+        "theme_percentages": analysis.percentages(),
+        "themes": analysis.themes(),
+        "algorithm": analysis.algorithm,
+        "from_analysis_cache": cached
     }
@@ -0,0 +1,202 @@
+"""
+Clustering Module
+K-means clustering of embedding matrices for theme detection, switching to
+MiniBatchKMeans for large inputs and selecting the number of clusters automatically
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from modules.metrics import observe_stage, STAGE_KMEANS
+from modules.logging_config import get_logger
+
+logger = get_logger("classification.clustering")
+
+# scikit-learn is imported inside the functions using it, on first clustering
+
+# Default configuration
+DEFAULT_RANDOM_STATE = 42
+DEFAULT_MINIBATCH_THRESHOLD = 2000  # samples above which MiniBatchKMeans is used
+DEFAULT_MINIBATCH_SIZE = 1024
+DEFAULT_MIN_CLUSTERS = 2
+DEFAULT_MAX_CLUSTERS = 15
+DEFAULT_SELECTION_SAMPLE_SIZE = 1000  # samples used to score candidate k values
+
+SELECTION_SILHOUETTE = "silhouette"
+SELECTION_ELBOW = "elbow"
+
+
+@dataclass
+class ClusteringResult:
+    """Outcome of clustering an embedding matrix."""
+    labels: np.ndarray
+    centroids: np.ndarray
+    num_clusters: int
+    algorithm: str
+    selection: str  # "requested", "silhouette" or "elbow"
+    fit_seconds: float
+
+
+def make_kmeans(
+    num_clusters: int,
+    num_samples: int,
+    minibatch_threshold: int = DEFAULT_MINIBATCH_THRESHOLD,
+    random_state: int = DEFAULT_RANDOM_STATE
+):
+    """Return a KMeans estimator, or MiniBatchKMeans beyond the size threshold."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    # n_init is left to scikit-learn, as in the original KMeans(n_clusters, random_state=42)
+    # calls, so small documents get the same clusters as before
+    if num_samples > minibatch_threshold:
+        return MiniBatchKMeans(
+            n_clusters=num_clusters,
+            batch_size=DEFAULT_MINIBATCH_SIZE,
+            random_state=random_state
+        )
+    return KMeans(n_clusters=num_clusters, random_state=random_state)
+
+
+def _sample(embeddings: np.ndarray, sample_size: int, random_state: int) -> np.ndarray:
+    if len(embeddings) <= sample_size:
+        return embeddings
+    rng = np.random.default_rng(random_state)
+    return embeddings[rng.choice(len(embeddings), size=sample_size, replace=False)]
+
+
+def _elbow_index(inertias: list) -> int:
+    """Index of the point farthest from the line joining the first and last inertia."""
+    if len(inertias) <= 2:
+        return 0
+    points = np.column_stack([np.arange(len(inertias)), np.asarray(inertias, dtype=float)])
+    start, end = points[0], points[-1]
+    direction = (end - start) / np.linalg.norm(end - start)
+    offsets = points - start
+    distances = np.abs(offsets[:, 0] * direction[1] - offsets[:, 1] * direction[0])
+    return int(np.argmax(distances))
+
+
+def select_num_clusters(
+    embeddings: np.ndarray,
+    min_clusters: int = DEFAULT_MIN_CLUSTERS,
+    max_clusters: int = DEFAULT_MAX_CLUSTERS,
+    method: str = SELECTION_SILHOUETTE,
+    sample_size: int = DEFAULT_SELECTION_SAMPLE_SIZE,
+    random_state: int = DEFAULT_RANDOM_STATE
+) -> int:
+    """
+    Pick the number of clusters on a sampled subset of the embeddings.
+
+    Args:
+        embeddings: Embedding matrix (n_samples, dim)
+        min_clusters: Smallest k considered
+        max_clusters: Largest k considered
+        method: "silhouette" (highest mean silhouette) or "elbow" (inertia knee)
+        sample_size: Maximum number of samples used for scoring
+        random_state: Seed for sampling and K-means
+
+    Returns:
+        Selected number of clusters
+    """
+    from sklearn.metrics import silhouette_score
+
+    sample = _sample(embeddings, sample_size, random_state)
+    # Silhouette needs 2 <= k <= n_samples - 1
+    upper = min(max_clusters, len(sample) - 1)
+    if upper < min_clusters:
+        return max(1, min(min_clusters, len(embeddings)))
+
+    candidates = list(range(min_clusters, upper + 1))
+    scores = []
+    for k in candidates:
+        model = make_kmeans(k, len(sample), random_state=random_state)
+        labels = model.fit_predict(sample)
+        if method == SELECTION_ELBOW:
+            scores.append(model.inertia_)
+        elif len(set(labels)) < 2:
+            scores.append(-1.0)
+        else:
+            scores.append(silhouette_score(sample, labels))
+
+    if method == SELECTION_ELBOW:
+        return candidates[_elbow_index(scores)]
+    return candidates[int(np.argmax(scores))]
+
+
+@observe_stage(STAGE_KMEANS)
+def cluster_embeddings(
+    embeddings: np.ndarray,
+    num_clusters: Optional[int] = None,
+    min_clusters: int = DEFAULT_MIN_CLUSTERS,
+    max_clusters: int = DEFAULT_MAX_CLUSTERS,
+    selection: str = SELECTION_SILHOUETTE,
+    minibatch_threshold: int = DEFAULT_MINIBATCH_THRESHOLD,
+    random_state: int = DEFAULT_RANDOM_STATE
+) -> ClusteringResult:
+    """
+    Cluster an embedding matrix with K-means.
+
+    Args:
+        embeddings: Embedding matrix (n_samples, dim), computed once per document
+        num_clusters: Number of clusters, or None to select it automatically
+        min_clusters: Smallest k considered for automatic selection
+        max_clusters: Largest k considered for automatic selection
+        selection: "silhouette" or "elbow" for automatic selection
+        minibatch_threshold: Sample count above which MiniBatchKMeans is used
+        random_state: Seed for K-means
+
+    Returns:
+        ClusteringResult with labels, centroids and the k used
+    """
+    start = time.time()
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    num_samples = len(embeddings)
+    if num_samples == 0:
+        raise ValueError("Cannot cluster an empty embedding matrix")
+
+    if num_clusters is None:
+        num_clusters = select_num_clusters(
+            embeddings,
+            min_clusters=min_clusters,
+            max_clusters=max_clusters,
+            method=selection,
+            random_state=random_state
+        )
+        logger.info("Selected %s clusters automatically (%s)", num_clusters, selection)
+    else:
+        selection = "requested"
+    num_clusters = max(1, min(num_clusters, num_samples))
+
+    model = make_kmeans(num_clusters, num_samples, minibatch_threshold, random_state)
+    labels = model.fit_predict(embeddings)
+
+    return ClusteringResult(
+        labels=labels,
+        centroids=model.cluster_centers_,
+        num_clusters=num_clusters,
+        algorithm=type(model).__name__,
+        selection=selection,
+        fit_seconds=round(time.time() - start, 4)
+    )
+
+
+def representative_indices(embeddings: np.ndarray, labels: np.ndarray, centroids: np.ndarray) -> dict:
+    """
+    Return, for each non-empty cluster, the index of the sample closest to its centroid.
+
+    Args:
+        embeddings: Embedding matrix (n_samples, dim)
+        labels: Cluster label of each sample
+        centroids: Cluster centroids (n_clusters, dim)
+
+    Returns:
+        Dictionary mapping cluster IDs to sample indices
+    """
+    representatives = {}
+    for i in range(len(centroids)):
+        cluster_indices = np.where(labels == i)[0]
+        if len(cluster_indices) > 0:
+            distances = np.linalg.norm(embeddings[cluster_indices] - centroids[i], axis=1)
+            representatives[i] = int(cluster_indices[np.argmin(distances)])
+    return representatives
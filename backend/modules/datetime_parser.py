@@ -0,0 +1,291 @@
+"""
+Date/Time Pre-Parser Module
+Deterministic extraction of French and English meeting dates, times and durations
+("demain à 14h", "next Tuesday 3pm", "de 10h à 11h30"), used to answer calendar
+analysis without the LLM when the text is unambiguous
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+PREPARSE_NO_MEETING = "no_meeting"
+PREPARSE_EXPLICIT = "explicit"
+PREPARSE_SUGGESTION = "suggestion"
+PREPARSE_AMBIGUOUS = "ambiguous"
+
+_MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "janv": 1, "feb": 2, "fev": 2, "fevr": 2, "mar": 3, "apr": 4, "avr": 4, "jun": 6,
+    "jul": 7, "juil": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
+}
+_WEEKDAYS = {
+    "lundi": 0, "mardi": 1, "mercredi": 2, "jeudi": 3, "vendredi": 4, "samedi": 5, "dimanche": 6,
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6
+}
+
+# Words that name a meeting
+_MEETING_WORDS = (
+    r"reunion|rendez-vous|rdv|meeting|visio|visioconference|call|appel|entretien|rencontre|"
+    r"conference|teams|zoom|google meet|meet|catch[- ]up|sync|point d'equipe|seance|"
+    r"(?:se|nous|vous|te|me) (?:voir|voit|voyons|voyez|retrouver|retrouve|retrouvons|retrouvez)|"
+    r"get together|meet up"
+)
+# Words that ask to find a time
+_SCHEDULING_WORDS = (
+    r"planifier|organiser|fixer|caler|programmer|disponible|disponibilites|dispo|creneau|creneaux|"
+    r"schedule|set up|arrange|available|availability|slot|when works|quand"
+)
+
+# Words that cancel or move a meeting: the text is not a request to book the time it names
+_CANCELLATION_WORDS = (
+    r"annul\w*|report\w*|reprogramm\w*|deplac\w*|decal\w*|aura pas lieu|"
+    r"cancel\w*|call(?:ed)? off|postpon\w*|reschedul\w*|mov(?:e|ed|es|ing)|push(?:ed)? back"
+)
+
+# Relative periods: a temporal cue, but not a date the pre-parser can resolve
+_PERIOD_WORDS = (
+    r"semaine prochaine|cette semaine|fin de semaine|debut de semaine|mois prochain|ce mois-ci|"
+    r"ce matin|cet apres-midi|(?:demain|lundi|mardi|mercredi|jeudi|vendredi) (?:matin|apres-midi|soir)|"
+    r"week-end|weekend|next week|this week|next month|this month|this morning|this afternoon|"
+    r"(?:tomorrow|monday|tuesday|wednesday|thursday|friday) (?:morning|afternoon|evening)|end of the week"
+)
+
+_MONTH_RE = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_WEEKDAY_RE = "|".join(_WEEKDAYS)
+_CLOCK = r"(\d{1,2})(?:\s*(?:h|:)\s*(\d{2})|\s*h)?\s*(am|pm|a\.m\.|p\.m\.)?"
+_TIME_H = r"(\d{1,2})\s*h\s*(\d{2})?(?![a-z])"  # 14h, 14h30, 14 h 30
+_TIME_COLON = r"(\d{1,2}):(\d{2})(?:\s*(am|pm|a\.m\.|p\.m\.))?"
+_TIME_AMPM = r"(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)"
+
+_PATTERNS = {
+    "range": re.compile(
+        rf"\b(?:de|entre|from|between)\s+{_CLOCK}\s+(?:a|et|to|and|until|-)\s+{_CLOCK}"
+    ),
+    "duration_hm": re.compile(
+        r"\b(?:pendant|duree(?:\s+de)?|durant|during|for|lasting|d'une duree de)\s+"
+        r"(\d{1,2})\s*(?:h|heures?|hours?|hrs?)\s*(\d{1,2})?(?:\s*(?:min(?:utes)?|mn))?"
+    ),
+    "duration_min": re.compile(r"\b(\d{1,3})\s*-?\s*(?:minutes?|mins?|mn)\b"),
+    "duration_words": re.compile(
+        r"\b(une demi-heure|half an hour|une heure et demie|an hour and a half|"
+        r"d'une heure|une heure|an hour|one hour|1 hour)\b"
+    ),
+    "iso_date": re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b"),
+    "numeric_date": re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b"),
+    "day_month": re.compile(rf"\b(\d{{1,2}})(?:er|st|nd|rd|th)?\s+({_MONTH_RE})\.?(?:\s+(\d{{4}}))?\b"),
+    "month_day": re.compile(rf"\b({_MONTH_RE})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b"),
+    "relative": re.compile(
+        r"\b(apres-demain|apres demain|day after tomorrow|aujourd'hui|today|ce soir|tonight|demain|tomorrow)\b"
+    ),
+    "weekday": re.compile(rf"\b(?:(next|this|ce|cette)\s+)?({_WEEKDAY_RE})(?:\s+(prochain|next))?\b"),
+    "time_colon": re.compile(rf"\b{_TIME_COLON}"),
+    "time_ampm": re.compile(rf"\b{_TIME_AMPM}"),
+    "time_h": re.compile(rf"\b{_TIME_H}"),
+    "time_heures": re.compile(r"\b(?:a|at|vers)\s+(\d{1,2})\s*heures?\b"),
+    "time_words": re.compile(r"\b(midi|noon)\b"),
+    "meeting": re.compile(rf"\b(?:{_MEETING_WORDS})\b"),
+    "scheduling": re.compile(rf"\b(?:{_SCHEDULING_WORDS})\b"),
+    "cancellation": re.compile(rf"\b(?:{_CANCELLATION_WORDS})\b"),
+    "period": re.compile(rf"\b(?:{_PERIOD_WORDS})\b"),
+}
+
+
+@dataclass
+class PreparseResult:
+    """Outcome of the deterministic pre-parse of an email."""
+    status: str
+    dates: List[date] = field(default_factory=list)
+    times: List[Tuple[int, int]] = field(default_factory=list)
+    duration_minutes: Optional[int] = None
+    proposals: List[dict] = field(default_factory=list)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and unify apostrophes and dashes."""
+    text = text.replace("’", "'").replace("–", "-").replace("—", "-")
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _to_24h(hour: int, minute: int, meridiem: Optional[str]) -> Optional[Tuple[int, int]]:
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+    if 0 <= hour <= 23 and 0 <= minute <= 59:
+        return hour, minute
+    return None
+
+
+def _resolve_date(year: Optional[int], month: int, day: int, today: date) -> Optional[date]:
+    """Build a date; without a year, the next occurrence from today."""
+    try:
+        if year is not None:
+            return date(year + 2000 if year < 100 else year, month, day)
+        candidate = date(today.year, month, day)
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+class _Scanner:
+    """Collects matches, never letting two matches claim the same characters."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._taken = []
+
+    def find(self, name: str):
+        for match in _PATTERNS[name].finditer(self.text):
+            start, end = match.span()
+            if any(start < taken_end and end > taken_start for taken_start, taken_end in self._taken):
+                continue
+            self._taken.append((start, end))
+            yield match
+
+
+def _clock(groups: tuple) -> Optional[Tuple[int, int]]:
+    hour, minute, meridiem = groups
+    return _to_24h(int(hour), int(minute or 0), meridiem)
+
+
+def extract_datetimes(text: str, today: date) -> PreparseResult:
+    """
+    Extract dates, times and a duration from an email.
+
+    Args:
+        text: Email text
+        today: Reference date for relative expressions
+
+    Returns:
+        PreparseResult with the distinct dates and times found (status left empty)
+    """
+    normalized = normalize_text(text)
+    scanner = _Scanner(normalized)
+    dates, times, durations = [], [], []
+
+    # Ranges and durations first, so "de 10h à 11h" or "pendant 1h30" are not read as start times
+    for match in scanner.find("range"):
+        start, end = _clock(match.groups()[:3]), _clock(match.groups()[3:])
+        if start and end:
+            minutes = (end[0] * 60 + end[1]) - (start[0] * 60 + start[1])
+            if minutes > 0:
+                times.append(start)
+                durations.append(minutes)
+    for match in scanner.find("duration_hm"):
+        durations.append(int(match.group(1)) * 60 + int(match.group(2) or 0))
+    for match in scanner.find("duration_min"):
+        durations.append(int(match.group(1)))
+    for match in scanner.find("duration_words"):
+        words = match.group(1)
+        durations.append(30 if "demi-heure" in words or "half an" in words else 90 if "demie" in words or "a half" in words else 60)
+
+    for match in scanner.find("iso_date"):
+        dates.append(_resolve_date(int(match.group(1)), int(match.group(2)), int(match.group(3)), today))
+    for match in scanner.find("numeric_date"):
+        first, second = int(match.group(1)), int(match.group(2))
+        year = int(match.group(3)) if match.group(3) else None
+        # Day first (French usage) unless only month-first is valid
+        day, month = (second, first) if first <= 12 < second else (first, second)
+        dates.append(_resolve_date(year, month, day, today))
+    for match in scanner.find("day_month"):
+        dates.append(_resolve_date(int(match.group(3)) if match.group(3) else None, _MONTHS[match.group(2)], int(match.group(1)), today))
+    for match in scanner.find("month_day"):
+        dates.append(_resolve_date(int(match.group(3)) if match.group(3) else None, _MONTHS[match.group(1)], int(match.group(2)), today))
+    for match in scanner.find("relative"):
+        word = match.group(1)
+        offset = 2 if "apres" in word or "after" in word else 1 if word in ("demain", "tomorrow") else 0
+        dates.append(today + timedelta(days=offset))
+    for match in scanner.find("weekday"):
+        days_ahead = (_WEEKDAYS[match.group(2)] - today.weekday()) % 7 or 7
+        dates.append(today + timedelta(days=days_ahead))
+
+    for match in scanner.find("time_colon"):
+        times.append(_to_24h(int(match.group(1)), int(match.group(2)), match.group(3)))
+    for match in scanner.find("time_ampm"):
+        times.append(_to_24h(int(match.group(1)), 0, match.group(2)))
+    for match in scanner.find("time_h"):
+        times.append(_to_24h(int(match.group(1)), int(match.group(2) or 0), None))
+    for match in scanner.find("time_heures"):
+        times.append(_to_24h(int(match.group(1)), 0, None))
+    for match in scanner.find("time_words"):
+        times.append((12, 0))
+
+    return PreparseResult(
+        status="",
+        dates=sorted({d for d in dates if d is not None}),
+        times=sorted({t for t in times if t is not None}),
+        duration_minutes=durations[0] if len(set(durations)) == 1 else None
+    )
+
+
+def _meeting_summary(text: str) -> str:
+    """First sentence mentioning the meeting, used as the event summary."""
+    for sentence in re.split(r"(?<=[.!?\n])\s+", text.strip()):
+        if _PATTERNS["meeting"].search(normalize_text(sentence)):
+            sentence = " ".join(sentence.split())
+            return sentence if len(sentence) <= 80 else sentence[:77] + "..."
+    return "Réunion"
+
+
+def preparse_schedule(text: str, now: Optional[datetime] = None) -> PreparseResult:
+    """
+    Classify an email for calendar analysis without the LLM.
+
+    - "no_meeting": no meeting or scheduling word and no date, time or
+      relative period ("semaine prochaine", "next week")
+    - "explicit": a meeting with exactly one date, one start time and one
+      duration, and no cancellation or rescheduling words; the proposal is
+      resolved directly
+    - "suggestion": a request to find a time, with no date, time or period at all
+    - "ambiguous": anything else, left to the LLM
+
+    Args:
+        text: Email text
+        now: Reference local time (defaults to now)
+
+    Returns:
+        PreparseResult with its status and, for "explicit", the proposal in the
+        format returned by the LLM prompt
+    """
+    now = now or datetime.now()
+    result = extract_datetimes(text, now.date())
+    normalized = normalize_text(text)
+    has_meeting = _PATTERNS["meeting"].search(normalized) is not None
+    has_scheduling = _PATTERNS["scheduling"].search(normalized) is not None
+    has_datetime = bool(result.dates or result.times or result.duration_minutes)
+    has_period = _PATTERNS["period"].search(normalized) is not None
+    has_cancellation = _PATTERNS["cancellation"].search(normalized) is not None
+
+    if not has_meeting and not has_scheduling and not has_datetime and not has_period:
+        result.status = PREPARSE_NO_MEETING
+    elif (
+        has_meeting
+        and not has_cancellation
+        and len(result.dates) == 1
+        and len(result.times) == 1
+        and result.duration_minutes is not None
+    ):
+        (hour, minute), day = result.times[0], result.dates[0]
+        if datetime(day.year, day.month, day.day, hour, minute) <= now:
+            result.status = PREPARSE_AMBIGUOUS
+            return result
+        result.status = PREPARSE_EXPLICIT
+        result.proposals = [{
+            "date": day.strftime('%Y-%m-%d'),
+            "heure": f"{hour:02d}:{minute:02d}",
+            "duree_minutes": result.duration_minutes,
+            "summary": _meeting_summary(text),
+            "type": "visio"
+        }]
+    elif has_meeting and has_scheduling and not has_datetime and not has_period and not has_cancellation:
+        result.status = PREPARSE_SUGGESTION
+    else:
+        result.status = PREPARSE_AMBIGUOUS
+    return result
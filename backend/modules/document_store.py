@@ -0,0 +1,229 @@
+"""
+Document Store Module
+Content-addressed store of document chunks and their embeddings, shared by RAG
+retrieval, theme classification and the mailbox topic model so that a document
+is chunked and embedded only once
+"""
+
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from modules.chunking import LRUCache, chunk_text, text_hash
+from modules.embeddings import get_embeddings, EMBEDDING_BACKEND
+from modules.metrics import observe_stage, STAGE_EMBEDDING, STAGE_VECTOR_SEARCH
+from modules.logging_config import get_logger
+
+logger = get_logger("documents")
+
+# Default configuration
+DEFAULT_DOCUMENT_STORE_DIR = "document_store"
+DEFAULT_CHUNK_SIZE = 600
+DEFAULT_CHUNK_OVERLAP = 100
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_SHORT_TEXT_MIN_CHUNK_SIZE = 50
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def document_chunking(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> Tuple[int, int]:
+    """
+    Return the chunking parameters a text is stored under.
+
+    A text that fits in a single chunk is split into chunks of a third of its
+    length (at least 50 characters), so that classification has several chunks
+    to cluster. The rule is applied by the store itself, so RAG, classification
+    and the topic model share one entry (and one embedding pass) per text.
+    """
+    chunks = chunk_text(text, chunk_size, chunk_overlap)
+    if len(chunks) == 1 and len(chunks[0]) < chunk_size:
+        chunk_size = max(DEFAULT_SHORT_TEXT_MIN_CHUNK_SIZE, len(chunks[0]) // 3)
+        chunk_overlap = max(10, chunk_size // 5)
+    return chunk_size, chunk_overlap
+
+
+@dataclass
+class StoredDocument:
+    """Chunks of a document and their L2-normalized embeddings (one row per chunk)."""
+    content_hash: str
+    chunk_size: int
+    chunk_overlap: int
+    chunks: List[str]
+    embeddings: np.ndarray
+
+    def top_k(self, query_embedding, top_k: int) -> List[int]:
+        """Indices of the top_k chunks most similar to the query, best first."""
+        if not self.chunks or top_k <= 0:
+            return []
+        similarities = self.embeddings @ _unit_rows(np.asarray(query_embedding, dtype=np.float32))
+        top_k = min(top_k, len(self.chunks))
+        candidates = np.argpartition(-similarities, top_k - 1)[:top_k]
+        return [int(i) for i in candidates[np.argsort(-similarities[candidates])]]
+
+    def mean_embedding(self) -> Optional[np.ndarray]:
+        """Normalized mean chunk embedding, used as the document vector."""
+        if not self.chunks:
+            return None
+        return _unit_rows(self.embeddings.mean(axis=0))
+
+
+class DocumentStore:
+    """
+    Chunks and embeddings keyed by content hash and chunking parameters.
+
+    Entries are kept in an in-memory LRU and persisted as one .npz file per
+    entry, so the same text sent to /rag/ask, /classification/themes or the
+    mailbox topic model is embedded once, even across restarts.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DOCUMENT_STORE_DIR, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.directory = directory
+        self._memory = LRUCache(max_entries)
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.computed = 0
+
+    @staticmethod
+    def _key(content_hash: str, chunk_size: int, chunk_overlap: int) -> str:
+        # The backend is part of the key: vectors of different backends are not interchangeable
+        return f"{content_hash}-{chunk_size}-{chunk_overlap}-{EMBEDDING_BACKEND}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read(self, key: str, content_hash: str, chunk_size: int, chunk_overlap: int) -> Optional[StoredDocument]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return StoredDocument(
+                content_hash=content_hash,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                chunks=data["chunks"].tolist(),
+                embeddings=data["embeddings"]
+            )
+
+    def _write(self, key: str, document: StoredDocument):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.tmp.npz"
+        np.savez(tmp_path, chunks=np.array(document.chunks), embeddings=document.embeddings)
+        os.replace(tmp_path, self._path(key))
+
+    def get(
+        self,
+        text: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        force_recreate: bool = False
+    ) -> StoredDocument:
+        """
+        Return the chunks and embeddings of a text, computing them only on first use.
+
+        Args:
+            text: Document text
+            chunk_size: Size of text chunks (smaller for short texts, see document_chunking)
+            chunk_overlap: Overlap between chunks
+            force_recreate: Re-chunk and re-embed even if the document is stored
+
+        Returns:
+            StoredDocument for the text
+        """
+        chunk_size, chunk_overlap = document_chunking(text, chunk_size, chunk_overlap)
+        content_hash = text_hash(text)
+        key = self._key(content_hash, chunk_size, chunk_overlap)
+
+        with self._key_lock(key):
+            if not force_recreate:
+                document = self._memory.get(key)
+                if document is not None:
+                    return document
+                document = self._read(key, content_hash, chunk_size, chunk_overlap)
+                if document is not None:
+                    self.disk_hits += 1
+                    self._memory.put(key, document)
+                    return document
+
+            chunks = chunk_text(text, chunk_size, chunk_overlap)
+            if chunks:
+                with observe_stage(STAGE_EMBEDDING):
+                    vectors = np.array(get_embeddings().embed_documents(chunks), dtype=np.float32)
+                vectors = _unit_rows(vectors)
+            else:
+                vectors = np.zeros((0, 0), dtype=np.float32)
+            document = StoredDocument(
+                content_hash=content_hash,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                chunks=chunks,
+                embeddings=vectors
+            )
+            self.computed += 1
+            logger.debug("Embedded %s chunks for document %s", len(chunks), content_hash[:12])
+            if chunks:
+                self._write(key, document)
+            self._memory.put(key, document)
+            return document
+
+    def search(self, document: StoredDocument, query: str, top_k: int) -> List[str]:
+        """Return the top_k chunks of a stored document most similar to the query."""
+        if not document.chunks:
+            return []
+        with observe_stage(STAGE_EMBEDDING):
+            query_embedding = get_embeddings().embed_query(query)
+        with observe_stage(STAGE_VECTOR_SEARCH):
+            indices = document.top_k(query_embedding, top_k)
+        return [document.chunks[i] for i in indices]
+
+    def clear(self) -> bool:
+        """
+        Drop every stored document from memory and disk.
+
+        Returns:
+            True if the store directory existed and was deleted
+        """
+        with self._lock:
+            self._memory.clear()
+            self._key_locks.clear()
+            self.disk_hits = 0
+            self.computed = 0
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+            return True
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self._memory.hits,
+            "disk_hits": self.disk_hits,
+            "computed": self.computed
+        }
+
+
+_store: Optional[DocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Return the process-wide document store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
@@ -0,0 +1,215 @@
+"""
+Embedding Backend Module
+Provides the sentence embedding model shared by the RAG and classification processors,
+with optional int8-quantized PyTorch and ONNX Runtime CPU backends
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from modules.logging_config import get_logger
+
+logger = get_logger("embeddings")
+
+# Default configuration
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MAX_SEQ_LENGTH = 256
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_ONNX_DIR = os.path.join("onnx_models", "all-MiniLM-L6-v2")
+
+# Backends: "torch" (full precision), "torch-int8" (dynamic int8 quantization),
+# "onnx" (ONNX Runtime fp32) and "onnx-int8" (ONNX Runtime, int8 weights)
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))  # 0 = library default
+EMBEDDING_ONNX_DIR = os.environ.get("EMBEDDING_ONNX_DIR", DEFAULT_ONNX_DIR)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class TorchInt8Embeddings(Embeddings):
+    """SentenceTransformer with Linear layers dynamically quantized to int8."""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, num_threads: int = EMBEDDING_THREADS):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        model = SentenceTransformer(model_name, device="cpu")
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=DEFAULT_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OnnxEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 running on ONNX Runtime (mean pooling + L2 normalization)."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        onnx_dir: str = EMBEDDING_ONNX_DIR,
+        quantized: bool = False,
+        num_threads: int = EMBEDDING_THREADS
+    ):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("ONNX embedding backend requires onnxruntime (install: onnxruntime)")
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model_path = ensure_onnx_model(model_name, onnx_dir, quantized=quantized)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=DEFAULT_MAX_SEQ_LENGTH,
+            return_tensors="np"
+        )
+        inputs = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names and name in encoded
+        }
+        token_embeddings = self.session.run(None, inputs)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _normalize(pooled)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        batches = [
+            self._embed_batch(texts[i:i + DEFAULT_BATCH_SIZE])
+            for i in range(0, len(texts), DEFAULT_BATCH_SIZE)
+        ]
+        return np.vstack(batches).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+_export_lock = threading.Lock()
+
+
+def ensure_onnx_model(model_name: str, onnx_dir: str, quantized: bool = False) -> str:
+    """
+    Return the path of the ONNX export of model_name, exporting it on first use.
+
+    Args:
+        model_name: Hugging Face model name
+        onnx_dir: Directory holding model.onnx (and model-int8.onnx)
+        quantized: Return the int8 dynamically quantized export
+
+    Returns:
+        Path to the .onnx file
+    """
+    fp32_path = os.path.join(onnx_dir, "model.onnx")
+    int8_path = os.path.join(onnx_dir, "model-int8.onnx")
+
+    with _export_lock:
+        if not os.path.exists(fp32_path):
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+
+            logger.info("Exporting %s to ONNX (%s)...", model_name, fp32_path)
+            os.makedirs(onnx_dir, exist_ok=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModel.from_pretrained(model_name).eval()
+            sample = tokenizer(["export sample"], return_tensors="pt")
+            input_names = ["input_ids", "attention_mask", "token_type_ids"]
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    tuple(sample[name] for name in input_names),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14
+                )
+
+        if quantized and not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info("Quantizing ONNX model to int8 (%s)...", int8_path)
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    return int8_path if quantized else fp32_path
+
+
+def create_embeddings(
+    backend: str,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    num_threads: int = EMBEDDING_THREADS
+) -> Embeddings:
+    """
+    Build a new embedding model for the given backend.
+
+    Args:
+        backend: One of EMBEDDING_BACKENDS
+        model_name: Hugging Face model name
+        num_threads: CPU threads for inference (0 = library default)
+
+    Returns:
+        LangChain-compatible embeddings object
+    """
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if num_threads > 0:
+            import torch
+            torch.set_num_threads(num_threads)
+        # Explicit model kwargs to avoid tensor issues
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    if backend == "torch-int8":
+        return TorchInt8Embeddings(model_name, num_threads=num_threads)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(model_name, quantized=backend == "onnx-int8", num_threads=num_threads)
+    raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """Return the shared embedding model for the configured backend, loaded once per process."""
+    backend = backend or EMBEDDING_BACKEND
+    logger.info("Loading embedding model (%s backend)...", backend)
+    return create_embeddings(backend)
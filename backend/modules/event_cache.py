@@ -0,0 +1,217 @@
+"""
+Calendar Event Cache Module
+In-memory copy of the Google Calendar events of a rolling window, kept fresh with
+incremental (updatedMin) syncs so availability and conflict checks are answered from memory
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from modules.calendar_service import get_calendar_service
+from modules.logging_config import get_logger
+
+logger = get_logger("calendar.cache")
+
+# Default configuration
+DEFAULT_CALENDAR_ID = 'primary'
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_WINDOW_SLACK = timedelta(days=1)  # loaded beyond the window, so rolling (now, now + 7d) queries stay inside
+DEFAULT_CACHE_TTL_SECONDS = int(os.environ.get("CALENDAR_CACHE_TTL_SECONDS", "60"))
+DEFAULT_FULL_RESYNC_SECONDS = 3600  # full reload, catches events moved out of the window
+SYNC_CLOCK_SKEW = timedelta(minutes=1)
+
+
+def parse_event_datetime(dt_str: str):
+    """Convertit une date/heure Google Calendar en datetime aware UTC"""
+    dt = datetime.fromisoformat(dt_str)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    else:
+        dt = dt.astimezone(timezone.utc)
+    return dt
+
+
+def event_bounds(event: dict) -> Tuple[datetime, datetime]:
+    """Start and end of a Google Calendar event as aware UTC datetimes."""
+    start = parse_event_datetime(event['start'].get('dateTime', event['start'].get('date')))
+    end = parse_event_datetime(event['end'].get('dateTime', event['end'].get('date')))
+    return start, end
+
+
+class CalendarEventCache:
+    """
+    Events of one calendar over a rolling window.
+
+    The window is loaded once, then refreshed at most every `ttl_seconds` by
+    asking only for events updated since the last sync (cancelled events are
+    dropped). The window is loaded with some slack past `window_days`, so the
+    usual (now, now + window_days) queries are served from memory as time
+    advances; requests outside the loaded window trigger a full reload.
+    Events inserted by this API are added directly with `upsert`.
+    """
+
+    def __init__(
+        self,
+        calendar_id: str = DEFAULT_CALENDAR_ID,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+        ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        full_resync_seconds: int = DEFAULT_FULL_RESYNC_SECONDS,
+        window_slack: timedelta = DEFAULT_WINDOW_SLACK
+    ):
+        self.calendar_id = calendar_id
+        self.window_days = window_days
+        self.window_slack = window_slack
+        self.ttl_seconds = ttl_seconds
+        self.full_resync_seconds = full_resync_seconds
+        self._lock = threading.RLock()
+        self._events: Dict[str, dict] = {}
+        self._bounds: Dict[str, Tuple[datetime, datetime]] = {}
+        self._window: Optional[Tuple[datetime, datetime]] = None
+        self._synced_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._full_synced_at = 0.0
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.hits = 0
+
+    # ---------------- syncing ----------------
+    def _list(self, **params) -> List[dict]:
+        """Fetch every page of an events().list query."""
+        service = get_calendar_service()
+        items, page_token = [], None
+        while True:
+            response = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                pageToken=page_token,
+                **params
+            ).execute()
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items
+
+    def _store(self, event: dict):
+        event_id = event.get('id')
+        if event_id is None:
+            return
+        if event.get('status') == 'cancelled':
+            self._events.pop(event_id, None)
+            self._bounds.pop(event_id, None)
+            return
+        try:
+            self._bounds[event_id] = event_bounds(event)
+        except (KeyError, ValueError):
+            return
+        self._events[event_id] = event
+
+    def _full_sync(self, start: datetime, end: datetime):
+        synced_at = datetime.now(timezone.utc)
+        events = self._list(timeMin=start.isoformat(), timeMax=end.isoformat(), orderBy='startTime')
+        self._events, self._bounds = {}, {}
+        for event in events:
+            self._store(event)
+        self._window = (start, end)
+        self._synced_at = synced_at
+        self._checked_at = self._full_synced_at = time.monotonic()
+        self.full_syncs += 1
+        logger.info("Loaded %s calendar events (%s → %s)", len(self._events), f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}")
+
+    def _incremental_sync(self):
+        synced_at = datetime.now(timezone.utc)
+        start, end = self._window
+        changes = self._list(
+            timeMin=start.isoformat(),
+            timeMax=(end + timedelta(days=self.window_days)).isoformat(),
+            updatedMin=(self._synced_at - SYNC_CLOCK_SKEW).isoformat(),
+            showDeleted=True
+        )
+        for event in changes:
+            self._store(event)
+        self._synced_at = synced_at
+        self._checked_at = time.monotonic()
+        self.incremental_syncs += 1
+        if changes:
+            logger.info("Synced %s changed calendar events", len(changes))
+
+    def _ensure_fresh(self, time_min: datetime, time_max: datetime):
+        now = datetime.now(timezone.utc)
+        elapsed = time.monotonic()
+        if (
+            self._window is None
+            or time_min < self._window[0]
+            or time_max > self._window[1]
+            or elapsed - self._full_synced_at > self.full_resync_seconds
+        ):
+            start = min(time_min, now)
+            end = max(time_max, now + timedelta(days=self.window_days)) + self.window_slack
+            self._full_sync(start, end)
+        elif elapsed - self._checked_at > self.ttl_seconds:
+            self._incremental_sync()
+        else:
+            self.hits += 1
+
+    # ---------------- queries ----------------
+    def get_events(self, time_min: datetime, time_max: datetime) -> List[dict]:
+        """
+        Return the events overlapping [time_min, time_max), ordered by start time.
+
+        Args:
+            time_min: Aware start of the range
+            time_max: Aware end of the range
+
+        Returns:
+            List of Google Calendar event resources
+        """
+        return [event for event, _, _ in self.get_event_intervals(time_min, time_max)]
+
+    def get_event_intervals(self, time_min: datetime, time_max: datetime) -> List[Tuple[dict, datetime, datetime]]:
+        """Like `get_events`, with the parsed (start, end) of each event."""
+        with self._lock:
+            self._ensure_fresh(time_min, time_max)
+            overlapping = [
+                (self._events[event_id], start, end)
+                for event_id, (start, end) in self._bounds.items()
+                if start < time_max and end > time_min
+            ]
+        return sorted(overlapping, key=lambda item: item[1])
+
+    def upsert(self, event: dict):
+        """Add or replace an event created or updated through this API."""
+        with self._lock:
+            self._store(event)
+
+    def invalidate(self):
+        """Drop the cached window; the next query reloads it."""
+        with self._lock:
+            self._events, self._bounds = {}, {}
+            self._window = None
+            self._synced_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "events": len(self._events),
+                "window_start": self._window[0].isoformat() if self._window else None,
+                "window_end": self._window[1].isoformat() if self._window else None,
+                "last_sync": self._synced_at.isoformat() if self._synced_at else None,
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "hits": self.hits
+            }
+
+
+_cache: Optional[CalendarEventCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_event_cache() -> CalendarEventCache:
+    """Return the process-wide event cache of the primary calendar."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CalendarEventCache()
+        return _cache
@@ -1,69 +1,113 @@
 import os
 import json
+import time
 from dotenv import load_dotenv
 from openai import OpenAI, APIError
+from modules.metrics import record_llm_call
+from modules.llm_scheduler import call_with_limits, estimate_tokens, LLMUnavailableError
+from modules.tracing import span, set_attributes
+from modules.logging_config import get_logger
+
+logger = get_logger("llm")
 
 # Charger le .env
 dotenv_path = os.path.join(os.path.dirname(__file__), '../config/.env')
 load_dotenv(dotenv_path)
 
-# Vérifie que les clés sont bien chargées
-print("NVIDIA_API_KEY_LLAMA3_8B:", os.getenv("NVIDIA_API_KEY_LLAMA3_8B"))
-print("NVIDIA_API_KEY_LLAMA3_70B:", os.getenv("NVIDIA_API_KEY_LLAMA3_70B"))
+# Vérifie que les clés sont bien chargées (sans jamais afficher leur valeur)
+for key_name in ("NVIDIA_API_KEY_LLAMA3_8B", "NVIDIA_API_KEY_LLAMA3_70B"):
+    logger.info("%s: %s", key_name, "configured" if os.getenv(key_name) else "missing")
 
 clients = {}
 
+# Point the NVIDIA clients elsewhere (e.g. the benchmark mock server) with NVIDIA_API_BASE_URL
+NVIDIA_API_BASE_URL = os.getenv("NVIDIA_API_BASE_URL", "https://integrate.api.nvidia.com/v1")
+
 # 1. Client NVIDIA (Llama 3 8B Instruct)
 api_key_8b = os.getenv("NVIDIA_API_KEY_LLAMA3_8B")
 MODEL_FOR_TRANSLATION = "meta/llama3-8b-instruct"
 if api_key_8b:
     clients[MODEL_FOR_TRANSLATION] = OpenAI(
-        base_url="https://integrate.api.nvidia.com/v1",
-        api_key=api_key_8b
+        base_url=NVIDIA_API_BASE_URL,
+        api_key=api_key_8b,
+        max_retries=0  # retried with backoff by modules/llm_scheduler.py
     )
-    print(f"INFO: Client NVIDIA initialisé pour '{MODEL_FOR_TRANSLATION}'.")
+    logger.info("Client NVIDIA initialisé pour '%s'.", MODEL_FOR_TRANSLATION)
 else:
-    print(f"AVERTISSEMENT: Clé API non trouvée pour Llama 3 8B (variable: NVIDIA_API_KEY_LLAMA3_8B).")
+    logger.warning("Clé API non trouvée pour Llama 3 8B (variable: NVIDIA_API_KEY_LLAMA3_8B).")
 
 # 2. Client NVIDIA (Llama 3 70B Instruct)
 MODEL_FOR_SEMANTICS = "meta/llama3-8b-instruct"
 api_key_semantics = os.getenv("NVIDIA_API_KEY_LLAMA3_8B")
-clients[MODEL_FOR_SEMANTICS] = OpenAI(
-    base_url="https://integrate.api.nvidia.com/v1",
-    api_key=api_key_semantics
-)
+if api_key_semantics:
+    clients[MODEL_FOR_SEMANTICS] = OpenAI(
+        base_url=NVIDIA_API_BASE_URL,
+        api_key=api_key_semantics,
+        max_retries=0
+    )
 # 3. Client Local (Llama 3)
 local_base_url = os.getenv("LOCAL_LLAMA_API_BASE_URL")
 LOCAL_LLAMA_MODEL_NAME = os.getenv("LOCAL_LLAMA_MODEL_NAME")
 if local_base_url and LOCAL_LLAMA_MODEL_NAME:
     clients[LOCAL_LLAMA_MODEL_NAME] = OpenAI(
         base_url=local_base_url,
-        api_key="ollama"
+        api_key="ollama",
+        max_retries=0
     )
-    print(f"INFO: Client LOCAL initialisé pour '{LOCAL_LLAMA_MODEL_NAME}'.")
+    logger.info("Client LOCAL initialisé pour '%s'.", LOCAL_LLAMA_MODEL_NAME)
 
 # --- FONCTION D'APPEL PRINCIPALE ---
 def call_llm_api(prompt: str, model_name: str, temperature: float = 0.2, max_tokens: int = 1024):
+    """
+    Send a prompt to a configured model and return the completion text.
+
+    Returns None when no client is configured or the call fails for good
+    (e.g. 400/401). Raises LLMUnavailableError when the model stays
+    rate-limited or unreachable after the scheduler's last retry.
+    """
     client = clients.get(model_name)
     if not client:
-        error_message = f"Erreur: Aucun client configuré pour le modèle '{model_name}'. Vérifiez .env."
-        print(error_message)
+        logger.error("Aucun client configuré pour le modèle '%s'. Vérifiez .env.", model_name)
         return None
+    start = time.perf_counter()
     try:
-        completion = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            top_p=0.7,
-            max_tokens=max_tokens,
-            stream=False
+        with span("llm", model=model_name, max_tokens=max_tokens):
+            # Concurrency cap, rate limits and retries on 429/5xx (modules/llm_scheduler.py)
+            completion = call_with_limits(
+                model_name,
+                lambda: client.chat.completions.create(
+                    model=model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    top_p=0.7,
+                    max_tokens=max_tokens,
+                    stream=False
+                ),
+                estimate_tokens(prompt, max_tokens),
+                usage=lambda c: c.usage.total_tokens if c.usage else None
+            )
+            usage = completion.usage
+            prompt_tokens = usage.prompt_tokens if usage else None
+            completion_tokens = usage.completion_tokens if usage else None
+            set_attributes(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        record_llm_call(
+            model_name,
+            time.perf_counter() - start,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
         )
         return completion.choices[0].message.content
+    except LLMUnavailableError:
+        # Retries exhausted: the routes answer 503 with Retry-After
+        record_llm_call(model_name, time.perf_counter() - start, status="error")
+        raise
     except APIError as e:
-        print(f"Erreur API OpenAI avec le modèle '{model_name}': {e}")
+        record_llm_call(model_name, time.perf_counter() - start, status="error")
+        logger.error("Erreur API OpenAI avec le modèle '%s': %s", model_name, e)
         return None
     except Exception as e:
-        print(f"Une erreur est survenue avec le modèle '{model_name}': {e}")
+        record_llm_call(model_name, time.perf_counter() - start, status="error")
+        logger.error("Une erreur est survenue avec le modèle '%s': %s", model_name, e)
         return None
 
 # --- FONCTION UTILITAIRE ---
@@ -84,5 +128,5 @@ def extract_json_from_response(response_text: str):
         json_str = response_text[json_start:json_end]
         return json.loads(json_str)
     except Exception as e:
-        print(f"Erreur parsing JSON: {e}")
+        logger.warning("Erreur parsing JSON: %s", e)
         return {"error": "Impossible de parser le JSON", "raw_output": response_text}
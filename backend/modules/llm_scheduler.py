@@ -0,0 +1,407 @@
+"""
+LLM Scheduler Module
+Client-side scheduling of LLM calls per model: concurrency caps, token-bucket
+rate limiting (requests and tokens per minute), round-robin queueing across API
+routes, and exponential backoff with jitter on 429/5xx and network errors
+"""
+
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from modules.logging_config import get_logger
+from modules.metrics import record_llm_queue_wait, record_llm_retry
+
+logger = get_logger("llm.scheduler")
+
+# Default configuration (0 disables a rate limit)
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 0
+DEFAULT_TOKENS_PER_MINUTE = 0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5  # seconds
+DEFAULT_BACKOFF_MAX = 20.0  # seconds
+DEFAULT_QUEUE_TIMEOUT = 120.0  # seconds
+
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+CHARS_PER_TOKEN = 4  # prompt size estimate before the API reports usage
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE))
+# Per-model overrides, e.g. "meta/llama3-8b-instruct=concurrency:4,rpm:40;mistral-small=rpm:60,tpm:50000"
+LLM_MODEL_LIMITS = os.environ.get("LLM_MODEL_LIMITS", "")
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", DEFAULT_BACKOFF_BASE))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", DEFAULT_BACKOFF_MAX))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT))
+
+# Queue of the current request (its route template), set by the API middleware
+_current_flow: contextvars.ContextVar[str] = contextvars.ContextVar("llm_flow", default="default")
+
+
+class LLMUnavailableError(RuntimeError):
+    """
+    The model could not be reached: retries are exhausted or no slot freed up.
+
+    The API answers 503 with retry_after (seconds) as its Retry-After header.
+    """
+
+    def __init__(self, message: str, retry_after: float = LLM_BACKOFF_MAX):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMQueueTimeout(LLMUnavailableError):
+    """No slot for the model became available within the queue timeout."""
+
+
+def parse_model_limits(value: str) -> Dict[str, Dict[str, float]]:
+    """Parse "model=concurrency:4,rpm:40;other=tpm:50000" into {model: {"concurrency": 4, "rpm": 40}, ...}."""
+    limits = {}
+    for item in value.split(";"):
+        model, _, fields = item.partition("=")
+        if not model.strip() or not fields:
+            continue
+        entry = {}
+        for field in fields.split(","):
+            name, _, number = field.partition(":")
+            if name.strip() not in ("concurrency", "rpm", "tpm"):
+                raise ValueError(f"Unknown LLM limit '{name.strip()}' for model '{model.strip()}'. Expected: concurrency, rpm, tpm")
+            entry[name.strip()] = float(number)
+        limits[model.strip()] = entry
+    return limits
+
+
+def set_flow(flow: str) -> contextvars.Token:
+    """Set the queue LLM calls of the current request wait in (the API route); returns a reset token."""
+    return _current_flow.set(flow)
+
+
+def reset_flow(token: contextvars.Token):
+    _current_flow.reset(token)
+
+
+def estimate_tokens(prompt_text: str, max_tokens: int) -> int:
+    """Tokens reserved for a call before the API reports its usage."""
+    return len(prompt_text) // CHARS_PER_TOKEN + max_tokens
+
+
+class TokenBucket:
+    """Refills at rate_per_minute / 60 per second up to rate_per_minute (one minute of burst)."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.level = rate_per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (a request above capacity waits for a full bucket)."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        # May go negative for requests larger than the capacity; later calls wait for the refill
+        self.level -= amount
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("flow", "tokens", "granted")
+
+    def __init__(self, flow: str, tokens: int):
+        self.flow = flow
+        self.tokens = tokens
+        self.granted = False
+
+
+class ModelScheduler:
+    """
+    Admission control for one model.
+
+    Waiting calls are grouped by flow (API route) and served round-robin, so a
+    burst on one route cannot starve the others. A call is admitted when a
+    concurrency slot is free and both token buckets hold enough budget.
+    """
+
+    def __init__(self, model: str, max_concurrency: int, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.model = model
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.active = 0
+        self._paused_until = 0.0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._condition = threading.Condition()
+
+    def _head(self) -> Optional[_Waiter]:
+        """Next waiter in round-robin order (the first flow's oldest call)."""
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _admission_delay(self, waiter: _Waiter, now: float) -> Optional[float]:
+        """0 when waiter can start now, seconds to wait for a bucket or pause, None to wait for a release."""
+        if self.active >= self.max_concurrency:
+            return None
+        delay = max(0.0, self._paused_until - now)
+        if self.requests:
+            delay = max(delay, self.requests.wait_time(1, now))
+        if self.tokens:
+            delay = max(delay, self.tokens.wait_time(waiter.tokens, now))
+        return delay
+
+    def _grant(self, waiter: _Waiter):
+        queue = self._queues.pop(waiter.flow)
+        queue.popleft()
+        if queue:
+            # The flow goes to the back of the round
+            self._queues[waiter.flow] = queue
+        self.active += 1
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(waiter.tokens)
+        waiter.granted = True
+
+    def acquire(self, tokens: int, flow: Optional[str] = None, timeout: float = LLM_QUEUE_TIMEOUT) -> float:
+        """
+        Wait for a slot and reserve the token budget of a call.
+
+        Args:
+            tokens: Estimated prompt + completion tokens
+            flow: Queue to wait in (defaults to the current API route)
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            LLMQueueTimeout: If no slot became available in time
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        waiter = _Waiter(flow or _current_flow.get(), tokens)
+        with self._condition:
+            self._queues.setdefault(waiter.flow, deque()).append(waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._head() is waiter:
+                        delay = self._admission_delay(waiter, now)
+                        if delay == 0.0:
+                            self._grant(waiter)
+                            # The next head may be admissible too
+                            self._condition.notify_all()
+                            return now - start
+                    else:
+                        delay = None
+                    if now >= deadline:
+                        raise LLMQueueTimeout(f"No '{self.model}' slot available after {timeout:g}s ({self.active} calls running)")
+                    self._condition.wait(min(deadline - now, delay if delay is not None else deadline - now))
+            finally:
+                if not waiter.granted:
+                    queue = self._queues.get(waiter.flow)
+                    if queue is not None and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._queues[waiter.flow]
+                    self._condition.notify_all()
+
+    def release(self, reserved_tokens: int, used_tokens: Optional[int] = None):
+        """Free the slot and settle the token bucket with the usage reported by the API."""
+        with self._condition:
+            self.active -= 1
+            if self.tokens and used_tokens is not None:
+                difference = reserved_tokens - used_tokens
+                if difference > 0:
+                    self.tokens.give_back(difference)
+                else:
+                    self.tokens.take(-difference)
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold every waiting call of this model (the provider asked to slow down)."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int, flow: Optional[str] = None):
+        """
+        Hold a slot for the duration of a call.
+
+        Yields a dict; set its "used_tokens" to the reported usage to settle the
+        token bucket.
+        """
+        wait = self.acquire(tokens, flow)
+        record_llm_queue_wait(self.model, wait)
+        usage = {"used_tokens": None}
+        try:
+            yield usage
+        finally:
+            self.release(tokens, usage["used_tokens"])
+
+
+_schedulers: Dict[str, ModelScheduler] = {}
+_schedulers_lock = threading.Lock()
+_model_limits = parse_model_limits(LLM_MODEL_LIMITS)
+
+
+def get_scheduler(model: str) -> ModelScheduler:
+    """Return the scheduler of a model, configured from LLM_MODEL_LIMITS or the global defaults."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model)
+        if scheduler is None:
+            limits = _model_limits.get(model, {})
+            scheduler = ModelScheduler(
+                model,
+                max_concurrency=limits.get("concurrency", LLM_MAX_CONCURRENCY),
+                requests_per_minute=limits.get("rpm", LLM_REQUESTS_PER_MINUTE),
+                tokens_per_minute=limits.get("tpm", LLM_TOKENS_PER_MINUTE)
+            )
+            _schedulers[model] = scheduler
+        return scheduler
+
+
+def _response_of(error: Exception):
+    return getattr(error, "response", None)
+
+
+def status_code_of(error: Exception) -> Optional[int]:
+    """HTTP status of an openai or requests error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None and _response_of(error) is not None:
+        status = getattr(_response_of(error), "status_code", None)
+    return status
+
+
+def retry_after_of(error: Exception) -> Optional[float]:
+    """Retry-After of an error response, in seconds (numeric form only)."""
+    response = _response_of(error)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """429/5xx responses, timeouts and connection errors."""
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    names = {cls.__name__ for cls in type(error).__mro__}
+    # openai.APIConnectionError / APITimeoutError, requests ConnectionError / Timeout
+    return bool(names & {"APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout"})
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def _unavailable(model: str, error: Exception, attempt: int) -> Exception:
+    """Error to raise once no more retries are allowed: LLMUnavailableError for retryable failures."""
+    if not is_retryable(error):
+        return error
+    status = status_code_of(error)
+    return LLMUnavailableError(
+        f"LLM '{model}' unavailable after {attempt} retries ({status or type(error).__name__})",
+        retry_after=retry_after_of(error) or LLM_BACKOFF_MAX
+    )
+
+
+def _should_retry(model: str, error: Exception, attempt: int, max_retries: int) -> Optional[float]:
+    """Delay before the next attempt, or None to give up."""
+    if attempt >= max_retries or not is_retryable(error):
+        return None
+    status = status_code_of(error)
+    delay = backoff_delay(attempt, retry_after_of(error))
+    record_llm_retry(model, str(status) if status is not None else "network")
+    logger.warning(
+        "LLM call to '%s' failed (%s), retry %s/%s in %.2fs",
+        model, status or type(error).__name__, attempt + 1, max_retries, delay
+    )
+    if status == 429:
+        # Slow the whole model down, not just this call
+        get_scheduler(model).pause(delay)
+    return delay
+
+
+def call_with_limits(
+    model: str,
+    fn: Callable,
+    estimated_tokens: int,
+    usage: Optional[Callable] = None,
+    max_retries: int = LLM_MAX_RETRIES
+):
+    """
+    Run fn (one API call) under the model's limits, retrying 429/5xx with backoff.
+
+    The slot is released while backing off, so other calls can use it.
+
+    Args:
+        model: Model name (selects the scheduler)
+        fn: Performs the call; raises openai/requests errors on failure
+        estimated_tokens: Token budget reserved for the call (see estimate_tokens)
+        usage: Returns the total tokens reported in fn's result, if known
+        max_retries: Retries after the first attempt
+
+    Returns:
+        fn's result
+
+    Raises:
+        LLMUnavailableError: If a 429/5xx or network error persists after the last retry
+    """
+    scheduler = get_scheduler(model)
+    attempt = 0
+    while True:
+        with scheduler.slot(estimated_tokens) as slot:
+            try:
+                result = fn()
+            except Exception as e:
+                delay = _should_retry(model, e, attempt, max_retries)
+                if delay is None:
+                    error = _unavailable(model, e, attempt)
+                    if error is e:
+                        raise
+                    raise error from e
+            else:
+                if usage is not None:
+                    slot["used_tokens"] = usage(result)
+                return result
+        time.sleep(delay)
+        attempt += 1
+
+
+def retry_in_slot(model: str, fn: Callable, max_retries: int = LLM_MAX_RETRIES):
+    """Retry fn with backoff inside a slot the caller already holds (e.g. opening a stream)."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            delay = _should_retry(model, e, attempt, max_retries)
+            if delay is None:
+                error = _unavailable(model, e, attempt)
+                if error is e:
+                    raise
+                raise error from e
+        time.sleep(delay)
+        attempt += 1
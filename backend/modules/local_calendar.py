@@ -0,0 +1,226 @@
+"""
+Local Calendar Backend Module
+SQLite stand-in for the Google Calendar API service, mimicking the
+`events().list/insert/delete(...).execute()` call chain, for offline use,
+load tests and benchmarks (CALENDAR_BACKEND=local)
+"""
+
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+# Default configuration
+DEFAULT_LOCAL_CALENDAR_DB = "local_calendar.db"
+DEFAULT_MAX_RESULTS = 250  # Google's default page size for events().list
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    calendar_id TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    updated_ts REAL NOT NULL,
+    status TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (calendar_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_events_updated ON events (calendar_id, updated_ts);
+"""
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    """Parse an RFC 3339 date-time or a YYYY-MM-DD date as an aware UTC datetime."""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _event_timestamp(moment: dict) -> float:
+    return _parse_rfc3339(moment.get('dateTime', moment.get('date'))).timestamp()
+
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class _Request:
+    """Deferred call, executed like googleapiclient's HttpRequest."""
+
+    def __init__(self, fn, **kwargs):
+        self._fn = fn
+        self._kwargs = kwargs
+
+    def execute(self):
+        return self._fn(**self._kwargs)
+
+
+class _BatchRequest:
+    """Batch of deferred calls, executed like googleapiclient's BatchHttpRequest."""
+
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request: _Request, callback=None, request_id: Optional[str] = None):
+        request_id = request_id or str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback or self._callback))
+
+    def execute(self):
+        for request_id, request, callback in self._requests:
+            response, exception = None, None
+            try:
+                response = request.execute()
+            except Exception as e:
+                exception = e
+            if callback is not None:
+                callback(request_id, response, exception)
+
+
+class _Events:
+    def __init__(self, calendar: "LocalCalendarService"):
+        self._calendar = calendar
+
+    def list(self, **kwargs) -> _Request:
+        return _Request(self._calendar._list_events, **kwargs)
+
+    def insert(self, calendarId: str, body: dict, **kwargs) -> _Request:
+        return _Request(self._calendar._insert_event, calendar_id=calendarId, body=body)
+
+    def delete(self, calendarId: str, eventId: str, **kwargs) -> _Request:
+        return _Request(self._calendar._delete_event, calendar_id=calendarId, event_id=eventId)
+
+
+class LocalCalendarService:
+    """
+    Calendar service backed by SQLite.
+
+    Supports the events().list parameters used in this API (timeMin, timeMax,
+    updatedMin, showDeleted, orderBy, maxResults, pageToken). Recurring events
+    are not expanded: every stored event is a single event, so singleEvents is
+    accepted and ignored.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_LOCAL_CALENDAR_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def events(self) -> _Events:
+        return _Events(self)
+
+    def new_batch_http_request(self, callback=None) -> _BatchRequest:
+        return _BatchRequest(callback)
+
+    # ---------------- events ----------------
+    def _list_events(
+        self,
+        calendarId: str = 'primary',
+        timeMin: Optional[str] = None,
+        timeMax: Optional[str] = None,
+        updatedMin: Optional[str] = None,
+        showDeleted: bool = False,
+        orderBy: Optional[str] = None,
+        maxResults: int = DEFAULT_MAX_RESULTS,
+        pageToken: Optional[str] = None,
+        singleEvents: bool = False
+    ) -> dict:
+        clauses, params = ["calendar_id = ?"], [calendarId]
+        # Same overlap semantics as Google: timeMin bounds the end, timeMax the start
+        if timeMin:
+            clauses.append("end_ts > ?")
+            params.append(_parse_rfc3339(timeMin).timestamp())
+        if timeMax:
+            clauses.append("start_ts < ?")
+            params.append(_parse_rfc3339(timeMax).timestamp())
+        if updatedMin:
+            clauses.append("updated_ts >= ?")
+            params.append(_parse_rfc3339(updatedMin).timestamp())
+        if not showDeleted:
+            clauses.append("status != 'cancelled'")
+
+        order = "updated_ts" if orderBy == 'updated' else "start_ts"
+        offset = int(pageToken or 0)
+        query = (
+            f"SELECT body FROM events WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {order}, id LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params + [maxResults + 1, offset]).fetchall()
+
+        result = {
+            "kind": "calendar#events",
+            "items": [json.loads(body) for body, in rows[:maxResults]]
+        }
+        if len(rows) > maxResults:
+            result["nextPageToken"] = str(offset + maxResults)
+        return result
+
+    @staticmethod
+    def _prepare(body: dict, calendar_id: str, now: float) -> tuple:
+        """Complete an event body like the API does and build its table row."""
+        event = dict(body)
+        event_id = event.get('id') or uuid.uuid4().hex
+        event.update({
+            "kind": "calendar#event",
+            "id": event_id,
+            "status": event.get('status', 'confirmed'),
+            "created": _rfc3339(now),
+            "updated": _rfc3339(now),
+            "htmlLink": f"local://calendar/event?eid={event_id}"
+        })
+        row = (
+            event_id,
+            calendar_id,
+            _event_timestamp(event['start']),
+            _event_timestamp(event['end']),
+            now,
+            event['status'],
+            json.dumps(event, ensure_ascii=False)
+        )
+        return event, row
+
+    def _insert_event(self, calendar_id: str, body: dict) -> dict:
+        event, row = self._prepare(body, calendar_id, datetime.now(timezone.utc).timestamp())
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+        return event
+
+    def _delete_event(self, calendar_id: str, event_id: str) -> str:
+        """Mark an event as cancelled, so incremental syncs see the deletion."""
+        now = datetime.now(timezone.utc).timestamp()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM events WHERE calendar_id = ? AND id = ?",
+                (calendar_id, event_id)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Event '{event_id}' not found")
+            event = json.loads(row[0])
+            event.update({"status": "cancelled", "updated": _rfc3339(now)})
+            self._conn.execute(
+                "UPDATE events SET status = 'cancelled', updated_ts = ?, body = ? WHERE calendar_id = ? AND id = ?",
+                (now, json.dumps(event, ensure_ascii=False), calendar_id, event_id)
+            )
+            self._conn.commit()
+        return ""
+
+    # ---------------- bulk loading ----------------
+    def bulk_insert(self, events: list, calendar_id: str = 'primary') -> int:
+        """Insert many event bodies in one transaction (used to build synthetic calendars)."""
+        now = datetime.now(timezone.utc).timestamp()
+        rows = [self._prepare(body, calendar_id, now)[1] for body in events]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM events")
+            self._conn.commit()
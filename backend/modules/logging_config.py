@@ -0,0 +1,207 @@
+"""
+Logging Configuration Module
+Structured, level-controlled logging: one logger per subsystem, a queued handler
+so request threads never block on stdout, text or JSON output, per-subsystem
+levels and sampling of high-volume messages
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from modules.tracing import current_trace_id
+
+ROOT_LOGGER = "email_api"
+
+# Default configuration
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_FORMAT = "text"
+DEFAULT_QUEUE_SIZE = 10000
+
+LOG_FORMATS = ("text", "json")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", DEFAULT_LOG_LEVEL)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", DEFAULT_LOG_FORMAT)
+# Per-subsystem overrides, e.g. LOG_LEVELS="rag=DEBUG,attachment=WARNING"
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+# Fraction of INFO/DEBUG records kept per subsystem, e.g. LOG_SAMPLING="attachment=0.1"
+LOG_SAMPLING = os.environ.get("LOG_SAMPLING", "")
+
+# LogRecord attributes that are not user-supplied extras
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sample_rate", "trace_id"}
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """Parse "a=1,b.c=2" into {"a": "1", "b.c": "2"}."""
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, val = item.split("=", 1)
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of INFO and DEBUG records.
+
+    The rate comes from the record (extra={"sample_rate": 0.01}) or from the
+    subsystem (longest matching prefix in the rates). Warnings and errors are
+    always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _subsystem_rate(self, name: str) -> float:
+        subsystem = name[len(ROOT_LOGGER) + 1:]
+        while subsystem:
+            if subsystem in self.rates:
+                return self.rates[subsystem]
+            subsystem = subsystem.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            rate = self._subsystem_rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class TraceContextFilter(logging.Filter):
+    """Attach the current request trace id (read in the logging thread, before queueing)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """Console lines with extras appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = " ".join(f"{k}={v}" for k, v in vars(record).items() if k not in _RESERVED)
+        if getattr(record, "trace_id", None):
+            extras = f"{extras} trace_id={record.trace_id}".strip()
+        if not extras:
+            return line
+        # Keep a traceback below the fields
+        head, sep, tail = line.partition("\n")
+        return f"{head} {extras}{sep}{tail}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, subsystem, message, trace id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "subsystem": record.name[len(ROOT_LOGGER) + 1:] or ROOT_LOGGER,
+            "message": record.getMessage()
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records when the queue is full instead of blocking."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now; keep extras for the JSON formatter
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandler.dropped += 1
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    levels: Optional[str] = None,
+    sampling: Optional[str] = None,
+    stream=None
+):
+    """
+    Configure the API loggers once per process (later calls are ignored).
+
+    Records go through a bounded queue to a listener thread that writes them
+    to stderr, so logging never blocks a request on a console write.
+
+    Args:
+        level: Default level (LOG_LEVEL)
+        fmt: "text" or "json" (LOG_FORMAT)
+        levels: Per-subsystem levels, "rag=DEBUG,attachment=WARNING" (LOG_LEVELS)
+        sampling: Per-subsystem INFO/DEBUG sampling rates, "attachment=0.1" (LOG_SAMPLING)
+        stream: Output stream (stderr)
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        fmt = fmt or LOG_FORMAT
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{fmt}'. Expected one of: {', '.join(LOG_FORMATS)}")
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel((level or LOG_LEVEL).upper())
+        root.propagate = False
+        for subsystem, subsystem_level in _parse_mapping(LOG_LEVELS if levels is None else levels).items():
+            logging.getLogger(f"{ROOT_LOGGER}.{subsystem}").setLevel(subsystem_level.upper())
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        records = queue.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+        handler = _QueueHandler(records)
+        rates = {k: float(v) for k, v in _parse_mapping(LOG_SAMPLING if sampling is None else sampling).items()}
+        handler.addFilter(SamplingFilter(rates))
+        handler.addFilter(TraceContextFilter())
+        root.handlers = [handler]
+
+        listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _configured = True
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """
+    Return the logger of a subsystem ("rag", "rag.threads", "attachment", ...).
+
+    Levels set for a subsystem apply to its children.
+    """
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
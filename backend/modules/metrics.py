@@ -0,0 +1,159 @@
+"""
+Metrics Module
+Prometheus metrics for the API: request latency per route and per-stage timings
+inside the pipelines (language detection, translation, LLM calls with token
+counts, embedding, vector search, K-means, PDF rasterization, OCR)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from modules.tracing import span
+
+try:
+    from prometheus_client import CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    # Metrics become no-ops; /metrics reports the missing dependency
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Pipeline stages timed with observe_stage()
+STAGE_LANGUAGE_DETECTION = "language_detection"
+STAGE_TRANSLATION = "translation"
+STAGE_EMBEDDING = "embedding"
+STAGE_VECTOR_SEARCH = "vector_search"
+STAGE_KMEANS = "kmeans"
+STAGE_PDF_RASTERIZATION = "pdf_rasterization"
+STAGE_OCR = "ocr"  # one observation per OCR'd image (page or PDF block)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+if PROMETHEUS_AVAILABLE:
+    HTTP_REQUEST_SECONDS = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template (time to response headers for streams)",
+        ["method", "route", "status"],
+        buckets=REQUEST_BUCKETS
+    )
+    STAGE_SECONDS = Histogram(
+        "pipeline_stage_duration_seconds",
+        "Duration of pipeline stages",
+        ["stage", "status"],
+        buckets=STAGE_BUCKETS
+    )
+    LLM_REQUEST_SECONDS = Histogram(
+        "llm_request_duration_seconds",
+        "LLM call latency by model",
+        ["model", "status"],
+        buckets=REQUEST_BUCKETS
+    )
+    LLM_TOKENS = Counter(
+        "llm_tokens_total",
+        "Tokens reported by the LLM APIs",
+        ["model", "kind"]
+    )
+    LLM_QUEUE_WAIT_SECONDS = Histogram(
+        "llm_queue_wait_seconds",
+        "Time LLM calls waited for a concurrency slot or rate-limit budget",
+        ["model"],
+        buckets=STAGE_BUCKETS
+    )
+    LLM_RETRIES = Counter(
+        "llm_retries_total",
+        "LLM calls retried after a 429/5xx response or a network error",
+        ["model", "reason"]
+    )
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """
+    Time a pipeline stage (usable as a context manager or a decorator).
+
+    The stage is also recorded as a span of the current request trace.
+
+    Args:
+        stage: Stage name, one of the STAGE_* constants
+    """
+    start = time.perf_counter()
+    status = "ok"
+    with span(stage):
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if PROMETHEUS_AVAILABLE:
+                STAGE_SECONDS.labels(stage=stage, status=status).observe(time.perf_counter() - start)
+
+
+def record_llm_call(
+    model: str,
+    seconds: float,
+    status: str = "ok",
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None
+):
+    """
+    Record one LLM call.
+
+    Args:
+        model: Model name
+        seconds: Call duration
+        status: "ok" or "error"
+        prompt_tokens: Prompt tokens reported by the API, if any
+        completion_tokens: Completion tokens reported by the API, if any
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return
+    LLM_REQUEST_SECONDS.labels(model=model, status=status).observe(seconds)
+    if prompt_tokens:
+        LLM_TOKENS.labels(model=model, kind="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model=model, kind="completion").inc(completion_tokens)
+
+
+def record_llm_queue_wait(model: str, seconds: float):
+    """Record the time an LLM call waited in the client-side scheduler."""
+    if PROMETHEUS_AVAILABLE:
+        LLM_QUEUE_WAIT_SECONDS.labels(model=model).observe(seconds)
+
+
+def record_llm_retry(model: str, reason: str):
+    """Record one retried LLM call (reason: HTTP status or "network")."""
+    if PROMETHEUS_AVAILABLE:
+        LLM_RETRIES.labels(model=model, reason=reason).inc()
+
+
+def record_request(method: str, route: str, status_code: int, seconds: float):
+    """Record one HTTP request under its route template (e.g. /api/rag/threads/{thread_id}/ask)."""
+    if PROMETHEUS_AVAILABLE:
+        HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=str(status_code)).observe(seconds)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR so every worker
+    writes its samples there and any worker can serve the aggregate.
+
+    Returns:
+        Tuple of (payload, content type)
+
+    Raises:
+        RuntimeError: If prometheus_client is not installed
+    """
+    if not PROMETHEUS_AVAILABLE:
+        raise RuntimeError("Metrics require prometheus_client (install: prometheus-client)")
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
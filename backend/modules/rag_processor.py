@@ -4,86 +4,94 @@ Handles document vectorization, similarity search, and question answering
 """
 
 import os
-import re
-import shutil
+import json
 import time
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Iterator
 import requests
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
+from modules.metrics import record_llm_call
+from modules.llm_scheduler import call_with_limits, estimate_tokens, get_scheduler, retry_in_slot, LLMUnavailableError
+from modules.tracing import span, set_attributes
+from modules.document_store import (
+    get_document_store,
+    StoredDocument,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP
+)
+from modules.logging_config import get_logger
 
-# Default configuration
-DEFAULT_PERSIST_DIR = "chroma_db_api"
-DEFAULT_CHUNK_SIZE = 700
-DEFAULT_CHUNK_OVERLAP = 300
-DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+logger = get_logger("rag")
 
+# Correction modes: "inline" asks the QA prompt for the corrected answer
+# directly (one call), "two_pass" rewrites the raw answer in a second call
+CORRECTION_MODE_INLINE = "inline"
+CORRECTION_MODE_TWO_PASS = "two_pass"
+DEFAULT_CORRECTION_MODE = CORRECTION_MODE_INLINE
 
-def clean_text(text: str) -> str:
-    """Clean and normalize text by removing extra whitespace."""
-    return re.sub(r'\s+', ' ', text).strip()
+QA_PROMPT_TEMPLATE = """
+Tu es un assistant intelligent.
+Lis le texte suivant et réponds uniquement à la question.
+Corrige les fautes visibles et donne une réponse claire en 1 à 2 phrases maximum.
+
+--- CONTEXTE ---
+{context}
+
+--- QUESTION ---
+{question}
+
+--- RÉPONSE ---
+"""
+
+QA_INLINE_CORRECTION_PROMPT_TEMPLATE = """
+Tu es un assistant intelligent.
+Lis le texte suivant et réponds uniquement à la question, en 1 à 2 phrases maximum.
 
+--- CONTEXTE ---
+{context}
+
+--- QUESTION ---
+{question}
+
+Réponds UNIQUEMENT avec un objet JSON valide de la forme :
+{{
+  "raw_answer": "ta réponse telle que tirée du texte",
+  "answer": "la même réponse réécrite en français correct et fluide, sans changer le sens"
+}}
+"""
 
-def initialize_vectorstore(
+CORRECTION_PROMPT_TEMPLATE = """
+Réécris la réponse suivante en français correct et fluide, sans changer le sens :
+"{answer}"
+"""
+
+
+def load_document(
     text: str,
-    persist_dir: str = DEFAULT_PERSIST_DIR,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
     force_recreate: bool = False
-) -> Tuple[any, List[str]]:
+) -> StoredDocument:
     """
-    Initialize or load a Chroma vectorstore from text.
+    Load the chunks and embeddings of a text from the shared document store.
     
     Args:
         text: Text content to vectorize
-        persist_dir: Directory to persist the vectorstore
         chunk_size: Size of text chunks
         chunk_overlap: Overlap between chunks
-        force_recreate: If True, recreate the vectorstore even if it exists
+        force_recreate: If True, re-embed the text even if it is already stored
         
     Returns:
-        Tuple of (vectordb, chunks)
+        StoredDocument with chunks and embeddings
     """
-    # Initialize embeddings with explicit model kwargs to avoid tensor issues
-    embeddings = HuggingFaceEmbeddings(
-        model_name=DEFAULT_EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
-    
-    # Clean the text
-    cleaned_text = clean_text(text)
-    
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
-    chunks = text_splitter.split_text(cleaned_text)
-    print(f"📄 Created {len(chunks)} text chunks")
-    
-    # Check if vectorstore exists
-    if os.path.exists(persist_dir) and not force_recreate:
-        print("🔄 Loading existing Chroma vectorstore...")
-        vectordb = Chroma(
-            persist_directory=persist_dir,
-            embedding_function=embeddings
-        )
-    else:
-        print("🛠 Creating new Chroma vectorstore...")
-        if os.path.exists(persist_dir):
-            shutil.rmtree(persist_dir)
-        
-        vectordb = Chroma.from_texts(
-            texts=chunks,
-            embedding=embeddings,
-            persist_directory=persist_dir
-        )
-    
-    print("✅ Chroma vectorstore ready")
-    return vectordb, chunks
+    document = get_document_store().get(text, chunk_size, chunk_overlap, force_recreate=force_recreate)
+    logger.debug("Document has %s text chunks", len(document.chunks))
+    return document
+
+
+def retrieve_context(document: StoredDocument, question: str, top_k: int = 3) -> List[str]:
+    """Return the top_k chunks of a document most relevant to the question."""
+    logger.debug("Searching for relevant context (top %s)...", top_k)
+    return get_document_store().search(document, question, top_k)
 
 
 def call_mistral_api(
@@ -93,7 +101,8 @@ def call_mistral_api(
     model: str = "mistral-small",
     max_tokens: int = 300,
     temperature: float = 0.3,
-    timeout: int = 60
+    timeout: int = 60,
+    json_mode: bool = False
 ) -> str:
     """
     Call Mistral API for text generation.
@@ -106,6 +115,7 @@ def call_mistral_api(
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature
         timeout: Request timeout in seconds
+        json_mode: Ask the API to return a JSON object
         
     Returns:
         Generated text response
@@ -122,42 +132,278 @@ def call_mistral_api(
         "max_tokens": max_tokens,
         "temperature": temperature
     }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
     
+    start = time.perf_counter()
     try:
-        resp = requests.post(
-            f"{api_endpoint}/v1/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=timeout
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        with span("llm", model=model, max_tokens=max_tokens):
+            def send() -> dict:
+                resp = requests.post(
+                    f"{api_endpoint}/v1/chat/completions",
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout
+                )
+                resp.raise_for_status()
+                return resp.json()
+            
+            # Concurrency cap, rate limits and retries on 429/5xx (modules/llm_scheduler.py)
+            data = call_with_limits(
+                model,
+                send,
+                estimate_tokens(prompt_text, max_tokens),
+                usage=lambda d: (d.get("usage") or {}).get("total_tokens")
+            )
+            usage = data.get("usage") or {}
+            set_attributes(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"))
         
         if "choices" in data and len(data["choices"]) > 0:
+            record_llm_call(
+                model,
+                time.perf_counter() - start,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens")
+            )
             return data["choices"][0]["message"]["content"].strip()
         else:
             raise ValueError("Unexpected response from Mistral API")
             
+    except LLMUnavailableError:
+        record_llm_call(model, time.perf_counter() - start, status="error")
+        raise
     except requests.exceptions.HTTPError as e:
-        if resp.status_code == 401:
+        record_llm_call(model, time.perf_counter() - start, status="error")
+        if e.response is not None and e.response.status_code == 401:
             raise RuntimeError("Authentication error: Invalid API key")
-        elif resp.status_code == 404:
+        elif e.response is not None and e.response.status_code == 404:
             raise RuntimeError(f"Model '{model}' not found or not available")
         raise RuntimeError(f"HTTP error calling Mistral API: {str(e)}")
     except requests.exceptions.RequestException as e:
+        record_llm_call(model, time.perf_counter() - start, status="error")
         raise RuntimeError(f"Network error calling Mistral API: {str(e)}")
 
 
+def stream_mistral_api(
+    prompt_text: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    max_tokens: int = 300,
+    temperature: float = 0.3,
+    timeout: int = 60
+) -> Iterator[str]:
+    """
+    Call Mistral API in streaming mode and yield answer tokens as they arrive.
+    
+    Args:
+        prompt_text: The prompt to send
+        api_endpoint: API endpoint URL
+        api_key: API key for authentication
+        model: Model name to use
+        max_tokens: Maximum tokens to generate
+        temperature: Sampling temperature
+        timeout: Request timeout in seconds
+        
+    Yields:
+        Text deltas from the chat completions stream
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream"
+    }
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "user", "content": prompt_text}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream": True
+    }
+    
+    def open_stream() -> requests.Response:
+        resp = requests.post(
+            f"{api_endpoint}/v1/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=timeout,
+            stream=True
+        )
+        if resp.status_code >= 400:
+            resp.close()
+            if resp.status_code == 401:
+                raise RuntimeError("Authentication error: Invalid API key")
+            elif resp.status_code == 404:
+                raise RuntimeError(f"Model '{model}' not found or not available")
+            resp.raise_for_status()
+        return resp
+    
+    start = time.perf_counter()
+    status = "error"
+    try:
+        # The slot is held until the stream ends; only opening the stream is retried
+        with get_scheduler(model).slot(estimate_tokens(prompt_text, max_tokens)):
+            with retry_in_slot(model, open_stream) as resp:
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+                status = "ok"
+                    
+    except requests.exceptions.HTTPError as e:
+        raise RuntimeError(f"HTTP error calling Mistral API: {str(e)}")
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"Network error calling Mistral API: {str(e)}")
+    finally:
+        # Whole stream duration; token usage is not sent in streaming mode
+        record_llm_call(model, time.perf_counter() - start, status=status)
+
+
+def build_qa_prompt(context: str, question: str) -> str:
+    """Format the question-answering prompt from retrieved context."""
+    qa_prompt = PromptTemplate(
+        template=QA_PROMPT_TEMPLATE,
+        input_variables=["context", "question"]
+    )
+    return qa_prompt.format(context=context, question=question)
+
+
+def generate_corrected_answer(
+    context: str,
+    question: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small"
+) -> Tuple[str, str]:
+    """
+    Generate an answer already rewritten in fluent French in a single call.
+    
+    Args:
+        context: Retrieved context for the question
+        question: The question to answer
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        
+    Returns:
+        Tuple of (raw_answer, corrected_answer)
+    """
+    prompt = PromptTemplate(
+        template=QA_INLINE_CORRECTION_PROMPT_TEMPLATE,
+        input_variables=["context", "question"]
+    )
+    response = call_mistral_api(
+        prompt.format(context=context, question=question),
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        model=model,
+        max_tokens=360,
+        temperature=0.3,
+        json_mode=True
+    )
+    
+    try:
+        parsed = json.loads(response)
+        answer = str(parsed.get("answer") or "").strip()
+        raw_answer = str(parsed.get("raw_answer") or "").strip()
+    except (ValueError, AttributeError):
+        logger.warning("Structured answer could not be parsed, using raw output")
+        return response, response
+    
+    if not answer:
+        answer = raw_answer or response
+    return raw_answer or answer, answer
+
+
+def generate_answer(
+    context: str,
+    question: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    apply_correction: bool = True,
+    correction_mode: str = DEFAULT_CORRECTION_MODE
+) -> Tuple[str, str]:
+    """
+    Generate an answer from retrieved context, optionally corrected.
+    
+    Args:
+        context: Retrieved context for the question
+        question: The question to answer
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        apply_correction: Apply correction step to the answer
+        correction_mode: "inline" or "two_pass"
+        
+    Returns:
+        Tuple of (raw_answer, final_answer)
+    """
+    if apply_correction and correction_mode == CORRECTION_MODE_INLINE:
+        return generate_corrected_answer(
+            context,
+            question,
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model
+        )
+    
+    raw_answer = call_mistral_api(
+        build_qa_prompt(context, question),
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        model=model,
+        max_tokens=300,
+        temperature=0.3
+    )
+    if not apply_correction:
+        return raw_answer, raw_answer
+    
+    # Apply correction in a second call
+    correction_prompt = PromptTemplate(
+        input_variables=["answer"],
+        template=CORRECTION_PROMPT_TEMPLATE
+    )
+    correction_input = correction_prompt.format(answer=raw_answer)
+    
+    try:
+        final_answer = call_mistral_api(
+            correction_input,
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model,
+            max_tokens=60,
+            temperature=0.3
+        )
+        logger.debug("Answer corrected")
+    except Exception as e:
+        logger.warning("Correction failed, using raw answer: %s", e)
+        final_answer = raw_answer
+    return raw_answer, final_answer
+
+
+@span("rag_processor.answer_question")
 def answer_question(
     question: str,
     text_content: str,
     api_endpoint: str,
     api_key: str,
     model: str = "mistral-small",
-    persist_dir: str = DEFAULT_PERSIST_DIR,
     top_k: int = 3,
     force_recreate: bool = False,
-    apply_correction: bool = True
+    apply_correction: bool = True,
+    correction_mode: str = DEFAULT_CORRECTION_MODE
 ) -> dict:
     """
     Answer a question using RAG (Retrieval-Augmented Generation).
@@ -168,111 +414,151 @@ def answer_question(
         api_endpoint: Mistral API endpoint
         api_key: Mistral API key
         model: Model name to use
-        persist_dir: Directory to persist vectorstore
         top_k: Number of similar chunks to retrieve
-        force_recreate: Force recreate vectorstore
+        force_recreate: Re-embed the text even if it is already stored
         apply_correction: Apply correction step to the answer
+        correction_mode: "inline" to get the corrected answer from the QA
+            call itself, or "two_pass" to rewrite it in a second call
         
     Returns:
         Dictionary with answer, context, and metadata
     """
     start_time = time.time()
     
-    # Initialize vectorstore
-    vectordb, chunks = initialize_vectorstore(
-        text_content,
-        persist_dir=persist_dir,
-        force_recreate=force_recreate
-    )
+    # Load chunks and embeddings (embedded once per document)
+    document = load_document(text_content, force_recreate=force_recreate)
     
     # Retrieve relevant chunks
-    print(f"🔍 Searching for relevant context (top {top_k})...")
-    top_chunks = vectordb.similarity_search(question, k=top_k)
-    context_for_llm = " ".join(c.page_content for c in top_chunks)
-    
-    # Create QA prompt
-    qa_prompt_template = """
-Tu es un assistant intelligent.
-Lis le texte suivant et réponds uniquement à la question.
-Corrige les fautes visibles et donne une réponse claire en 1 à 2 phrases maximum.
-
---- CONTEXTE ---
-{context}
-
---- QUESTION ---
-{question}
-
---- RÉPONSE ---
-"""
-    
-    qa_prompt = PromptTemplate(
-        template=qa_prompt_template,
-        input_variables=["context", "question"]
-    )
+    top_chunks = retrieve_context(document, question, top_k)
+    context_for_llm = " ".join(top_chunks)
     
     # Generate answer
-    print("🧠 Generating answer...")
-    input_prompt = qa_prompt.format(context=context_for_llm, question=question)
-    raw_answer = call_mistral_api(
-        input_prompt,
+    logger.debug("Generating answer...")
+    raw_answer, final_answer = generate_answer(
+        context_for_llm,
+        question,
         api_endpoint=api_endpoint,
         api_key=api_key,
         model=model,
-        max_tokens=300,
-        temperature=0.3
+        apply_correction=apply_correction,
+        correction_mode=correction_mode
     )
     
     generation_time = time.time() - start_time
-    print(f"✅ Answer generated in {generation_time:.2f}s")
-    
-    # Apply correction if requested
-    final_answer = raw_answer
-    if apply_correction:
-        correction_template = """
-Réécris la réponse suivante en français correct et fluide, sans changer le sens :
-"{answer}"
-"""
-        correction_prompt = PromptTemplate(
-            input_variables=["answer"],
-            template=correction_template
-        )
-        correction_input = correction_prompt.format(answer=raw_answer)
-        
-        try:
-            final_answer = call_mistral_api(
-                correction_input,
-                api_endpoint=api_endpoint,
-                api_key=api_key,
-                model=model,
-                max_tokens=60,
-                temperature=0.3
-            )
-            print("✅ Answer corrected")
-        except Exception as e:
-            print(f"⚠️ Correction failed, using raw answer: {e}")
-            final_answer = raw_answer
+    logger.info("Answer generated in %.2fs", generation_time)
     
     return {
         "question": question,
         "answer": final_answer,
         "raw_answer": raw_answer if apply_correction else None,
-        "context_chunks": [c.page_content for c in top_chunks],
-        "total_chunks": len(chunks),
-        "generation_time_seconds": round(generation_time, 2)
+        "context_chunks": top_chunks,
+        "total_chunks": len(document.chunks),
+        "generation_time_seconds": round(generation_time, 2),
+        "correction_mode": correction_mode if apply_correction else None
+    }
+
+
+def stream_answer_question(
+    question: str,
+    text_content: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    top_k: int = 3,
+    force_recreate: bool = False
+) -> Iterator[dict]:
+    """
+    Answer a question using RAG, streaming the result as it is produced.
+    
+    The retrieved context is emitted as soon as the similarity search is done,
+    then every answer token is emitted as it arrives from Mistral. No correction
+    pass is applied in streaming mode.
+    
+    Args:
+        question: The question to answer
+        text_content: The text content to search
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        top_k: Number of similar chunks to retrieve
+        force_recreate: Re-embed the text even if it is already stored
+        
+    Yields:
+        Event dictionaries of the form {"event": name, "data": payload} where
+        name is "context", "token", "done" or "error"
+    """
+    start_time = time.time()
+    
+    try:
+        # Load chunks and embeddings (embedded once per document)
+        document = load_document(text_content, force_recreate=force_recreate)
+        
+        # Retrieve relevant chunks
+        context_chunks = retrieve_context(document, question, top_k)
+    except Exception as e:
+        yield {"event": "error", "data": {"detail": f"Retrieval failed: {str(e)}"}}
+        return
+    
+    retrieval_time = time.time() - start_time
+    yield {
+        "event": "context",
+        "data": {
+            "question": question,
+            "context_chunks": context_chunks,
+            "total_chunks": len(document.chunks),
+            "retrieval_time_seconds": round(retrieval_time, 2)
+        }
+    }
+    
+    # Stream the answer
+    logger.debug("Streaming answer...")
+    input_prompt = build_qa_prompt(" ".join(context_chunks), question)
+    answer_parts = []
+    first_token_time = None
+    
+    try:
+        for token in stream_mistral_api(
+            input_prompt,
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            model=model,
+            max_tokens=300,
+            temperature=0.3
+        ):
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+            answer_parts.append(token)
+            yield {"event": "token", "data": {"content": token}}
+    except Exception as e:
+        logger.error("Streaming failed: %s", e)
+        yield {"event": "error", "data": {"detail": str(e)}}
+        return
+    
+    generation_time = time.time() - start_time
+    logger.info("Answer streamed in %.2fs", generation_time)
+    
+    yield {
+        "event": "done",
+        "data": {
+            "question": question,
+            "answer": "".join(answer_parts).strip(),
+            "time_to_first_token_seconds": round(first_token_time, 2) if first_token_time is not None else None,
+            "generation_time_seconds": round(generation_time, 2)
+        }
     }
 
 
+@span("rag_processor.batch_answer_questions")
 def batch_answer_questions(
     questions: List[str],
     text_content: str,
     api_endpoint: str,
     api_key: str,
     model: str = "mistral-small",
-    persist_dir: str = DEFAULT_PERSIST_DIR,
     top_k: int = 3
 ) -> List[dict]:
     """
-    Answer multiple questions using the same vectorstore.
+    Answer multiple questions about the same document, embedded once.
     
     Args:
         questions: List of questions to answer
@@ -280,22 +566,17 @@ def batch_answer_questions(
         api_endpoint: Mistral API endpoint
         api_key: Mistral API key
         model: Model name to use
-        persist_dir: Directory to persist vectorstore
         top_k: Number of similar chunks to retrieve
         
     Returns:
         List of answer dictionaries
     """
-    # Initialize vectorstore once
-    vectordb, chunks = initialize_vectorstore(
-        text_content,
-        persist_dir=persist_dir,
-        force_recreate=False
-    )
+    # Embed the document once; every answer reuses the stored embeddings
+    load_document(text_content)
     
     results = []
     for idx, question in enumerate(questions):
-        print(f"\n--- Question {idx + 1}/{len(questions)} ---")
+        logger.debug("Question %s/%s", idx + 1, len(questions))
         try:
             result = answer_question(
                 question=question,
@@ -303,13 +584,11 @@ def batch_answer_questions(
                 api_endpoint=api_endpoint,
                 api_key=api_key,
                 model=model,
-                persist_dir=persist_dir,
-                top_k=top_k,
-                force_recreate=False  # Don't recreate for batch processing
+                top_k=top_k
             )
             results.append(result)
         except Exception as e:
-            print(f"❌ Failed to answer question: {e}")
+            logger.error("Failed to answer question: %s", e)
             results.append({
                 "question": question,
                 "answer": None,
@@ -1,66 +1,154 @@
+import os
+from bisect import bisect_right
+from modules.tracing import span
 from modules.llm_client import call_llm_api, extract_json_from_response
-from datetime import datetime, timedelta, timezone
-from modules.calendar_service import get_calendar_service
-from googleapiclient.errors import HttpError
-
-def parse_event_datetime(dt_str: str):
-    """Convertit une date/heure Google Calendar en datetime aware UTC"""
-    dt = datetime.fromisoformat(dt_str)
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    else:
-        dt = dt.astimezone(timezone.utc)
-    return dt
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+from modules.event_cache import get_event_cache, parse_event_datetime
+from modules.datetime_parser import (
+    preparse_schedule, PREPARSE_NO_MEETING, PREPARSE_EXPLICIT, PREPARSE_SUGGESTION
+)
+from modules.logging_config import get_logger
+
+logger = get_logger("calendar.scheduler")
+
+# Configuration par défaut des créneaux
+DEFAULT_WORKING_HOURS = ((8, 12), (14, 17))  # plages horaires locales (heure de début, heure de fin)
+DEFAULT_SLOT_MINUTES = 60
+DEFAULT_HORIZON_DAYS = 7
+DEFAULT_TIMEZONE = os.environ.get("CALENDAR_TIMEZONE", "UTC")
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals) -> List[Interval]:
+    """Trie et fusionne des intervalles occupés qui se chevauchent ou se touchent."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def working_windows(
+    first_day: date,
+    days: int,
+    working_hours: Sequence[Tuple[int, int]] = DEFAULT_WORKING_HOURS,
+    tz: timezone = timezone.utc
+) -> List[Interval]:
+    """Plages de travail des `days` jours à partir de `first_day`, en UTC et triées."""
+    windows = []
+    for i in range(days):
+        day = first_day + timedelta(days=i)
+        for start_hour, end_hour in sorted(working_hours):
+            start = datetime.combine(day, time(start_hour), tzinfo=tz).astimezone(timezone.utc)
+            end = datetime.combine(day, time(end_hour), tzinfo=tz).astimezone(timezone.utc)
+            windows.append((start, end))
+    return windows
+
+
+def compute_free_slots(busy: List[Interval], windows: List[Interval], slot_minutes: int = DEFAULT_SLOT_MINUTES) -> List[Interval]:
+    """
+    Calcule les créneaux libres par balayage.
+    
+    Les créneaux sont alignés sur une grille de `slot_minutes` partant du début
+    de chaque plage. Un seul passage sur les plages et les intervalles occupés
+    (fusionnés et triés) suffit : O(plages + événements + créneaux).
+    
+    Args:
+        busy: Intervalles occupés fusionnés et triés (voir `merge_intervals`)
+        windows: Plages de travail triées, sans chevauchement
+        slot_minutes: Durée d'un créneau
+        
+    Returns:
+        Liste des créneaux libres (début, fin)
+    """
+    slot = timedelta(minutes=slot_minutes)
+    slots = []
+    i = 0
+    for window_start, window_end in windows:
+        # Ignorer les intervalles terminés avant la plage
+        while i < len(busy) and busy[i][1] <= window_start:
+            i += 1
+        j = i
+        cursor = window_start
+        while cursor + slot <= window_end:
+            if j < len(busy) and busy[j][0] < cursor + slot:
+                if busy[j][1] > cursor:
+                    # Sauter après l'intervalle occupé, au prochain point de la grille
+                    steps = -(-(busy[j][1] - window_start) // slot)
+                    cursor = window_start + steps * slot
+                j += 1
+                continue
+            slots.append((cursor, cursor + slot))
+            cursor += slot
+    return slots
+
+
+def get_free_slots(
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    working_hours: Sequence[Tuple[int, int]] = DEFAULT_WORKING_HOURS,
+    slot_minutes: int = DEFAULT_SLOT_MINUTES,
+    tz_name: Optional[str] = None
+) -> List[dict]:
+    """
+    Créneaux libres des `horizon_days` prochains jours (à partir de demain).
+    
+    Les événements sont lus une fois depuis le cache, convertis en intervalles
+    fusionnés, puis les créneaux sont calculés par balayage.
+    
+    Args:
+        horizon_days: Nombre de jours examinés
+        working_hours: Plages horaires locales, ex. ((8, 12), (14, 17))
+        slot_minutes: Durée d'un créneau
+        tz_name: Fuseau horaire IANA des plages (CALENDAR_TIMEZONE par défaut)
+        
+    Returns:
+        Liste de créneaux {"start", "end", "date", "heure", "heure_fin", "duree_minutes"} en heure locale
+    """
+    tz = ZoneInfo(tz_name or DEFAULT_TIMEZONE)
+    first_day = datetime.now(tz).date() + timedelta(days=1)
+    windows = working_windows(first_day, horizon_days, working_hours, tz)
+    if not windows:
+        return []
+    
+    intervals = get_event_cache().get_event_intervals(windows[0][0], windows[-1][1])
+    busy = merge_intervals((start, end) for _, start, end in intervals)
+    
+    slots = []
+    for start, end in compute_free_slots(busy, windows, slot_minutes):
+        local_start, local_end = start.astimezone(tz), end.astimezone(tz)
+        slots.append({
+            "start": local_start.isoformat(),
+            "end": local_end.isoformat(),
+            "date": local_start.strftime('%Y-%m-%d'),
+            "heure": local_start.strftime('%H:%M'),
+            "heure_fin": local_end.strftime('%H:%M'),
+            "duree_minutes": slot_minutes
+        })
+    return slots
 
 
 def get_user_availability():
     """
     Récupère les créneaux libres à partir du Google Calendar pour les 7 prochains jours.
     Retourne une liste de créneaux horaires libres (1 heure chacun) dans les plages 8h-12h et 14h-17h.
+    Les événements sont lus depuis le cache local (synchronisé de façon incrémentale).
     """
     try:
-        service = get_calendar_service()
-        now = datetime.now(timezone.utc)
-        end_date = now + timedelta(days=7)
-
-        # Récupérer les événements pour les 7 prochains jours
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=now.isoformat(),
-            timeMax=end_date.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        events = events_result.get('items', [])
-
-        # Définir les plages horaires de disponibilité (8h-12h, 14h-17h)
-        availability = []
-        for i in range(1, 8):
-            day = (now + timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-            for start_hour in [8, 9, 10, 11, 14, 15, 16]:  # Créneaux d'une heure
-                start_time = day.replace(hour=start_hour, tzinfo=timezone.utc)
-                end_time = start_time + timedelta(hours=1)
-
-                # Vérifier si le créneau est libre
-                is_free = True
-                for event in events:
-                    event_start = parse_event_datetime(event['start'].get('dateTime', event['start'].get('date')))
-                    event_end   = parse_event_datetime(event['end'].get('dateTime', event['end'].get('date')))
-
-                    if not (end_time <= event_start or start_time >= event_end):
-                        is_free = False
-                        break
-
-                if is_free:
-                    availability.append(f"{start_time.strftime('%Y-%m-%d')} de {start_time.strftime('%H:%M')} à {end_time.strftime('%H:%M')}")
-
-        return availability
-
-    except HttpError as e:
-        print(f"Erreur lors de l'accès au calendrier Google : {str(e)}")
-        return []
+        return [
+            f"{slot['date']} de {slot['heure']} à {slot['heure_fin']}"
+            for slot in get_free_slots()
+        ]
+
     except Exception as e:
-        print(f"Erreur inattendue dans get_user_availability : {str(e)}")
+        # HttpError (Google) ou sqlite3.Error (local) : googleapiclient n'est pas importé,
+        # le backend local ne l'exige pas
+        logger.error("Erreur lors de l'accès au calendrier (%s) : %s", type(e).__name__, str(e))
         return []
 
 def is_slot_available(proposed_start: datetime, duration_minutes: int, events: list) -> bool:
@@ -76,25 +164,122 @@ def is_slot_available(proposed_start: datetime, duration_minutes: int, events: l
             return False
     return True
 
-def extract_schedule_info(text: str, model_name: str) -> dict:
+def check_proposals(proposals: List[Interval]) -> List[bool]:
+    """
+    Vérifie plusieurs créneaux proposés en une seule requête de type freebusy.
+    
+    Les intervalles occupés couvrant toutes les propositions sont lus une fois
+    depuis le cache d'événements puis fusionnés ; chaque proposition est
+    ensuite vérifiée par recherche dichotomique.
+    
+    Args:
+        proposals: Liste de (début, fin) en datetime aware
+        
+    Returns:
+        Liste de booléens (True si le créneau est libre), dans l'ordre des propositions
+    """
+    if not proposals:
+        return []
+    intervals = get_event_cache().get_event_intervals(
+        min(start for start, _ in proposals),
+        max(end for _, end in proposals)
+    )
+    busy = merge_intervals((start, end) for _, start, end in intervals)
+    ends = [end for _, end in busy]
+    
+    free = []
+    for start, end in proposals:
+        # Premier intervalle occupé qui se termine après le début proposé
+        i = bisect_right(ends, start)
+        free.append(i == len(busy) or busy[i][0] >= end)
+    return free
+
+def suggest_slots(count: int = 3) -> List[dict]:
+    """
+    Propose des créneaux libres d'une heure, en privilégiant des jours différents.
+    
+    Args:
+        count: Nombre de créneaux à proposer
+        
+    Returns:
+        Liste de {"date": "YYYY-MM-DD", "heure": "HH:MM"}
+    """
+    slots = get_free_slots()
+    first_per_day = {}
+    for slot in slots:
+        first_per_day.setdefault(slot["date"], slot)
+    chosen = list(first_per_day.values())[:count]
+    chosen += [slot for slot in slots if slot not in chosen][:count - len(chosen)]
+    chosen.sort(key=lambda slot: slot["start"])
+    return [{"date": slot["date"], "heure": slot["heure"]} for slot in chosen]
+
+@span("scheduler.extract_schedule_info")
+def extract_schedule_info(text: str, model_name: str, use_preparser: bool = True) -> dict:
     """
     Analyse un texte pour identifier les propositions de réunion et vérifier les disponibilités réelles.
     Si aucune date spécifique, propose des créneaux libres. Si occupé, retourne un message.
+    
+    Un pré-analyseur local (français/anglais) traite d'abord le texte : sans
+    mention de réunion ni de date, la réponse est vide ; une proposition
+    explicite (une date, une heure) ou une demande de créneaux sans date est
+    résolue directement. Le LLM n'est appelé que pour les textes ambigus.
+    
+    Args:
+        text: Texte de l'email
+        model_name: Modèle LLM utilisé pour les textes ambigus
+        use_preparser: Désactiver pour toujours passer par le LLM
+    """
+    preparsed = preparse_schedule(text) if use_preparser else None
+    status = preparsed.status if preparsed else None
+    
+    if status == PREPARSE_NO_MEETING:
+        logger.info("Pré-analyse : aucune réunion détectée (LLM non appelé)")
+        return []
+    if status == PREPARSE_SUGGESTION:
+        logger.info("Pré-analyse : demande de créneaux sans date (LLM non appelé)")
+        try:
+            return {"suggestion_requise": True, "creneaux_proposes": suggest_slots()}
+        except Exception as e:
+            logger.error("Erreur inattendue dans suggest_slots : %s", str(e))
+            return {"suggestion_requise": True, "creneaux_proposes": []}
+    if status == PREPARSE_EXPLICIT:
+        logger.info("Pré-analyse : proposition explicite %s %s (LLM non appelé)", preparsed.proposals[0]['date'], preparsed.proposals[0]['heure'])
+        result = preparsed.proposals
+    else:
+        result = _extract_schedule_with_llm(text, model_name)
+        if isinstance(result, dict) and "error" in result:
+            return result
+    
+    # Vérifier les propositions de réunion pour les conflits
+    if isinstance(result, list) and result:
+        proposals = []
+        for meeting in result:
+            try:
+                local_tz = datetime.now().astimezone().tzinfo
+                proposed_time = datetime.strptime(f"{meeting['date']} {meeting['heure']}", '%Y-%m-%d %H:%M')
+                proposed_time = proposed_time.replace(tzinfo=local_tz).astimezone(timezone.utc)
+                # Use the duration detected by LLM; do not default to 60.
+                if "duree_minutes" in meeting:
+                    duration = meeting["duree_minutes"]
+                else:
+                    return {"error": "La durée n'est pas détectée par le LLM."}
+                proposals.append((proposed_time, proposed_time + timedelta(minutes=duration)))
+            except ValueError as e:
+                logger.error("Erreur de format de date/heure : %s", str(e))
+                return {"error": "Invalid date format in proposal"}
+    
+        # Toutes les propositions vérifiées en une seule requête sur le cache
+        if not all(check_proposals(proposals)):
+            return {"status": "occupied", "message": "Je suis occupé à ce moment-là."}
+    
+    return result
+
+def _extract_schedule_with_llm(text: str, model_name: str):
+    """
+    Analyse complète par le LLM, avec la liste des disponibilités dans le prompt.
     """
-    # Récupérer les disponibilités réelles
+    # Récupérer les disponibilités réelles (depuis le cache d'événements)
     user_availability = get_user_availability()
-    service = get_calendar_service()
-    now = datetime.now(timezone.utc)
-    end_date = now + timedelta(days=7)
-    
-    # Récupérer les événements pour la proposition (initialement pour le contexte)
-    events = service.events().list(
-        calendarId='primary',
-        timeMin=now.isoformat(),
-        timeMax=end_date.isoformat(),
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute().get('items', [])
     
     prompt = f"""
     Your task is to act as an intelligent scheduling assistant. Analyze the following email text to identify any meeting proposals.
@@ -142,36 +327,4 @@ def extract_schedule_info(text: str, model_name: str) -> dict:
     if not response:
         return {"error": "API response error"}
 
-    result = extract_json_from_response(response)
-    
-    # Vérifier les propositions de réunion pour les conflits
-    if isinstance(result, list) and result:
-        for meeting in result:
-            try:
-                local_tz = datetime.now().astimezone().tzinfo
-                proposed_time = datetime.strptime(f"{meeting['date']} {meeting['heure']}", '%Y-%m-%d %H:%M')
-                proposed_time = proposed_time.replace(tzinfo=local_tz).astimezone(timezone.utc)
-                # Use the duration detected by LLM; do not default to 60.
-                if "duree_minutes" in meeting:
-                    duration = meeting["duree_minutes"]
-                else:
-                    return {"error": "La durée n'est pas détectée par le LLM."}
-    
-                # Query events specifically for the proposed timeslot
-                timeMin = proposed_time.isoformat()
-                timeMax = (proposed_time + timedelta(minutes=duration)).isoformat()
-                specific_events = service.events().list(
-                    calendarId='primary',
-                    timeMin=timeMin,
-                    timeMax=timeMax,
-                    singleEvents=True,
-                    orderBy='startTime'
-                ).execute().get('items', [])
-    
-                if not is_slot_available(proposed_time, duration, specific_events):
-                    return {"status": "occupied", "message": "Je suis occupé à ce moment-là."}
-            except ValueError as e:
-                print(f"Erreur de format de date/heure : {str(e)}")
-                return {"error": "Invalid date format in proposal"}
-    
-    return result
\ No newline at end of file
+    return extract_json_from_response(response)
@@ -0,0 +1,100 @@
+"""
+Startup Report Module
+Times the API startup stages and tracks which heavy libraries are loaded, so
+cold start stays short (OCR, embeddings, vector stores, scikit-learn and the
+Google client are imported on first use)
+"""
+
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Libraries that dominate import time and memory; none should be loaded at startup
+HEAVY_MODULES = (
+    "torch", "transformers", "sentence_transformers", "onnxruntime",
+    "langchain", "langchain_community", "langchain_huggingface", "chromadb",
+    "sklearn", "cv2", "pytesseract", "pdf2image", "docx",
+    "googleapiclient.discovery", "google_auth_oauthlib"
+)
+
+# Optional dependencies of each subsystem, checked without importing them
+SUBSYSTEM_DEPENDENCIES = {
+    "calendar": ("googleapiclient", "google_auth_oauthlib"),
+    "attachment_processing": ("pytesseract", "docx", "cv2", "pdf2image"),
+    "rag_qa": ("langchain_core", "sentence_transformers"),
+    "classification": ("sklearn", "langchain_core", "sentence_transformers")
+}
+
+_started_at = time.perf_counter()
+_stages: List[Dict] = []
+_completed_at = None
+_lock = threading.Lock()
+
+
+@contextmanager
+def startup_stage(name: str):
+    """Record the duration of a startup stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _stages.append({"stage": name, "seconds": round(time.perf_counter() - start, 4)})
+
+
+def mark_startup_complete():
+    """Record the moment the API is ready to serve requests."""
+    global _completed_at
+    with _lock:
+        if _completed_at is None:
+            _completed_at = time.perf_counter()
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Heavy libraries already imported in this process."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def missing_dependencies(subsystem: str) -> List[str]:
+    """Optional dependencies of a subsystem that are not installed."""
+    missing = []
+    for name in SUBSYSTEM_DEPENDENCIES.get(subsystem, ()):
+        try:
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
+        except (ImportError, ValueError):
+            missing.append(name)
+    return missing
+
+
+def get_startup_report() -> Dict:
+    """
+    Return the startup-time breakdown of this process.
+
+    Returns:
+        Dictionary with the total startup time (None until startup completes),
+        the duration of each stage, and the heavy libraries loaded so far
+    """
+    with _lock:
+        stages = list(_stages)
+        total = None if _completed_at is None else round(_completed_at - _started_at, 4)
+    loaded = loaded_heavy_modules()
+    return {
+        "startup_seconds": total,
+        "stages": stages,
+        "heavy_modules_loaded": loaded,
+        "heavy_modules_deferred": [name for name in HEAVY_MODULES if name not in loaded]
+    }
+
+
+def format_startup_report(report: Dict) -> str:
+    """Render the report as console lines."""
+    lines = [f"   {stage['stage']:<32} {stage['seconds'] * 1000:8.1f} ms" for stage in report["stages"]]
+    if report["startup_seconds"] is not None:
+        lines.append(f"   {'total':<32} {report['startup_seconds'] * 1000:8.1f} ms")
+    loaded = ", ".join(report["heavy_modules_loaded"]) or "none"
+    lines.append(f"   Heavy libraries loaded at startup: {loaded}")
+    return "\n".join(lines)
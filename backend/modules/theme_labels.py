@@ -0,0 +1,290 @@
+"""
+Theme Label Store Module
+Persistent store of theme labels indexed by cluster centroid embedding, used to
+reuse labels of recurring themes instead of asking the LLM again
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Default configuration
+DEFAULT_STORE_PATH = "theme_label_store.db"
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get("THEME_LABEL_SIMILARITY_THRESHOLD", "0.9"))
+DEFAULT_MAX_LABELS = int(os.environ.get("THEME_LABEL_STORE_MAX_LABELS", "5000"))
+
+_COLUMNS = "label_id, label, curated, example_text, hits, created_at, updated_at, last_used_at"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS theme_labels (
+    label_id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    centroid BLOB NOT NULL,
+    curated INTEGER NOT NULL,
+    example_text TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_used_at REAL
+);
+"""
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _row_to_entry(row: tuple) -> dict:
+    label_id, label, curated, example_text, hits, created_at, updated_at, last_used_at = row
+    return {
+        "label_id": label_id,
+        "label": label,
+        "curated": bool(curated),
+        "example_text": example_text,
+        "hits": hits,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "last_used_at": last_used_at
+    }
+
+
+class ThemeLabelStore:
+    """
+    Theme labels keyed by centroid embedding, persisted in SQLite.
+
+    A new cluster reuses a stored label when the cosine similarity between its
+    centroid and a stored centroid is at least the similarity threshold.
+
+    Every uvicorn worker opens the same database: additions and curation are
+    single-row writes, and the in-memory centroid matrix is reloaded when
+    another connection has committed changes (PRAGMA data_version). Hit counts
+    are buffered and written by save(). Beyond max_labels, the least recently
+    used non-curated labels are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        max_labels: int = DEFAULT_MAX_LABELS
+    ):
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self.max_labels = max_labels
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._stale = True
+        self._entries: List[dict] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    # ---------------- persistence ----------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+            self._import_legacy_json()
+        return self._conn
+
+    def _import_legacy_json(self):
+        """Import the labels of the former JSON store next to the database, once."""
+        legacy_path = f"{os.path.splitext(self.path)[0]}.json"
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("labels", [])
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO theme_labels ({_COLUMNS}, centroid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (e["label_id"], e["label"], int(e.get("curated", False)), e.get("example_text", ""),
+                     e.get("hits", 0), e["created_at"], e.get("updated_at", e["created_at"]), e.get("last_used_at"),
+                     _unit(e["centroid"]).tobytes())
+                    for e in entries
+                ]
+            )
+        try:
+            os.replace(legacy_path, f"{legacy_path}.imported")
+        except OSError:
+            pass  # another worker imported it first
+
+    def _refresh(self):
+        """Reload the entries and centroid matrix if the database changed."""
+        conn = self._connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if not self._stale and version == self._data_version:
+            return
+        rows = conn.execute(f"SELECT {_COLUMNS}, centroid FROM theme_labels ORDER BY created_at").fetchall()
+        self._entries = [_row_to_entry(row[:-1]) for row in rows]
+        if rows:
+            self._matrix = np.vstack([np.frombuffer(row[-1], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._data_version = version
+        self._stale = False
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Delete the least recently used non-curated labels beyond max_labels."""
+        if self.max_labels <= 0:
+            return
+        excess = conn.execute("SELECT COUNT(*) FROM theme_labels").fetchone()[0] - self.max_labels
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM theme_labels WHERE label_id IN ("
+                "SELECT label_id FROM theme_labels WHERE curated = 0 "
+                "ORDER BY COALESCE(last_used_at, created_at) LIMIT ?)",
+                (excess,)
+            )
+
+    def save(self):
+        """Write the buffered hit counts to the database."""
+        with self._lock:
+            if not self._pending_hits:
+                return
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "UPDATE theme_labels SET hits = hits + ?, "
+                    "last_used_at = MAX(COALESCE(last_used_at, 0), ?) WHERE label_id = ?",
+                    [(count, used_at, label_id) for label_id, (count, used_at) in self._pending_hits.items()]
+                )
+            self._pending_hits = {}
+            self._stale = True
+
+    # ---------------- lookups ----------------
+    def lookup(self, centroid, threshold: Optional[float] = None) -> Optional[dict]:
+        """
+        Return the stored entry closest to centroid if it is within the threshold.
+
+        Args:
+            centroid: Cluster centroid embedding
+            threshold: Minimum cosine similarity (defaults to the store threshold)
+
+        Returns:
+            Matching entry (with its "similarity") or None
+        """
+        threshold = self.similarity_threshold if threshold is None else threshold
+        with self._lock:
+            self._refresh()
+            self.lookups += 1
+            if not self._entries:
+                return None
+            similarities = self._matrix @ _unit(centroid)
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                return None
+            self.hits += 1
+            entry = self._entries[best]
+            now = time.time()
+            count, _ = self._pending_hits.get(entry["label_id"], (0, now))
+            self._pending_hits[entry["label_id"]] = (count + 1, now)
+            return {
+                **entry,
+                "hits": entry["hits"] + count + 1,
+                "last_used_at": now,
+                "similarity": round(float(similarities[best]), 4)
+            }
+
+    def add(self, centroid, label: str, curated: bool = False, example_text: Optional[str] = None) -> dict:
+        """Store a new label for a centroid and return its public entry."""
+        now = time.time()
+        entry = {
+            "label_id": uuid.uuid4().hex[:12],
+            "label": label,
+            "curated": curated,
+            "example_text": (example_text or "")[:200],
+            "hits": 0,
+            "created_at": now,
+            "updated_at": now,
+            "last_used_at": None
+        }
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    f"INSERT INTO theme_labels ({_COLUMNS}, centroid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry["label_id"], label, int(curated), entry["example_text"], 0, now, now, None,
+                     _unit(centroid).tobytes())
+                )
+                self._evict(conn)
+            self._stale = True
+        return entry
+
+    # ---------------- curation ----------------
+    def list_labels(self) -> List[dict]:
+        with self._lock:
+            self.save()
+            self._refresh()
+            return [dict(e) for e in self._entries]
+
+    def update_label(self, label_id: str, label: str) -> Optional[dict]:
+        """Rename a stored label; renamed labels are marked as curated."""
+        with self._lock:
+            self.save()
+            conn = self._connection()
+            with conn:
+                updated = conn.execute(
+                    "UPDATE theme_labels SET label = ?, curated = 1, updated_at = ? WHERE label_id = ?",
+                    (label, time.time(), label_id)
+                ).rowcount
+                row = conn.execute(f"SELECT {_COLUMNS} FROM theme_labels WHERE label_id = ?", (label_id,)).fetchone()
+            self._stale = True
+        return _row_to_entry(row) if updated and row else None
+
+    def delete(self, label_id: str) -> bool:
+        with self._lock:
+            self._pending_hits.pop(label_id, None)
+            conn = self._connection()
+            with conn:
+                deleted = conn.execute("DELETE FROM theme_labels WHERE label_id = ?", (label_id,)).rowcount
+            self._stale = True
+            return deleted > 0
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM theme_labels")
+            self._pending_hits = {}
+            self._stale = True
+            self.lookups = 0
+            self.hits = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "labels": len(self._entries),
+                "curated_labels": sum(1 for e in self._entries if e.get("curated")),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "similarity_threshold": self.similarity_threshold
+            }
+
+
+_store: Optional[ThemeLabelStore] = None
+_store_lock = threading.Lock()
+
+
+def get_label_store() -> ThemeLabelStore:
+    """Return the process-wide theme label store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ThemeLabelStore()
+        return _store
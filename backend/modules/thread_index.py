@@ -0,0 +1,341 @@
+"""
+Thread Index Module
+Incrementally indexes email thread documents (messages, attachments) into a
+persistent per-thread Chroma collection and answers questions across the thread
+"""
+
+import hashlib
+import shutil
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    # chromadb is loaded when the first thread index is opened
+    from chromadb.api import ClientAPI
+    from langchain_community.vectorstores import Chroma
+
+from modules.tracing import span
+from modules.chunking import chunk_text, text_hash
+from modules.embeddings import get_embeddings, EMBEDDING_BACKEND
+from modules.metrics import observe_stage, STAGE_EMBEDDING, STAGE_VECTOR_SEARCH
+from modules.rag_processor import (
+    generate_answer,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CORRECTION_MODE
+)
+from modules.logging_config import get_logger
+
+logger = get_logger("rag.threads")
+
+# Default configuration
+DEFAULT_THREADS_PERSIST_DIR = "chroma_db_threads"
+
+_clients: Dict[str, "ClientAPI"] = {}
+_vectorstores: Dict[str, "Chroma"] = {}
+_thread_locks: Dict[str, threading.Lock] = {}
+_vectorstores_lock = threading.Lock()
+
+
+def _collection_name(thread_id: str) -> str:
+    """
+    Map an arbitrary thread id to a valid Chroma collection name.
+
+    The embedding backend is part of the name: vectors of different backends
+    are not comparable, so switching EMBEDDING_BACKEND starts new collections.
+    """
+    digest = hashlib.sha1(thread_id.encode('utf-8')).hexdigest()[:24]
+    return f"thread-{digest}-{EMBEDDING_BACKEND}"
+
+
+def _get_client(persist_dir: str) -> "ClientAPI":
+    """Return the Chroma client of a persist directory (caller holds _vectorstores_lock)."""
+    client = _clients.get(persist_dir)
+    if client is None:
+        import chromadb
+
+        client = chromadb.PersistentClient(path=persist_dir)
+        _clients[persist_dir] = client
+    return client
+
+
+def _thread_lock(thread_id: str, persist_dir: str) -> threading.Lock:
+    """Lock serializing the writes to one thread index."""
+    with _vectorstores_lock:
+        return _thread_locks.setdefault(f"{persist_dir}:{thread_id}", threading.Lock())
+
+
+def get_thread_vectorstore(thread_id: str, persist_dir: str = DEFAULT_THREADS_PERSIST_DIR) -> "Chroma":
+    """
+    Return the persistent vectorstore of a thread, opening it once per process.
+
+    Args:
+        thread_id: Email thread identifier
+        persist_dir: Directory holding all thread collections
+
+    Returns:
+        Chroma vectorstore for the thread
+    """
+    key = f"{persist_dir}:{thread_id}"
+    with _vectorstores_lock:
+        vectordb = _vectorstores.get(key)
+        if vectordb is None:
+            from langchain_community.vectorstores import Chroma
+
+            vectordb = Chroma(
+                client=_get_client(persist_dir),
+                collection_name=_collection_name(thread_id),
+                embedding_function=get_embeddings(),
+                collection_metadata={"thread_id": thread_id}
+            )
+            _vectorstores[key] = vectordb
+    return vectordb
+
+
+def reset_thread_index(persist_dir: str = DEFAULT_THREADS_PERSIST_DIR) -> bool:
+    """
+    Drop all cached thread vectorstores and delete the persisted index.
+
+    Returns:
+        True if the persist directory existed and was deleted
+    """
+    with _vectorstores_lock:
+        for key in [k for k in _vectorstores if k.startswith(f"{persist_dir}:")]:
+            del _vectorstores[key]
+        _clients.pop(persist_dir, None)
+
+    if os.path.exists(persist_dir):
+        shutil.rmtree(persist_dir)
+        return True
+    return False
+
+
+def _document_chunk_ids(vectordb: "Chroma", document_id: str) -> Dict[str, Optional[str]]:
+    """Return {chunk_id: content_hash} for the stored chunks of a document."""
+    existing = vectordb.get(where={"document_id": document_id}, include=["metadatas"])
+    return {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+
+
+def _chunk_count(thread_id: str, persist_dir: str) -> int:
+    """Number of chunks in a thread collection (a count query, without fetching ids)."""
+    with _vectorstores_lock:
+        client = _get_client(persist_dir)
+    return client.get_collection(_collection_name(thread_id)).count()
+
+
+@span("thread_index.add_thread_documents")
+def add_thread_documents(
+    thread_id: str,
+    documents: List[dict],
+    persist_dir: str = DEFAULT_THREADS_PERSIST_DIR,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> dict:
+    """
+    Append or update documents in a thread index, embedding only what changed.
+
+    Documents whose content is unchanged since the last indexing are skipped.
+    Documents whose content changed have their previous chunks replaced.
+
+    Args:
+        thread_id: Email thread identifier
+        documents: List of {"document_id", "text", "source"} dictionaries
+        persist_dir: Directory holding all thread collections
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+
+    Returns:
+        Dictionary with added, updated and unchanged document ids
+    """
+    start_time = time.time()
+    vectordb = get_thread_vectorstore(thread_id, persist_dir)
+
+    # One writer per thread: concurrent adds would race on the chunk ids of a document
+    with _thread_lock(thread_id, persist_dir):
+        added, updated, unchanged = [], [], []
+        chunks_added = 0
+
+        for document in documents:
+            document_id = document["document_id"]
+            content_hash = text_hash(document["text"])
+
+            existing = _document_chunk_ids(vectordb, document_id)
+            if existing and all(h == content_hash for h in existing.values()):
+                unchanged.append(document_id)
+                continue
+
+            if existing:
+                vectordb.delete(ids=list(existing.keys()))
+                updated.append(document_id)
+            else:
+                added.append(document_id)
+
+            chunks = chunk_text(document["text"], chunk_size, chunk_overlap)
+            if not chunks:
+                continue
+
+            # Chroma embeds the chunks inside add_texts
+            with observe_stage(STAGE_EMBEDDING):
+                vectordb.add_texts(
+                    texts=chunks,
+                    metadatas=[
+                        {
+                            "document_id": document_id,
+                            "source": document.get("source") or "message",
+                            "content_hash": content_hash,
+                            "chunk_index": i
+                        }
+                        for i in range(len(chunks))
+                    ],
+                    ids=[f"{document_id}:{i}" for i in range(len(chunks))]
+                )
+            chunks_added += len(chunks)
+
+        total_chunks = _chunk_count(thread_id, persist_dir)
+
+    indexing_time = time.time() - start_time
+    logger.info(
+        "Thread %s: %s added, %s updated, %s unchanged (%s chunks in %.2fs)",
+        thread_id, len(added), len(updated), len(unchanged), chunks_added, indexing_time
+    )
+
+    return {
+        "thread_id": thread_id,
+        "added": added,
+        "updated": updated,
+        "unchanged": unchanged,
+        "chunks_added": chunks_added,
+        "total_chunks": total_chunks,
+        "indexing_time_seconds": round(indexing_time, 2)
+    }
+
+
+def delete_thread_document(
+    thread_id: str,
+    document_id: str,
+    persist_dir: str = DEFAULT_THREADS_PERSIST_DIR
+) -> int:
+    """
+    Remove a document from a thread index.
+
+    Returns:
+        Number of chunks deleted
+    """
+    vectordb = get_thread_vectorstore(thread_id, persist_dir)
+    with _thread_lock(thread_id, persist_dir):
+        chunk_ids = list(_document_chunk_ids(vectordb, document_id).keys())
+        if chunk_ids:
+            vectordb.delete(ids=chunk_ids)
+    return len(chunk_ids)
+
+
+def delete_thread(thread_id: str, persist_dir: str = DEFAULT_THREADS_PERSIST_DIR):
+    """Delete the whole index of a thread."""
+    vectordb = get_thread_vectorstore(thread_id, persist_dir)
+    with _thread_lock(thread_id, persist_dir):
+        vectordb.delete_collection()
+    with _vectorstores_lock:
+        _vectorstores.pop(f"{persist_dir}:{thread_id}", None)
+
+
+def list_thread_documents(thread_id: str, persist_dir: str = DEFAULT_THREADS_PERSIST_DIR) -> List[dict]:
+    """
+    List the documents indexed for a thread.
+
+    Returns:
+        List of {"document_id", "source", "content_hash", "chunks"} dictionaries
+    """
+    vectordb = get_thread_vectorstore(thread_id, persist_dir)
+    stored = vectordb.get(include=["metadatas"])
+
+    documents: Dict[str, dict] = {}
+    for metadata in stored["metadatas"]:
+        metadata = metadata or {}
+        document_id = metadata.get("document_id")
+        if document_id is None:
+            continue
+        entry = documents.setdefault(document_id, {
+            "document_id": document_id,
+            "source": metadata.get("source"),
+            "content_hash": metadata.get("content_hash"),
+            "chunks": 0
+        })
+        entry["chunks"] += 1
+    return list(documents.values())
+
+
+@span("thread_index.answer_thread_question")
+def answer_thread_question(
+    thread_id: str,
+    question: str,
+    api_endpoint: str,
+    api_key: str,
+    model: str = "mistral-small",
+    persist_dir: str = DEFAULT_THREADS_PERSIST_DIR,
+    top_k: int = 3,
+    apply_correction: bool = True,
+    correction_mode: str = DEFAULT_CORRECTION_MODE
+) -> dict:
+    """
+    Answer a question across every document indexed for a thread.
+
+    Args:
+        thread_id: Email thread identifier
+        question: The question to answer
+        api_endpoint: Mistral API endpoint
+        api_key: Mistral API key
+        model: Model name to use
+        persist_dir: Directory holding all thread collections
+        top_k: Number of similar chunks to retrieve
+        apply_correction: Apply correction step to the answer
+        correction_mode: "inline" or "two_pass"
+
+    Returns:
+        Dictionary with answer, context, source documents and metadata
+    """
+    start_time = time.time()
+    vectordb = get_thread_vectorstore(thread_id, persist_dir)
+    total_chunks = _chunk_count(thread_id, persist_dir)
+    if total_chunks == 0:
+        raise ValueError(f"No documents indexed for thread '{thread_id}'")
+
+    logger.debug("Searching thread %s for relevant context (top %s)...", thread_id, top_k)
+    with observe_stage(STAGE_VECTOR_SEARCH):
+        top_chunks = vectordb.similarity_search(question, k=min(top_k, total_chunks))
+    context_for_llm = " ".join(c.page_content for c in top_chunks)
+
+    logger.debug("Generating answer...")
+    raw_answer, final_answer = generate_answer(
+        context_for_llm,
+        question,
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        model=model,
+        apply_correction=apply_correction,
+        correction_mode=correction_mode
+    )
+
+    generation_time = time.time() - start_time
+    logger.info("Answer generated in %.2fs", generation_time)
+
+    source_documents = []
+    for c in top_chunks:
+        document_id = c.metadata.get("document_id")
+        if document_id and document_id not in source_documents:
+            source_documents.append(document_id)
+
+    return {
+        "question": question,
+        "answer": final_answer,
+        "raw_answer": raw_answer if apply_correction else None,
+        "context_chunks": [c.page_content for c in top_chunks],
+        "total_chunks": total_chunks,
+        "generation_time_seconds": round(generation_time, 2),
+        "correction_mode": correction_mode if apply_correction else None,
+        "source_documents": source_documents
+    }
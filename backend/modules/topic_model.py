@@ -0,0 +1,448 @@
+"""
+Mailbox Topic Model Module
+Corpus-wide incremental theme detection over the whole mailbox: new emails and
+attachments are assigned online to the nearest theme centroid, with periodic re-fits
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+
+from modules.chunking import text_hash
+from modules.clustering import cluster_embeddings, representative_indices
+from modules.document_store import get_document_store, DEFAULT_CHUNK_SIZE
+from modules.logging_config import get_logger
+
+logger = get_logger("classification.topics")
+
+# Default configuration
+DEFAULT_TOPIC_MODEL_DIR = "topic_model"
+DEFAULT_REFIT_EVERY = 50  # re-fit after this many documents assigned online
+DEFAULT_MIN_DOCUMENTS_TO_FIT = 5
+DEFAULT_NEW_THEME_SIMILARITY = 0.35  # below this, an online assignment is flagged as an outlier
+DEFAULT_MAX_SHARDS = 100  # change shards kept before they are compacted into the snapshot
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+class MailboxTopicModel:
+    """
+    Incremental topic model over mailbox documents.
+
+    Each document is represented by the normalized mean of its chunk embeddings.
+    Documents are assigned to the nearest centroid as they arrive and the
+    centroid is updated as a running mean. The whole corpus is re-clustered
+    with the shared clustering engine every `refit_every` assignments.
+
+    On disk, `snapshot.npz` holds the whole model as of the last compaction
+    (after each re-fit, or once `max_shards` shards have accumulated). Every
+    ingest, removal or labelling in between appends one small shard holding
+    only the changed documents, their vectors and the centroids, so the I/O
+    per email does not grow with the mailbox. Loading replays the shards
+    newer than the snapshot.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = DEFAULT_TOPIC_MODEL_DIR,
+        num_themes: Optional[int] = None,
+        refit_every: int = DEFAULT_REFIT_EVERY,
+        max_shards: int = DEFAULT_MAX_SHARDS
+    ):
+        self.model_dir = model_dir
+        self.num_themes = num_themes
+        self.refit_every = refit_every
+        self.max_shards = max_shards
+        self._lock = threading.RLock()
+        self._loaded = False
+
+        self.documents: Dict[str, dict] = {}  # document_id -> metadata and assignment
+        self.vectors: Dict[str, np.ndarray] = {}  # document_id -> document embedding
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.centroid_counts: List[int] = []
+        self.theme_labels: Dict[int, str] = {}
+        self.assigned_since_fit = 0
+        self.last_fit_at: Optional[float] = None
+        # Changes not yet written to a shard, and the shards newer than the snapshot
+        self._changed: set = set()
+        self._removed: set = set()
+        self._shard_seq = 0
+        self._shards: List[str] = []
+
+    # ---------------- persistence ----------------
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.model_dir, "snapshot.npz")
+
+    def _shard_path(self, seq: int) -> str:
+        return os.path.join(self.model_dir, f"shard-{seq:08d}.npz")
+
+    @property
+    def _legacy_paths(self) -> List[str]:
+        # state.json + vectors.npz, rewritten in full on every ingest by earlier versions
+        return [os.path.join(self.model_dir, "state.json"), os.path.join(self.model_dir, "vectors.npz")]
+
+    def _scalars(self) -> dict:
+        return {
+            "centroid_counts": self.centroid_counts,
+            "theme_labels": self.theme_labels,
+            "assigned_since_fit": self.assigned_since_fit,
+            "last_fit_at": self.last_fit_at
+        }
+
+    def _apply_scalars(self, state: dict):
+        self.centroid_counts = state["centroid_counts"]
+        self.theme_labels = {int(k): v for k, v in state.get("theme_labels", {}).items()}
+        self.assigned_since_fit = state.get("assigned_since_fit", 0)
+        self.last_fit_at = state.get("last_fit_at")
+
+    def _write_npz(self, path: str, state: dict, ids: List[str]):
+        """Write centroids, the vectors of ids and a JSON state atomically."""
+        os.makedirs(self.model_dir, exist_ok=True)
+        matrix = np.vstack([self.vectors[i] for i in ids]) if ids else np.zeros((0, 0), dtype=np.float32)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                state=np.array(json.dumps(state, ensure_ascii=False)),
+                centroids=self.centroids,
+                document_ids=np.array(ids, dtype=str),
+                document_vectors=matrix
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_npz(path: str) -> tuple:
+        with np.load(path) as arrays:
+            state = json.loads(str(arrays["state"][()]))
+            vectors = dict(zip((str(i) for i in arrays["document_ids"]), arrays["document_vectors"]))
+            return state, arrays["centroids"], vectors
+
+    def _load(self):
+        if self._loaded:
+            return
+        state_path, vectors_path = self._legacy_paths
+        if os.path.exists(self._snapshot_path):
+            state, self.centroids, self.vectors = self._read_npz(self._snapshot_path)
+            self.documents = state["documents"]
+            self._apply_scalars(state)
+            self._shard_seq = state.get("shard_seq", 0)
+        elif os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.documents = state["documents"]
+            self._apply_scalars(state)
+            if os.path.exists(vectors_path):
+                with np.load(vectors_path) as arrays:
+                    self.centroids = arrays["centroids"]
+                    self.vectors = dict(zip((str(i) for i in arrays["document_ids"]), arrays["document_vectors"]))
+
+        names = os.listdir(self.model_dir) if os.path.isdir(self.model_dir) else []
+        for name in sorted(n for n in names if n.startswith("shard-") and n.endswith(".npz")):
+            seq = int(name[len("shard-"):-len(".npz")])
+            path = os.path.join(self.model_dir, name)
+            if seq <= self._shard_seq:
+                os.remove(path)  # already part of the snapshot (crash during compaction)
+                continue
+            state, self.centroids, vectors = self._read_npz(path)
+            for document_id in state["removed"]:
+                self.documents.pop(document_id, None)
+                self.vectors.pop(document_id, None)
+            self.documents.update(state["documents"])
+            self.vectors.update(vectors)
+            self._apply_scalars(state)
+            self._shard_seq = seq
+            self._shards.append(path)
+        self._loaded = True
+
+    def save(self):
+        """Append the changes since the last save as a shard (compacting when there are too many)."""
+        with self._lock:
+            if len(self._shards) >= self.max_shards:
+                self.compact()
+                return
+            self._shard_seq += 1
+            path = self._shard_path(self._shard_seq)
+            changed = [i for i in self._changed if i in self.documents]
+            state = {
+                "documents": {i: self.documents[i] for i in changed},
+                "removed": sorted(self._removed),
+                **self._scalars()
+            }
+            self._write_npz(path, state, [i for i in changed if i in self.vectors])
+            self._shards.append(path)
+            self._changed, self._removed = set(), set()
+
+    def compact(self):
+        """Rewrite the whole model as the snapshot and drop the shards it includes."""
+        with self._lock:
+            state = {"documents": self.documents, "shard_seq": self._shard_seq, **self._scalars()}
+            self._write_npz(self._snapshot_path, state, list(self.vectors.keys()))
+            for path in self._shards + [p for p in self._legacy_paths if os.path.exists(p)]:
+                os.remove(path)
+            self._shards = []
+            self._changed, self._removed = set(), set()
+
+    # ---------------- ingestion ----------------
+    def embed_document(self, text: str) -> Optional[np.ndarray]:
+        """Return the normalized mean chunk embedding of a document."""
+        return get_document_store().get(text).mean_embedding()
+
+    def _assign(self, vector: np.ndarray) -> tuple:
+        similarities = _unit_rows(self.centroids) @ vector
+        theme_id = int(np.argmax(similarities))
+        return theme_id, float(similarities[theme_id])
+
+    def ingest(self, documents: List[dict]) -> dict:
+        """
+        Add or update mailbox documents and assign them to themes online.
+
+        Args:
+            documents: List of {"document_id", "text", "source", "subject"} dictionaries
+
+        Returns:
+            Dictionary with per-document assignments and whether a re-fit ran
+        """
+        hashes = [text_hash(document["text"]) for document in documents]
+        with self._lock:
+            self._load()
+            known = {
+                document["document_id"]: self.documents[document["document_id"]]["content_hash"]
+                for document in documents
+                if document["document_id"] in self.documents
+            }
+        # Embed outside the lock: the model is the slow part, and reads or other
+        # ingests must not wait behind it
+        vectors = [
+            None if known.get(document["document_id"]) == content_hash else self.embed_document(document["text"])
+            for document, content_hash in zip(documents, hashes)
+        ]
+
+        with self._lock:
+            assignments = []
+            for document, content_hash, vector in zip(documents, hashes, vectors):
+                document_id = document["document_id"]
+                existing = self.documents.get(document_id)
+                if existing and existing["content_hash"] == content_hash:
+                    assignments.append(self._assignment(document_id, unchanged=True))
+                    continue
+                if vector is None and known.get(document_id) == content_hash:
+                    # Changed by a concurrent ingest while embedding
+                    vector = self.embed_document(document["text"])
+                if existing:
+                    self._remove(document_id)
+
+                if vector is None:
+                    continue
+                self.vectors[document_id] = vector
+                self.documents[document_id] = {
+                    "source": document.get("source") or "message",
+                    "subject": document.get("subject"),
+                    "content_hash": content_hash,
+                    "preview": " ".join(document["text"].split())[:DEFAULT_CHUNK_SIZE],
+                    "theme_id": None,
+                    "similarity": None,
+                    "ingested_at": time.time()
+                }
+                self._changed.add(document_id)
+
+                if len(self.centroids):
+                    theme_id, similarity = self._assign(vector)
+                    count = self.centroid_counts[theme_id]
+                    # Running mean update of the assigned centroid
+                    self.centroids[theme_id] = (self.centroids[theme_id] * count + vector) / (count + 1)
+                    self.centroid_counts[theme_id] = count + 1
+                    self.documents[document_id]["theme_id"] = theme_id
+                    self.documents[document_id]["similarity"] = round(similarity, 4)
+                    self.assigned_since_fit += 1
+                assignments.append(self._assignment(document_id))
+
+            refitted = False
+            if self._needs_refit():
+                # The re-fit compacts the whole model into the snapshot
+                self.refit()
+                refitted = True
+                assignments = [self._assignment(a["document_id"], unchanged=a["unchanged"]) for a in assignments]
+            else:
+                self.save()
+
+            return {
+                "assignments": assignments,
+                "refitted": refitted,
+                "total_documents": len(self.documents),
+                "total_themes": len(self.centroids)
+            }
+
+    def _assignment(self, document_id: str, unchanged: bool = False) -> dict:
+        document = self.documents[document_id]
+        similarity = document.get("similarity")
+        return {
+            "document_id": document_id,
+            "theme_id": document["theme_id"],
+            "similarity": similarity,
+            "outlier": similarity is not None and similarity < DEFAULT_NEW_THEME_SIMILARITY,
+            "unchanged": unchanged
+        }
+
+    def _remove(self, document_id: str):
+        document = self.documents.pop(document_id, None)
+        vector = self.vectors.pop(document_id, None)
+        self._removed.add(document_id)
+        self._changed.discard(document_id)
+        if document is None or vector is None or document["theme_id"] is None:
+            return
+        theme_id = document["theme_id"]
+        count = self.centroid_counts[theme_id]
+        if count > 1:
+            self.centroids[theme_id] = (self.centroids[theme_id] * count - vector) / (count - 1)
+        self.centroid_counts[theme_id] = max(0, count - 1)
+
+    def remove(self, document_id: str) -> bool:
+        """Remove a document from the model."""
+        with self._lock:
+            self._load()
+            if document_id not in self.documents:
+                return False
+            self._remove(document_id)
+            self.save()
+            return True
+
+    # ---------------- fitting ----------------
+    def _needs_refit(self) -> bool:
+        if len(self.vectors) < DEFAULT_MIN_DOCUMENTS_TO_FIT:
+            return False
+        return len(self.centroids) == 0 or self.assigned_since_fit >= self.refit_every
+
+    def refit(self) -> dict:
+        """Re-cluster every document and reassign them to the new centroids."""
+        with self._lock:
+            self._load()
+            if not self.vectors:
+                return {"total_documents": 0, "total_themes": 0}
+            ids = list(self.vectors.keys())
+            matrix = np.vstack([self.vectors[i] for i in ids])
+            result = cluster_embeddings(matrix, num_clusters=self.num_themes)
+
+            self.centroids = np.asarray(result.centroids, dtype=np.float32)
+            self.centroid_counts = np.bincount(result.labels, minlength=result.num_clusters).tolist()
+            unit_centroids = _unit_rows(self.centroids)
+            for document_id, label, vector in zip(ids, result.labels, matrix):
+                self.documents[document_id]["theme_id"] = int(label)
+                self.documents[document_id]["similarity"] = round(float(unit_centroids[label] @ vector), 4)
+            # Labels belong to the previous centroids
+            self.theme_labels = {}
+            self.assigned_since_fit = 0
+            self.last_fit_at = time.time()
+            logger.info("Mailbox topic model re-fitted: %s documents, %s themes (%s)", len(ids), result.num_clusters, result.algorithm)
+            self.compact()
+            return {"total_documents": len(ids), "total_themes": result.num_clusters}
+
+    # ---------------- queries ----------------
+    def representative_documents(self) -> Dict[int, str]:
+        """Return, for each theme, the id of the document closest to its centroid."""
+        with self._lock:
+            self._load()
+            ids = [i for i in self.vectors if self.documents[i]["theme_id"] is not None]
+            if not ids or not len(self.centroids):
+                return {}
+            matrix = np.vstack([self.vectors[i] for i in ids])
+            labels = np.array([self.documents[i]["theme_id"] for i in ids])
+            representatives = representative_indices(matrix, labels, self.centroids)
+            return {theme_id: ids[index] for theme_id, index in representatives.items()}
+
+    def theme_centroid(self, theme_id: int) -> np.ndarray:
+        with self._lock:
+            self._load()
+            return self.centroids[theme_id]
+
+    def document_preview(self, document_id: str) -> str:
+        with self._lock:
+            self._load()
+            return self.documents[document_id].get("preview", "")
+
+    def set_theme_labels(self, labels: Dict[int, str]):
+        with self._lock:
+            self._load()
+            self.theme_labels.update(labels)
+            self.save()
+
+    def distribution(self) -> dict:
+        """Return the number and share of documents per theme."""
+        with self._lock:
+            self._load()
+            assigned = [d["theme_id"] for d in self.documents.values() if d["theme_id"] is not None]
+            total = len(assigned)
+            counts = {theme_id: 0 for theme_id in range(len(self.centroids))}
+            for theme_id in assigned:
+                counts[theme_id] += 1
+            return {
+                "total_documents": len(self.documents),
+                "assigned_documents": total,
+                "total_themes": len(self.centroids),
+                "themes": [
+                    {
+                        "theme_id": theme_id,
+                        "label": self.theme_labels.get(theme_id),
+                        "documents": count,
+                        "percentage": round(count / total * 100, 2) if total else 0.0
+                    }
+                    for theme_id, count in counts.items()
+                ],
+                "assigned_since_fit": self.assigned_since_fit,
+                "last_fit_at": self.last_fit_at
+            }
+
+    def theme_members(self, theme_id: int) -> List[dict]:
+        """Return the documents assigned to a theme, most similar first."""
+        with self._lock:
+            self._load()
+            members = [
+                {"document_id": document_id, **{k: v for k, v in d.items() if k not in ("content_hash", "preview")}}
+                for document_id, d in self.documents.items()
+                if d["theme_id"] == theme_id
+            ]
+            return sorted(members, key=lambda m: -(m["similarity"] or 0))
+
+    def document_theme(self, document_id: str) -> Optional[dict]:
+        """Return the theme assignment of a document."""
+        with self._lock:
+            self._load()
+            if document_id not in self.documents:
+                return None
+            assignment = self._assignment(document_id)
+            assignment["label"] = self.theme_labels.get(assignment["theme_id"])
+            return assignment
+
+    def reset(self):
+        """Forget every document and theme."""
+        with self._lock:
+            self.documents, self.vectors = {}, {}
+            self.centroids = np.zeros((0, 0), dtype=np.float32)
+            self.centroid_counts, self.theme_labels = [], {}
+            self.assigned_since_fit, self.last_fit_at = 0, None
+            self._changed, self._removed = set(), set()
+            self._shards, self._shard_seq = [], 0
+            self._loaded = True
+            if os.path.isdir(self.model_dir):
+                for name in os.listdir(self.model_dir):
+                    if name.endswith(".npz") or name == "state.json":
+                        os.remove(os.path.join(self.model_dir, name))
+
+
+_model: Optional[MailboxTopicModel] = None
+_model_lock = threading.Lock()
+
+
+def get_topic_model() -> MailboxTopicModel:
+    """Return the process-wide mailbox topic model."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = MailboxTopicModel()
+        return _model
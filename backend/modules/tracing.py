@@ -0,0 +1,332 @@
+"""
+Tracing Module
+Per-request trace spans propagated with contextvars through the route, utils and
+modules layers, exported as JSON lines or OTLP/HTTP (JSON) to a local collector,
+and returned in response headers when a request carries the debug header
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Default configuration
+DEFAULT_TRACE_JSONL_PATH = "traces.jsonl"
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+DEFAULT_EXPORT_QUEUE_SIZE = 1000
+DEFAULT_EXPORT_BATCH_SIZE = 50
+DEFAULT_MAX_HEADER_CHARS = 8000
+
+SERVICE_NAME = "email-processing-api"
+DEBUG_HEADER = "X-Debug-Trace"
+
+# Exporters: "none" (traces only built for debug requests), "jsonl" or "otlp"
+TRACE_EXPORTERS = ("none", "jsonl", "otlp")
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "none")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_JSONL_PATH = os.environ.get("TRACE_JSONL_PATH", DEFAULT_TRACE_JSONL_PATH)
+OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", DEFAULT_OTLP_ENDPOINT)
+
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    attributes: Dict = field(default_factory=dict)
+    _perf_start: float = field(default_factory=time.perf_counter, repr=False)
+    _duration: Optional[float] = field(default=None, repr=False)
+
+    def finish(self):
+        if self._duration is None:
+            self._duration = time.perf_counter() - self._perf_start
+            self.end_ns = self.start_ns + int(self._duration * 1e9)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self._duration is None else round(self._duration * 1000, 3)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class Trace:
+    """Spans of one request; shared by every task and thread working on it."""
+
+    def __init__(self, root: Span, export: bool):
+        self.root = root
+        self.trace_id = root.trace_id
+        self.export = export
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._tokens = None
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s.start_ns)
+
+    def to_dict(self) -> Dict:
+        return {"trace_id": self.trace_id, "spans": [s.to_dict() for s in self.spans()]}
+
+    def detach(self):
+        """Restore the context that was active before start_request_trace()."""
+        if self._tokens is not None:
+            _current_trace.reset(self._tokens[0])
+            _current_span.reset(self._tokens[1])
+            self._tokens = None
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Record a span under the current one (usable as a context manager or a decorator).
+
+    Outside a traced request this does nothing.
+
+    Args:
+        name: Span name
+        **attributes: Span attributes
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=trace.trace_id,
+        span_id=_new_id(64),
+        parent_id=parent.span_id if parent else None,
+        attributes=dict(attributes)
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = str(e)[:200]
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        trace.add(current)
+
+
+def set_attributes(**attributes):
+    """Add attributes to the current span (e.g. token counts), if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+
+def bind_context(fn):
+    """
+    Bind fn to a copy of the current context, so a thread pool worker records
+    its spans under the submitting request. Call once per submitted task.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def start_request_trace(name: str, traceparent: Optional[str] = None, debug: bool = False) -> Optional[Trace]:
+    """
+    Start the trace of a request and make its root span current.
+
+    The request is traced when it is sampled for export (TRACE_EXPORT and
+    TRACE_SAMPLE_RATE) or when it asked for the span breakdown (debug).
+    A W3C traceparent header continues the caller's trace.
+
+    Returns:
+        The Trace, or None when the request is not traced
+    """
+    export = TRACE_EXPORT != "none" and random.random() < TRACE_SAMPLE_RATE
+    if not (export or debug):
+        return None
+    match = _TRACEPARENT_RE.match((traceparent or "").strip().lower())
+    trace_id, parent_id = (match.group(1), match.group(2)) if match else (_new_id(128), None)
+    root = Span(name=name, trace_id=trace_id, span_id=_new_id(64), parent_id=parent_id)
+    trace = Trace(root, export=export)
+    trace._tokens = (_current_trace.set(trace), _current_span.set(root))
+    return trace
+
+
+def finish_request_trace(trace: Trace, **attributes):
+    """End the root span and queue the trace for export."""
+    trace.root.attributes.update(attributes)
+    trace.root.finish()
+    trace.add(trace.root)
+    if trace.export:
+        get_exporter().submit(trace)
+
+
+def debug_headers(trace: Trace) -> Dict[str, str]:
+    """
+    Response headers describing the spans finished so far.
+
+    Server-Timing (shown by browser devtools) sums durations per span name;
+    X-Trace-Spans holds the span tree as compact JSON.
+    """
+    spans = trace.spans()
+    totals: Dict[str, float] = {}
+    for s in spans:
+        totals[s.name] = totals.get(s.name, 0.0) + (s.duration_ms or 0.0)
+    server_timing = ", ".join(
+        f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)};dur={ms:.1f}" for name, ms in totals.items()
+    )
+    breakdown = json.dumps(
+        [
+            {"name": s.name, "id": s.span_id, "parent": s.parent_id, "ms": s.duration_ms, "status": s.status}
+            for s in spans
+        ],
+        separators=(",", ":"),
+        ensure_ascii=True
+    )
+    if len(breakdown) > DEFAULT_MAX_HEADER_CHARS:
+        breakdown = json.dumps({"truncated": True, "spans": len(spans)})
+    return {"X-Trace-Id": trace.trace_id, "Server-Timing": server_timing, "X-Trace-Spans": breakdown}
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(traces: List[Trace]) -> Dict:
+    """Encode traces as an OTLP/HTTP JSON ExportTraceServiceRequest."""
+    spans = []
+    for trace in traces:
+        for s in trace.spans():
+            encoded = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 2 if s is trace.root else 1,  # SERVER for the request, INTERNAL otherwise
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2 if s.status == "error" else 1}
+            }
+            if s.parent_id:
+                encoded["parentSpanId"] = s.parent_id
+            spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}]
+        }]
+    }
+
+
+class TraceExporter:
+    """Writes finished traces from a background thread, off the request path."""
+
+    def __init__(self, kind: str = TRACE_EXPORT, queue_size: int = DEFAULT_EXPORT_QUEUE_SIZE):
+        if kind not in TRACE_EXPORTERS:
+            raise ValueError(f"Unknown trace exporter '{kind}'. Expected one of: {', '.join(TRACE_EXPORTERS)}")
+        self.kind = kind
+        self.exported = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace):
+        if self.kind == "none":
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < DEFAULT_EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                # Imported here: logging_config depends on this module
+                from modules.logging_config import get_logger
+
+                get_logger("tracing").warning("Trace export (%s) failed: %s", self.kind, e)
+
+    def export(self, traces: List[Trace]):
+        if self.kind == "jsonl":
+            with open(TRACE_JSONL_PATH, "a", encoding="utf-8") as f:
+                for trace in traces:
+                    f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+        elif self.kind == "otlp":
+            import requests
+
+            resp = requests.post(OTLP_ENDPOINT, json=to_otlp(traces), timeout=5)
+            resp.raise_for_status()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> TraceExporter:
+    """Return the process-wide exporter configured by TRACE_EXPORT."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = TraceExporter()
+        return _exporter
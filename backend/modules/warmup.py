@@ -0,0 +1,149 @@
+"""
+Warmup Module
+Loads slow subsystems in the background after startup (embedding model with a
+dummy encode, OCR engine check, LLM connection pre-open) and tracks their
+readiness for the /ready endpoint
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+from modules.logging_config import get_logger
+
+logger = get_logger("warmup")
+
+# Default configuration
+DEFAULT_WARMUP_SUBSYSTEMS = "embeddings,ocr,llm"
+DEFAULT_WARMUP_REQUIRED = "embeddings"
+DEFAULT_LLM_WARMUP_TIMEOUT = 10.0  # seconds
+
+STATUS_PENDING = "pending"
+STATUS_WARMING = "warming"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+# Subsystems warmed at startup ("" disables warmup) and those a worker needs before taking traffic
+WARMUP_SUBSYSTEMS = _env_list("WARMUP_SUBSYSTEMS", DEFAULT_WARMUP_SUBSYSTEMS)
+WARMUP_REQUIRED = _env_list("WARMUP_REQUIRED", DEFAULT_WARMUP_REQUIRED)
+LLM_WARMUP_TIMEOUT = float(os.environ.get("LLM_WARMUP_TIMEOUT", DEFAULT_LLM_WARMUP_TIMEOUT))
+
+
+def warm_embeddings() -> Dict:
+    """Load the shared embedding model and run one encode (first-call kernels, tokenizer)."""
+    from modules.embeddings import get_embeddings, EMBEDDING_BACKEND
+
+    get_embeddings().embed_query("warmup")
+    return {"backend": EMBEDDING_BACKEND}
+
+
+def warm_ocr() -> Dict:
+    """Import OpenCV and check that the Tesseract binary runs."""
+    import cv2
+    from modules.attachment_processor import get_tesseract
+
+    return {"opencv_version": cv2.__version__, "tesseract_version": str(get_tesseract().get_tesseract_version())}
+
+
+def warm_llm() -> Dict:
+    """Open a pooled HTTPS connection to each configured OpenAI-compatible endpoint."""
+    from modules.llm_client import clients
+
+    if not clients:
+        raise RuntimeError("No LLM client configured (see config/.env)")
+    reachable = []
+    # Several model names may share one client
+    for client in {id(c): c for c in clients.values()}.values():
+        client.with_options(timeout=LLM_WARMUP_TIMEOUT, max_retries=0).models.list()
+        reachable.append(str(client.base_url))
+    return {"endpoints": reachable}
+
+
+WARMUP_TASKS: Dict[str, Callable[[], Dict]] = {
+    "embeddings": warm_embeddings,
+    "ocr": warm_ocr,
+    "llm": warm_llm
+}
+
+
+class WarmupState:
+    """Per-subsystem warmup status, durations and errors."""
+
+    def __init__(self, subsystems: List[str], required: List[str]):
+        unknown = [name for name in subsystems if name not in WARMUP_TASKS]
+        if unknown:
+            raise ValueError(f"Unknown warmup subsystem(s): {', '.join(unknown)}. Expected: {', '.join(WARMUP_TASKS)}")
+        self.required = [name for name in required if name in subsystems]
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._subsystems = {name: {"status": STATUS_PENDING, "seconds": None} for name in subsystems}
+
+    def _run(self, name: str):
+        with self._lock:
+            self._subsystems[name]["status"] = STATUS_WARMING
+        start = time.perf_counter()
+        try:
+            details = WARMUP_TASKS[name]()
+            update = {"status": STATUS_READY, **details}
+            logger.info("Warmup %s: ready in %.2fs", name, time.perf_counter() - start)
+        except Exception as e:
+            update = {"status": STATUS_FAILED, "error": str(e)}
+            logger.warning("Warmup %s failed after %.2fs: %s", name, time.perf_counter() - start, e)
+        update["seconds"] = round(time.perf_counter() - start, 4)
+        with self._lock:
+            self._subsystems[name].update(update)
+
+    def start(self):
+        """Warm every subsystem in its own daemon thread (I/O and model loading overlap)."""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.perf_counter()
+        for name in self._subsystems:
+            threading.Thread(target=self._run, args=(name,), name=f"warmup-{name}", daemon=True).start()
+
+    def report(self) -> Dict:
+        """
+        Return the readiness report.
+
+        The worker is ready once no subsystem is still warming and every
+        required subsystem is ready; optional subsystems may have failed.
+        """
+        with self._lock:
+            subsystems = {name: dict(state) for name, state in self._subsystems.items()}
+            started = self._started_at
+        finished = all(state["status"] in (STATUS_READY, STATUS_FAILED) for state in subsystems.values())
+        ready = finished and all(subsystems[name]["status"] == STATUS_READY for name in self.required)
+        durations = [state["seconds"] for state in subsystems.values() if state["seconds"] is not None]
+        return {
+            "ready": ready,
+            "warmup_started": started is not None,
+            "warmup_seconds": round(max(durations), 4) if finished and durations else None,
+            "required": self.required,
+            "subsystems": subsystems
+        }
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_warmup_state() -> WarmupState:
+    """Return the process-wide warmup state."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = WarmupState(WARMUP_SUBSYSTEMS, WARMUP_REQUIRED)
+        return _state
+
+
+def start_warmup() -> WarmupState:
+    """Start the background warmup (idempotent)."""
+    state = get_warmup_state()
+    state.start()
+    return state